@@ -0,0 +1,75 @@
+"""
+打包版入口。
+
+打包版只负责绘图：读取活动数据（优先使用同名快照），从预处理的素材缓存中取背景图片与纹理，
+输出甘特图。素材缓存、字体缓存与默认数据随程序一起分发，见 toexe.py。
+"""
+
+import time
+
+T0 = time.perf_counter()
+
+import os
+import sys
+
+
+def bundle_dir() -> str:
+    """打包后随程序分发的文件所在目录，从源码运行时为仓库目录"""
+    return getattr(sys, "_MEIPASS", os.path.dirname(os.path.abspath(__file__)))
+
+
+def register_bundled_fonts() -> None:
+    """注册随程序分发的字体（例如 SimHei），目标机器没有安装时也能正确显示中文"""
+    fonts = os.path.join(bundle_dir(), "fonts")
+    if not os.path.isdir(fonts):
+        return
+    from matplotlib import font_manager
+
+    for name in os.listdir(fonts):
+        if name.lower().endswith((".ttf", ".otf", ".ttc")):
+            font_manager.fontManager.addfont(os.path.join(fonts, name))
+
+
+def run(data: str | None = None, output: str = "./Gantt.png", fmt: str = "png", background: str | None = None,
+        pack: bool = False) -> None:
+    """
+    绘制甘特图。
+
+    参数:
+    data (str | None): 活动数据，默认为当前目录下的 output.csv，不存在时使用随程序分发的数据。
+    output (str): 输出路径。
+    fmt (str): 输出格式。
+    background (str | None): 背景图片的原文件名，默认随机挑选。
+    pack (bool): 是否把同一类型中互不重叠的活动压缩到同一行。
+    """
+    register_bundled_fonts()
+    import main
+    from asset_cache import load_assets
+
+    data = data or ("./output.csv" if os.path.exists("./output.csv") else os.path.join(bundle_dir(), "output.csv"))
+    cache_dir = os.path.join(bundle_dir(), "素材缓存")
+    if os.path.exists(os.path.join(cache_dir, "index.json")):
+        main.main(pack=pack, fmt=fmt, output=output, paths=(None, None, data, None),
+                  assets=load_assets(cache_dir, background))
+    else:
+        # 从源码运行且没有生成素材缓存时读取原图
+        background_pic_dir, texture_dir = main.get_random_paths()[:2]
+        if background:
+            background_pic_dir = os.path.join("./背景图", background)
+        main.main(pack=pack, fmt=fmt, output=output, paths=(background_pic_dir, texture_dir, data, None))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from encoding import FORMATS
+
+    parser = argparse.ArgumentParser(description="绘制明日方舟活动甘特图（打包版）")
+    parser.add_argument("--data", help="活动数据 CSV，默认为当前目录下的 output.csv")
+    parser.add_argument("--output", default="./Gantt.png", help="输出路径")
+    parser.add_argument("--format", default="png", choices=list(FORMATS), help="输出格式")
+    parser.add_argument("--background", help="背景图片的原文件名，默认随机挑选")
+    parser.add_argument("--pack-lanes", action="store_true", help="将同一类型中互不重叠的活动压缩到同一行")
+    args = parser.parse_args()
+    run(args.data, args.output, args.format, args.background, args.pack_lanes)
+    print(f"启动到输出用时 {time.perf_counter()-T0:.2f} s")
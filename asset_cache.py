@@ -0,0 +1,114 @@
+"""
+预处理素材缓存。
+
+背景图片原图最大有 6932×4680，每次启动都要完整解码、调暗，但 figimage 从画布左下角贴图，
+16×9 英寸、100 dpi 的画布只显示其中 1600×900 的部分。这里在构建时把每张背景图片与纹理
+处理一次（设置透明度、调暗）、裁剪到画布可见的区域，保存为可直接内存映射的 .npy，
+同时把从原图提取的主要颜色写入 index.json。运行时 load_assets 直接映射，不再解码 JPEG，
+绘制结果与读取原图完全相同。
+"""
+
+import json
+import os
+from glob import glob
+from random import choice
+
+import numpy as np
+
+DEFAULT_DIR = "./素材缓存"
+CANVAS_SIZE = (1600, 900)
+
+
+def crop_visible(img: np.ndarray, size: tuple[int, int] = CANVAS_SIZE) -> np.ndarray:
+    """
+    裁剪出贴在画布左下角时可见的部分。
+
+    figimage 默认 origin="upper"，数组的最后一行贴在画布底边，因此保留最后 height 行与前 width 列。
+
+    参数:
+    img (np.ndarray): 图像数组。
+    size (tuple[int, int]): 画布的宽与高（像素）。
+
+    返回:
+    np.ndarray: 裁剪后的连续数组。
+    """
+    width, height = size
+    return np.ascontiguousarray(img[max(img.shape[0]-height, 0):, :width])
+
+
+def build_asset_cache(
+    out_dir: str = DEFAULT_DIR,
+    backgrounds: list[str] | None = None,
+    textures: list[str] | None = None,
+    size: tuple[int, int] = CANVAS_SIZE,
+    num_colors: int = 10,
+) -> dict:
+    """
+    处理全部背景图片与纹理并写入缓存目录。
+
+    参数:
+    out_dir (str): 缓存目录。
+    backgrounds (list[str] | None): 背景图片，默认为 ./背景图 下的全部文件。
+    textures (list[str] | None): 纹理，默认为 ./纹理 下的全部文件。
+    size (tuple[int, int]): 画布的宽与高（像素）。
+    num_colors (int): 提取的主要颜色数量。
+
+    返回:
+    dict: 写入 index.json 的索引。
+    """
+    from main import extract_main_colors, load_background_image, load_texture
+
+    os.makedirs(out_dir, exist_ok=True)
+    index = {"size": list(size), "backgrounds": [], "textures": []}
+    for i, path in enumerate(sorted(backgrounds or glob("./背景图/*"))):
+        name = f"background{i}.npy"
+        np.save(os.path.join(out_dir, name), crop_visible(load_background_image(path), size))
+        index["backgrounds"].append({"source": os.path.basename(path), "file": name,
+                                     "colors": extract_main_colors(path, num_colors)})
+    for i, path in enumerate(sorted(textures or glob("./纹理/*"))):
+        name = f"texture{i}.npy"
+        np.save(os.path.join(out_dir, name), crop_visible(load_texture(path), size))
+        index["textures"].append({"source": os.path.basename(path), "file": name})
+    with open(os.path.join(out_dir, "index.json"), "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, indent=1)
+    return index
+
+
+def load_assets(cache_dir: str = DEFAULT_DIR, background: str | None = None,
+                texture: str | None = None) -> tuple[np.ndarray, np.ndarray, list[str]]:
+    """
+    从缓存中取出一组素材，格式与 main.main 的 assets 参数相同。
+
+    参数:
+    cache_dir (str): 缓存目录。
+    background (str | None): 背景图片的原文件名，默认随机挑选。
+    texture (str | None): 纹理的原文件名，默认随机挑选。
+
+    返回:
+    tuple[np.ndarray, np.ndarray, list[str]]: 背景图片、纹理（只读内存映射）与主要颜色。
+    """
+    with open(os.path.join(cache_dir, "index.json"), encoding="utf-8") as f:
+        index = json.load(f)
+
+    def pick(entries: list[dict], source: str | None) -> dict:
+        if source is None:
+            return choice(entries)
+        for entry in entries:
+            if entry["source"] == source:
+                return entry
+        raise KeyError(f"素材缓存中没有 {source}")
+
+    bg = pick(index["backgrounds"], background)
+    tw = pick(index["textures"], texture)
+    return (np.load(os.path.join(cache_dir, bg["file"]), mmap_mode="r"),
+            np.load(os.path.join(cache_dir, tw["file"]), mmap_mode="r"), bg["colors"])
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="预处理背景图片与纹理")
+    parser.add_argument("out_dir", nargs="?", default=DEFAULT_DIR, help="缓存目录")
+    args = parser.parse_args()
+    index = build_asset_cache(args.out_dir)
+    print(f"已缓存 {len(index['backgrounds'])} 张背景图片、{len(index['textures'])} 张纹理到 {args.out_dir}")
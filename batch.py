@@ -0,0 +1,268 @@
+"""
+多配置批量绘图。
+
+每个配置（profile）指定数据文件、筛选条件、背景、纹理与输出路径，例如不同服务器、
+个人清单或只看卡池的视图。配置在进程池中并行绘制；背景图片与纹理只在主进程中解码、
+处理一次，放进 multiprocessing.shared_memory，工作进程直接映射使用，不再各自解码、各持一份。
+绘图核心不使用 pyplot 的全局状态，也可以用 --threads 在同一进程的线程池中绘制，素材直接共享，
+主题相同的配置共用同一个静态图层（见 layers.py）。
+
+配置文件是 JSON 列表，例如：
+    [
+        {"name": "国服", "data": "./output.csv", "output": "./Gantt.png"},
+        {"name": "卡池", "data": "./output.csv", "types": [0], "output": "./卡池.png",
+         "background": "./背景图/1.png"}
+    ]
+"""
+
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from glob import glob
+from multiprocessing import shared_memory
+from random import choice
+
+import numpy as np
+
+from layers import LayerCache
+from profiling import StageProfiler
+
+
+@dataclass
+class Profile:
+    """一个绘图配置"""
+
+    name: str
+    data: str
+    output: str
+    background: str | None = None
+    texture: str | None = None
+    types: list[int] | None = None
+    keyword: str | None = None
+    format: str = "png"
+    pack: bool = False
+    processed: str | None = None  # 筛选后的活动数据保存路径，None 表示不保存
+
+
+def load_profiles(path: str) -> list[Profile]:
+    """从 JSON 文件读取配置列表"""
+    with open(path, encoding="utf-8") as f:
+        return [Profile(**item) for item in json.load(f)]
+
+
+@dataclass
+class SharedArray:
+    """共享内存中一个数组的描述，可以传给其他进程"""
+
+    shm_name: str
+    shape: tuple[int, ...]
+    dtype: str
+
+
+@dataclass
+class AssetStore:
+    """
+    主进程中的共享素材：每张背景图片与纹理处理一次后放入共享内存。
+
+    用 with 语句管理，退出时释放全部共享内存。
+    """
+
+    arrays: dict[str, SharedArray] = field(default_factory=dict)
+    colors: dict[str, list[str]] = field(default_factory=dict)
+    _blocks: list[shared_memory.SharedMemory] = field(default_factory=list)
+
+    def put(self, key: str, array: np.ndarray) -> None:
+        """把数组拷入新的共享内存块"""
+        if key in self.arrays:
+            return
+        shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, array.dtype, buffer=shm.buf)[...] = array
+        self._blocks.append(shm)
+        self.arrays[key] = SharedArray(shm.name, array.shape, array.dtype.str)
+
+    def close(self) -> None:
+        for shm in self._blocks:
+            shm.close()
+            shm.unlink()
+        self._blocks.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def attach(desc: SharedArray) -> tuple[np.ndarray, shared_memory.SharedMemory]:
+    """在工作进程中映射共享数组，返回只读视图与需要在用完后 close 的共享内存块"""
+    shm = shared_memory.SharedMemory(name=desc.shm_name)
+    array = np.ndarray(desc.shape, np.dtype(desc.dtype), buffer=shm.buf)
+    array.flags.writeable = False
+    return array, shm
+
+
+def resolve_assets(profiles: list[Profile]) -> None:
+    """为没有指定背景或纹理的配置随机挑选一张，使所有素材都能在主进程中预先加载"""
+    for profile in profiles:
+        profile.background = profile.background or choice(glob("./背景图/*"))
+        profile.texture = profile.texture or choice(glob("./纹理/*"))
+
+
+def build_store(profiles: list[Profile], num_colors: int = 10) -> AssetStore:
+    """
+    处理所有配置用到的背景图片与纹理（相同路径只处理一次）并放入共享内存，同时提取主要颜色。
+
+    参数:
+    profiles (list[Profile]): 已确定背景与纹理的配置。
+    num_colors (int): 提取的主要颜色数量。
+
+    返回:
+    AssetStore: 共享素材。
+    """
+    from main import extract_main_colors, load_background_image, load_texture
+
+    store = AssetStore()
+    try:
+        for profile in profiles:
+            if profile.background not in store.arrays:
+                store.put(profile.background, load_background_image(profile.background))
+                store.colors[profile.background] = extract_main_colors(profile.background, num_colors)
+            store.put(profile.texture, load_texture(profile.texture))
+    except BaseException:
+        # 中途读取失败时释放已经创建的共享内存，否则会一直留在系统中
+        store.close()
+        raise
+    return store
+
+
+def render_profile(
+    profile: Profile,
+    background: SharedArray,
+    texture: SharedArray,
+    color: list[str],
+    profiler: StageProfiler | None = None,
+) -> tuple[str, float]:
+    """
+    在工作进程中绘制一个配置。
+
+    返回:
+    tuple[str, float]: 输出路径与绘制用时（秒）。
+    """
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import main
+
+    t0 = time.perf_counter()
+    img, img_shm = attach(background)
+    tw, tw_shm = attach(texture)
+    try:
+        main.main(
+            profiler,
+            pack=profile.pack,
+            fmt=profile.format,
+            output=profile.output,
+            paths=(profile.background, profile.texture, profile.data, profile.processed),
+            types=profile.types,
+            keyword=profile.keyword,
+            assets=(img, tw, color),
+        )
+    finally:
+        del img, tw
+        img_shm.close()
+        tw_shm.close()
+    return profile.output, time.perf_counter()-t0
+
+
+def render_all(profiles: list[Profile], workers: int | None = None, profiler: StageProfiler | None = None) -> None:
+    """
+    在进程池中绘制全部配置。
+
+    参数:
+    profiles (list[Profile]): 配置列表。
+    workers (int | None): 进程数，默认为 CPU 数与配置数中的较小值。
+    profiler (StageProfiler | None): 性能剖析器，只记录主进程中的阶段。
+    """
+    profiler = profiler or StageProfiler()
+    workers = workers or min(len(profiles), os.cpu_count() or 1)
+    resolve_assets(profiles)
+    with profiler.stage("batch", profiles=len(profiles), workers=workers):
+        with profiler.stage("load_images"):
+            store = build_store(profiles)
+        with store, ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(
+                    render_profile,
+                    profile,
+                    store.arrays[profile.background],
+                    store.arrays[profile.texture],
+                    store.colors[profile.background],
+                ): profile
+                for profile in profiles
+            }
+            for future in as_completed(futures):
+                output, seconds = future.result()
+                print(f"[{futures[future].name}] 已保存 {output}，用时 {seconds:.2f} s")
+
+
+def render_threads(profiles: list[Profile], workers: int | None = None, profiler: StageProfiler | None = None) -> None:
+    """
+    在当前进程的线程池中绘制全部配置，背景图片与纹理只处理一次，各线程直接共用同一份数组。
+
+    参数:
+    profiles (list[Profile]): 配置列表。
+    workers (int | None): 线程数，默认为配置数与 CPU 数加 4 中的较小值。
+    profiler (StageProfiler | None): 性能剖析器，各线程的阶段分别嵌套记录，内存峰值合并记录在 batch 阶段中。
+    """
+    import main
+
+    profiler = profiler or StageProfiler()
+    workers = workers or min(len(profiles), (os.cpu_count() or 1)+4)
+    resolve_assets(profiles)
+    # 主题相同的配置共用静态图层，只各自绘制条形与标签
+    layers = LayerCache()
+
+    def render(profile: Profile) -> tuple[str, float]:
+        t0 = time.perf_counter()
+        main.main(
+            profiler,
+            pack=profile.pack,
+            fmt=profile.format,
+            output=profile.output,
+            paths=(profile.background, profile.texture, profile.data, profile.processed),
+            types=profile.types,
+            keyword=profile.keyword,
+            assets=(images[profile.background], images[profile.texture], colors[profile.background]),
+            layers=layers,
+        )
+        return profile.output, time.perf_counter()-t0
+
+    with profiler.stage("batch", profiles=len(profiles), workers=workers, threads=True):
+        with profiler.stage("load_images"):
+            images, colors = {}, {}
+            for profile in profiles:
+                if profile.background not in images:
+                    images[profile.background] = main.load_background_image(profile.background)
+                    colors[profile.background] = main.extract_main_colors(profile.background, 10)
+                if profile.texture not in images:
+                    images[profile.texture] = main.load_texture(profile.texture)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(render, profile): profile for profile in profiles}
+            for future in as_completed(futures):
+                output, seconds = future.result()
+                print(f"[{futures[future].name}] 已保存 {output}，用时 {seconds:.2f} s")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="按多个配置批量绘制活动甘特图")
+    parser.add_argument("profiles", help="配置文件（JSON 列表）")
+    parser.add_argument("--workers", type=int, help="进程数（使用 --threads 时为线程数）")
+    parser.add_argument("--threads", action="store_true", help="在同一进程的线程池中绘制")
+    StageProfiler.add_arguments(parser)
+    args = parser.parse_args()
+    render = render_threads if args.threads else render_all
+    render(load_profiles(args.profiles), args.workers, StageProfiler.from_args(args, source="batch"))
@@ -0,0 +1,115 @@
+"""
+日历坐标轴。
+
+x 轴的单位是相对原点（通常是绘图左边界）的小时数。CalendarLocator 与 CalendarFormatter
+根据当前视野生成日期刻度和“日期·周几”标签，刻度表用 datetime64 数组向量化生成，
+并按（原点, 视野, 步长）缓存，批量绘图与交互浏览时可以直接复用。
+"""
+
+from datetime import datetime, timedelta
+from functools import lru_cache
+from math import ceil, floor
+
+import numpy as np
+from matplotlib.ticker import Formatter, Locator
+
+WEEKNAME = np.array(["一", "二", "三", "四", "五", "六", "日"], dtype=object)
+# 默认绘图窗口（main.time_window）：左边界在今天之前 WINDOW_BEFORE_DAYS 天，
+# 右边界在今天之后 WINDOW_AFTER_DAYS-周几 天，即三周后的周日
+WINDOW_BEFORE_DAYS = 3
+WINDOW_AFTER_DAYS = 22
+
+
+@lru_cache(maxsize=256)
+def tick_table(
+    origin: datetime,
+    start_hour: int,
+    end_hour: int,
+    hour_step: int = 4,
+    day_ticks: bool = True,
+) -> tuple[tuple[int, ...], tuple[str, ...]]:
+    """
+    生成视野 [start_hour, end_hour] 内的刻度位置与标签。
+
+    以 hour_step 小时为步长遍历视野：第一个刻度视本月剩余天数标注月份或日期，
+    跨月的刻度标注月份，其余整日刻度标注日期，每个标签下方附带周几。
+
+    参数:
+    origin (datetime): x 轴原点对应的时间。
+    start_hour (int): 视野起点（相对原点的小时数）。
+    end_hour (int): 视野终点（相对原点的小时数）。
+    hour_step (int): 遍历步长（小时）。
+    day_ticks (bool): 是否为每个整日放置刻度，为 False 时只保留起点与跨月的刻度。
+
+    返回:
+    tuple[tuple[int, ...], tuple[str, ...]]: 刻度位置与对应的标签。
+    """
+    if end_hour < start_hour:
+        return (), ()
+    hours = np.arange(start_hour, end_hour+1, hour_step)
+    dates = np.datetime64(origin, "h")+hours.astype("timedelta64[h]")
+    days = dates.astype("datetime64[D]")
+    months = days.astype("datetime64[M]")
+    month = months.astype(np.int64) % 12+1
+    day = (days-months).astype(np.int64)+1
+    weekday = (days.astype(np.int64)+3) % 7  # 1970-01-01 是周四
+    month_change = np.r_[False, month[1:] != month[:-1]]
+    day_tick = (hours % 24 == 0) & day_ticks
+    first = np.zeros(len(hours), dtype=bool)
+    first[0] = True
+    # 视野起点：按默认窗口估算右边界落在本月的第几天（起点日期加 WINDOW_BEFORE_DAYS 回到今天，
+    # 再加 WINDOW_AFTER_DAYS-周几，周几沿用起点的），窗口不跨月时起点标注月份，
+    # 跨月时起点只标注日期，月份由跨月处的刻度标注
+    days_in_month = ((months[0]+1).astype("datetime64[D]")-months[0].astype("datetime64[D]")).astype(np.int64)
+    window_end_day = day[0]+WINDOW_BEFORE_DAYS+WINDOW_AFTER_DAYS-weekday[0]
+    first_month = window_end_day < days_in_month
+    use_month = month_change | (first & first_month)
+    mask = first | month_change | day_tick
+    text = [
+        (f"{m:02d}月" if um else f"{d:02d}")+"\n·\n周"+WEEKNAME[w]
+        for m, d, w, um in zip(month[mask], day[mask], weekday[mask], use_month[mask])
+    ]
+    return tuple(hours[mask].tolist()), tuple(text)
+
+
+class CalendarLocator(Locator):
+    """按日期（整日与跨月处）放置主刻度的定位器"""
+
+    def __init__(self, origin: datetime, hour_step: int = 4, max_days: int | None = None):
+        """
+        参数:
+        origin (datetime): x 轴原点对应的时间，应为零点。
+        hour_step (int): 生成刻度表时的遍历步长（小时）。
+        max_days (int | None): 视野超过这么多天时只在跨月处放置刻度，None 表示不限制。
+        """
+        self.origin = origin
+        self.hour_step = hour_step
+        self.max_days = max_days
+        self.labels: dict[int, str] = {}
+
+    def __call__(self):
+        vmin, vmax = self.axis.get_view_interval()
+        return self.tick_values(vmin, vmax)
+
+    def tick_values(self, vmin, vmax):
+        vmin, vmax = sorted((vmin, vmax))
+        step = self.hour_step
+        day_ticks = self.max_days is None or vmax-vmin <= self.max_days*24
+        if not day_ticks:
+            # 只标注月份时以整日为步长即可，视野很宽时也只需遍历少量日期
+            step = 24
+        start = floor(vmin/step)*step
+        end = ceil(vmax/step)*step
+        positions, labels = tick_table(self.origin, start, end, step, day_ticks)
+        self.labels = dict(zip(positions, labels))
+        return np.asarray(positions, dtype=float)
+
+
+class CalendarFormatter(Formatter):
+    """与 CalendarLocator 配套，从其刻度表中查出标签"""
+
+    def __init__(self, locator: CalendarLocator):
+        self.locator = locator
+
+    def __call__(self, x, pos=None):
+        return self.locator.labels.get(round(x), "")
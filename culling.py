@@ -0,0 +1,258 @@
+"""
+视口裁剪、细节层次与标签避让。
+
+在创建任何图元之前，先用向量化运算算出每个活动在窗口中的条形位置并剔除不可见的活动；
+宽度不足几个像素的条形按行合并成摘要标记；活动名称按优先级放置，
+同一行中相互重叠的标签会被省略或丢弃。
+"""
+
+from bisect import bisect_left
+from dataclasses import dataclass
+from datetime import datetime
+
+import numpy as np
+
+HOUR = np.timedelta64(1, "h")
+
+
+@dataclass
+class BarGeometry:
+    """
+    所有活动在窗口中的条形几何信息（单位：相对左边界的小时数）。
+
+    left 为条形左端，width 为条形宽度，label_width 为被右边界截断后可用于放置标签的宽度，
+    visible 标记活动是否需要绘制。
+    """
+
+    left: np.ndarray
+    width: np.ndarray
+    label_width: np.ndarray
+    visible: np.ndarray
+
+
+def compute_geometry(
+    starts: np.ndarray,
+    ends: np.ndarray,
+    left_border: datetime,
+    right_border: datetime,
+) -> BarGeometry:
+    """
+    向量化地计算所有活动的条形几何信息，规则与逐行绘制时完全一致。
+
+    参数:
+    starts (np.ndarray): 开始时间（datetime64）。
+    ends (np.ndarray): 结束时间（datetime64）。
+    left_border (datetime): 绘图的左边界时间。
+    right_border (datetime): 绘图的右边界时间。
+
+    返回:
+    BarGeometry: 条形几何信息。
+    """
+    starts = np.asarray(starts, dtype="datetime64[s]")
+    ends = np.asarray(ends, dtype="datetime64[s]")
+    lb = np.datetime64(left_border, "s")
+    rbt = np.datetime64(right_border, "s")
+    rb = (rbt-lb) // HOUR
+    duration = (ends-starts) // HOUR
+    to_left = (ends-lb) // HOUR
+    width = np.minimum(duration, to_left)+1
+    left = np.maximum((starts-lb) // HOUR, -1)
+    label_width = np.minimum(np.minimum(width, (rbt-starts) // HOUR), rb)
+    visible = (to_left > 0) & (left < rb) & (left+width >= 3*24)
+    return BarGeometry(left, width, label_width, visible)
+
+
+def merge_small_bars(
+    left: np.ndarray,
+    width: np.ndarray,
+    rows: np.ndarray,
+    min_width: float,
+    max_gap: float,
+) -> tuple[np.ndarray, list[tuple[int, float, float, int]]]:
+    """
+    找出宽度小于 min_width 的条形，并把同一行中相距不超过 max_gap 的这类条形合并为摘要标记。
+
+    参数:
+    left (np.ndarray): 条形左端。
+    width (np.ndarray): 条形宽度。
+    rows (np.ndarray): 条形所在的行。
+    min_width (float): 可以单独绘制的最小宽度（与 left 同单位）。
+    max_gap (float): 合并时允许的最大间隔。
+
+    返回:
+    tuple[np.ndarray, list[tuple[int, float, float, int]]]:
+        过小条形的掩码，以及摘要标记列表（行, 左端, 宽度, 合并的活动数）。
+    """
+    small = width < min_width
+    idx = np.flatnonzero(small)
+    summaries = []
+    if len(idx) == 0:
+        return small, summaries
+    order = idx[np.lexsort((left[idx], rows[idx]))]
+    row, l, r, count = rows[order[0]], left[order[0]], left[order[0]]+width[order[0]], 0
+    for i in order:
+        if rows[i] == row and left[i] <= r+max_gap:
+            r = max(r, left[i]+width[i])
+            count += 1
+            continue
+        summaries.append((int(row), float(l), float(r-l), count))
+        row, l, r, count = rows[i], left[i], left[i]+width[i], 1
+    summaries.append((int(row), float(l), float(r-l), count))
+    return small, summaries
+
+
+class BarIndex:
+    """
+    按行保存固定不变的条形区间。每行按左端排序并记录左端之前的最大右端，
+    任意区间（条形之间可以重叠）的重叠判断都是一次二分查找。
+    """
+
+    def __init__(self, lo: np.ndarray, hi: np.ndarray, rows: np.ndarray):
+        """
+        参数:
+        lo (np.ndarray): 条形左端。
+        hi (np.ndarray): 条形右端。
+        rows (np.ndarray): 条形所在的行。
+        """
+        lo, hi, rows = np.asarray(lo, dtype=float), np.asarray(hi, dtype=float), np.asarray(rows)
+        order = np.lexsort((lo, rows))
+        bounds = np.flatnonzero(np.diff(rows[order]))+1
+        self._rows: dict[int, tuple[list[float], list[float]]] = {}
+        for part in np.split(order, bounds) if len(order) else []:
+            self._rows[rows[part[0]].item()] = (lo[part].tolist(), np.maximum.accumulate(hi[part]).tolist())
+
+    def collides(self, row: int, lo: float, hi: float) -> bool:
+        if row not in self._rows:
+            return False
+        starts, reach = self._rows[row]
+        i = bisect_left(starts, hi)
+        return i > 0 and reach[i-1] > lo
+
+
+class LabelIndex:
+    """
+    已放置的标签。同一行的标签互不重叠，按位置的顺序与按中心的顺序相同，
+    因此预先按（行, 中心）给候选标签排好名次，用树状数组维护已放置的名次：
+    新标签只需与同一行中左右最近的已放置标签比较，查询与插入都是 O(log n)。
+    """
+
+    def __init__(self, centers: np.ndarray, rows: np.ndarray):
+        """
+        参数:
+        centers (np.ndarray): 候选标签的中心位置。
+        rows (np.ndarray): 候选标签所在的行。
+        """
+        order = np.lexsort((centers, rows))
+        self._rank = np.empty(len(order), dtype=np.int64)
+        self._rank[order] = np.arange(len(order))
+        self._rank = self._rank.tolist()
+        self._row_at = np.asarray(rows)[order].tolist()
+        self._spans: list[tuple[float, float] | None] = [None]*len(order)
+        self._tree = [0]*(len(order)+1)
+        self._count = 0
+
+    def _placed_before(self, rank: int) -> int:
+        """名次小于 rank 的已放置标签数"""
+        total = 0
+        while rank > 0:
+            total += self._tree[rank]
+            rank &= rank-1
+        return total
+
+    def _kth(self, k: int) -> int:
+        """第 k 个（从 1 开始）已放置标签的名次"""
+        pos, step = 0, 1 << (len(self._tree)-1).bit_length()
+        while step:
+            if pos+step < len(self._tree) and self._tree[pos+step] < k:
+                pos += step
+                k -= self._tree[pos]
+            step >>= 1
+        return pos
+
+    def collides(self, i: int, lo: float, hi: float) -> bool:
+        """候选标签 i 放在 [lo, hi) 时是否与同一行已放置的标签重叠"""
+        rank = self._rank[i]
+        before = self._placed_before(rank)
+        neighbours = []
+        if before > 0:
+            neighbours.append(self._kth(before))
+        if before < self._count:
+            neighbours.append(self._kth(before+1))
+        for j in neighbours:
+            if self._row_at[j] == self._row_at[rank]:
+                span_lo, span_hi = self._spans[j]
+                if span_lo < hi and span_hi > lo:
+                    return True
+        return False
+
+    def add(self, i: int, lo: float, hi: float) -> None:
+        """放置候选标签 i"""
+        rank = self._rank[i]
+        self._spans[rank] = (lo, hi)
+        self._count += 1
+        rank += 1
+        while rank < len(self._tree):
+            self._tree[rank] += 1
+            rank += rank & -rank
+
+
+def place_labels(
+    names: list[str],
+    centers: np.ndarray,
+    spans: np.ndarray,
+    rows: np.ndarray,
+    x_max: float,
+    measure,
+) -> list[str | None]:
+    """
+    为活动名称选择显示文本：优先完整显示，必要时在条形内部省略，与已放置标签冲突则丢弃。
+    超出条形的完整标签不能压到同一行的其他条形上。
+
+    较宽的条形优先放置；条形保存在 BarIndex 中，已放置的标签保存在 LabelIndex 中，总复杂度 O(n log n)。
+
+    参数:
+    names (list[str]): 活动名称。
+    centers (np.ndarray): 标签中心位置。
+    spans (np.ndarray): 条形中可用于放置标签的宽度。
+    rows (np.ndarray): 标签所在的行。
+    x_max (float): 窗口右边界，标签不能超出 [0, x_max]。
+    measure (labels.LabelEngine): 提供 width(text) 与 fit(name, avail) 的测量对象，
+        单位与 centers 相同。
+
+    返回:
+    list[str | None]: 每个活动的显示文本，None 表示不显示。
+    """
+    labels: list[str | None] = [None]*len(names)
+    centers, spans, rows = np.asarray(centers, dtype=float), np.asarray(spans, dtype=float), np.asarray(rows)
+    index = LabelIndex(centers, rows)
+    # 条形本身也是障碍：超出条形的标签不能压到同一行的其他条形上
+    bars = BarIndex(centers-spans/2, centers+spans/2, rows)
+    for i in np.argsort(-spans, kind="stable").tolist():
+        name = names[i]
+        if not name:
+            continue
+        text, w = name, measure.width(name)
+        if w > spans[i]:
+            # 先尝试完整显示（允许超出条形），不行再在条形内部省略
+            lo, hi = centers[i]-w/2, centers[i]+w/2
+            bar_lo, bar_hi = centers[i]-spans[i]/2, centers[i]+spans[i]/2
+            if (
+                lo >= 0
+                and hi <= x_max
+                and not index.collides(i, lo, hi)
+                and not bars.collides(rows[i], lo, bar_lo)
+                and not bars.collides(rows[i], bar_hi, hi)
+            ):
+                index.add(i, lo, hi)
+                labels[i] = text
+                continue
+            text = measure.fit(name, spans[i])
+            if text is None:
+                continue
+            w = measure.width(text)
+        lo, hi = centers[i]-w/2, centers[i]+w/2
+        if index.collides(i, lo, hi):
+            continue
+        index.add(i, lo, hi)
+        labels[i] = text
+    return labels
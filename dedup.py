@@ -0,0 +1,193 @@
+"""
+近似重复活动检测。
+
+同一个活动经常以略有不同的名称出现多次，例如 process_name_column 生成的“【中坚池】水月/空弦”
+与原始公告中的“中坚寻访 水月、空弦”，结束时间也可能相差一分钟（03:59 与 04:00）。
+按名称精确去重无法合并它们，所有活动数据.csv 会不断累积这类重复行。
+
+活动按开始时间排序后依次扫描，只有开始时间相差不超过容差的活动才可能互为重复，
+因此维护一个滑动的时间块：块内活动的名称 n-gram 倒排表（n-gram -> 活动）。
+新活动用自己的 n-gram 查倒排表，同时得到每个候选与它共有的 n-gram 数，
+直接算出 Jaccard 相似度，再核对结束时间与类型；名称没有任何共同 n-gram 的活动不会被比较，
+长期活动也只与开始时间相近的活动比较。互为重复的活动用并查集归为一组，
+按 MergeRule 决定每组保留哪一条。
+"""
+
+import re
+import unicodedata
+from collections import Counter, defaultdict, deque
+from dataclasses import dataclass
+
+import numpy as np
+
+# 规范化时去掉的字符：括号、分隔符、标点与空白
+PUNCTUATION = re.compile(r"[\W_]+")
+# 卡池的不同写法，与 six2csv.process_name_column 的替换一致
+ALIASES = {"常驻标准寻访": "标准池", "中坚寻访": "中坚池"}
+
+
+@dataclass
+class MergeRule:
+    """近似重复的判定与合并规则"""
+
+    n: int = 2  # n-gram 的长度
+    threshold: float = 0.6  # 名称 n-gram 集合的 Jaccard 相似度下限
+    tolerance_hours: float = 24  # 开始时间、结束时间各自允许的最大差值
+    same_type: bool = True  # 是否只合并类型相同的活动
+    keep: str = "first"  # 每组保留哪一条：first 最早出现、last 最后出现、longest 名称最长
+
+
+def normalize(name: str) -> str:
+    """
+    统一全角半角、卡池写法，并去掉括号、分隔符与标点，
+    例如“【中坚池】水月/空弦”与“中坚寻访 水月、空弦”都得到“中坚池水月空弦”
+    """
+    text = unicodedata.normalize("NFKC", name)
+    for alias, canonical in ALIASES.items():
+        text = text.replace(alias, canonical)
+    return PUNCTUATION.sub("", text).lower()
+
+
+def ngrams(name: str, n: int = 2) -> frozenset[str]:
+    """规范化名称的字符 n-gram 集合，名称短于 n 时为名称本身"""
+    text = normalize(name)
+    if len(text) <= n:
+        return frozenset([text])
+    return frozenset(text[i:i+n] for i in range(len(text)-n+1))
+
+
+def jaccard(a: frozenset, b: frozenset) -> float:
+    """两个集合的 Jaccard 相似度"""
+    if not a and not b:
+        return 1.0
+    return len(a & b)/len(a | b)
+
+
+def duplicate_pairs(names: list[str], starts: np.ndarray, ends: np.ndarray, types: np.ndarray | None = None,
+                    rule: MergeRule | None = None) -> list[tuple[int, int, float]]:
+    """
+    找出互为近似重复的活动对。
+
+    参数:
+    names (list[str]): 活动名称。
+    starts (np.ndarray): 开始时间（datetime64），缺失时间的活动不参与比较。
+    ends (np.ndarray): 结束时间（datetime64）。
+    types (np.ndarray | None): 活动类型，rule.same_type 为 True 时使用。
+    rule (MergeRule | None): 判定规则，默认 MergeRule()。
+
+    返回:
+    list[tuple[int, int, float]]: (i, j, 相似度)，i < j。
+    """
+    rule = rule or MergeRule()
+    starts = np.asarray(starts, dtype="datetime64[s]")
+    ends = np.asarray(ends, dtype="datetime64[s]")
+    valid = np.flatnonzero(~np.isnat(starts) & ~np.isnat(ends))
+    if len(valid) < 2:
+        return []
+
+    tolerance = np.timedelta64(int(rule.tolerance_hours*3600), "s")
+    order = valid[np.argsort(starts[valid], kind="stable")]
+    grams = {i: ngrams(names[i], rule.n) for i in order}
+    postings: dict[str, set[int]] = defaultdict(set)  # 时间块内的 n-gram 倒排表
+    block: deque[int] = deque()  # 时间块内的活动，按开始时间排列
+    pairs = []
+    for i in order:
+        # 开始时间早于本活动超过容差的活动移出时间块
+        while block and starts[i]-starts[block[0]] > tolerance:
+            old = block.popleft()
+            for g in grams[old]:
+                postings[g].discard(old)
+                if not postings[g]:
+                    del postings[g]
+        shared = Counter(j for g in grams[i] for j in postings.get(g, ()))
+        for j, inter in shared.items():
+            score = inter/(len(grams[i])+len(grams[j])-inter)
+            if score < rule.threshold or abs(ends[i]-ends[j]) > tolerance:
+                continue
+            if rule.same_type and types is not None and types[i] != types[j]:
+                continue
+            pairs.append((int(min(i, j)), int(max(i, j)), score))
+        block.append(i)
+        for g in grams[i]:
+            postings[g].add(i)
+    return sorted(pairs)
+
+
+def _groups(count: int, pairs: list[tuple[int, int, float]]) -> list[list[int]]:
+    """用并查集把重复对归为若干组，只返回包含两条以上活动的组"""
+    parent = list(range(count))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, j, _ in pairs:
+        parent[find(j)] = find(i)
+    groups: dict[int, list[int]] = {}
+    for i in range(count):
+        groups.setdefault(find(i), []).append(i)
+    return [g for g in groups.values() if len(g) > 1]
+
+
+def _winner(group: list[int], names: list[str], keep: str) -> int:
+    if keep == "first":
+        return group[0]
+    if keep == "last":
+        return group[-1]
+    if keep == "longest":
+        return max(group, key=lambda i: (len(names[i]), -i))
+    raise ValueError(f"未知的保留规则：{keep}")
+
+
+def near_duplicates(names: list[str], starts: np.ndarray, ends: np.ndarray, types: np.ndarray | None = None,
+                    rule: MergeRule | None = None) -> np.ndarray:
+    """
+    计算去除近似重复后应保留的行。
+
+    参数:
+    names (list[str]): 活动名称。
+    starts (np.ndarray): 开始时间（datetime64）。
+    ends (np.ndarray): 结束时间（datetime64）。
+    types (np.ndarray | None): 活动类型。
+    rule (MergeRule | None): 判定与合并规则。
+
+    返回:
+    np.ndarray: 布尔掩码，True 表示保留。
+    """
+    rule = rule or MergeRule()
+    keep = np.ones(len(names), dtype=bool)
+    for group in _groups(len(names), duplicate_pairs(names, starts, ends, types, rule)):
+        keep[group] = False
+        keep[_winner(group, names, rule.keep)] = True
+    return keep
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from event_table import EventTable
+
+    parser = argparse.ArgumentParser(description="去除活动数据中的近似重复活动")
+    parser.add_argument("input", help="输入 CSV")
+    parser.add_argument("output", nargs="?", help="输出 CSV，默认覆盖输入文件")
+    parser.add_argument("--threshold", type=float, default=MergeRule.threshold, help="名称相似度下限")
+    parser.add_argument("--ngram", type=int, default=MergeRule.n, help="n-gram 长度")
+    parser.add_argument("--tolerance", type=float, default=MergeRule.tolerance_hours,
+                        help="开始、结束时间允许的差值（小时）")
+    parser.add_argument("--any-type", action="store_true", help="也合并类型不同的活动")
+    parser.add_argument("--keep", choices=["first", "last", "longest"], default=MergeRule.keep, help="每组保留哪一条")
+    parser.add_argument("--dry-run", action="store_true", help="只列出重复活动，不写文件")
+    args = parser.parse_args()
+
+    rule = MergeRule(args.ngram, args.threshold, args.tolerance, not args.any_type, args.keep)
+    events = EventTable.from_csv(args.input)
+    names = events.name_list()
+    pairs = duplicate_pairs(names, events.start_times, events.end_times, events.types, rule)
+    for i, j, score in pairs:
+        print(f"{score:.2f}  {names[i]}  <->  {names[j]}")
+    keep = near_duplicates(names, events.start_times, events.end_times, events.types, rule)
+    print(f"共 {len(events)} 条活动，其中 {int((~keep).sum())} 条为近似重复")
+    if not args.dry_run:
+        events.take(keep).to_csv(args.output or args.input)
@@ -0,0 +1,140 @@
+"""
+甘特图输出编码。
+
+直接从 Agg 画布的像素缓冲区（canvas.buffer_rgba()）构造共享内存的 Pillow 图像，
+不经过中间拷贝，再按所选格式编码：可调 zlib 压缩级别的 PNG、调色板量化的 PNG、
+无损或有损 WebP。每次编码都会报告耗时与文件大小，便于为不同的显示端选择格式。
+"""
+
+import io
+import os
+import time
+from dataclasses import dataclass
+
+import numpy as np
+from PIL import Image
+
+# 格式名 -> (扩展名, 默认参数)
+FORMATS = {
+    "png": ("png", {"compress_level": 6}),
+    "png-fast": ("png", {"compress_level": 1}),
+    "png8": ("png", {"colors": 256, "compress_level": 9}),
+    "webp": ("webp", {"lossless": True, "method": 4}),
+    "webp-lossy": ("webp", {"quality": 85, "method": 4}),
+}
+
+
+@dataclass
+class EncodeResult:
+    """一次编码的结果"""
+
+    format: str
+    path: str | None
+    size: int
+    seconds: float
+
+    def describe(self) -> str:
+        return f"{self.format:<11}{self.size/1024:>10.1f} KB{self.seconds*1000:>10.1f} ms"
+
+
+def canvas_image(canvas, mode: str = "RGBA") -> Image.Image:
+    """
+    把已绘制的 Agg 画布包装为 Pillow 图像，与画布共享内存。
+
+    参数:
+    canvas (FigureCanvasAgg): 已调用过 draw() 的画布。
+    mode (str): "RGBA"，或忽略透明通道的 "RGBX"。
+
+    返回:
+    Image.Image: 只读的共享内存图像。
+    """
+    buffer = canvas.buffer_rgba()
+    width, height = canvas.get_width_height(physical=True)
+    return Image.frombuffer(mode, (width, height), buffer, "raw", mode, 0, 1)
+
+
+def is_opaque(canvas) -> bool:
+    """画布是否完全不透明（直接在缓冲区上检查，不拷贝）"""
+    return bool(np.asarray(canvas.buffer_rgba())[:, :, 3].min() == 255)
+
+
+def encode_image(im: Image.Image, fmt: str, out, **options) -> None:
+    """
+    按格式名把图像编码写入 out（文件路径或文件对象）。
+
+    参数:
+    im (Image.Image): canvas_image 得到的图像。
+    fmt (str): FORMATS 中的格式名。
+    out: 文件路径或可写的文件对象。
+    options: 覆盖 FORMATS 中的默认参数。
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"未知的输出格式 {fmt}，可选：{', '.join(FORMATS)}")
+    ext, defaults = FORMATS[fmt]
+    options = {**defaults, **options}
+    if fmt == "png8":
+        colors = options.pop("colors")
+        im.quantize(colors=colors, method=Image.Quantize.FASTOCTREE).save(out, "PNG", **options)
+    elif ext == "png":
+        im.save(out, "PNG", **options)
+    else:
+        im.save(out, "WEBP", **options)
+
+
+def encode_canvas(canvas, fmt: str = "png", path: str | None = None, **options) -> EncodeResult:
+    """
+    把画布编码为指定格式，写入文件（给出 path 时）或内存，并记录耗时与大小。
+
+    参数:
+    canvas (FigureCanvasAgg): 已调用过 draw() 的画布。
+    fmt (str): FORMATS 中的格式名。
+    path (str | None): 输出路径，None 时只在内存中编码。
+    options: 覆盖 FORMATS 中的默认参数。
+
+    返回:
+    EncodeResult: 编码结果。
+    """
+    # PNG 编码器不接受 RGBX；WebP 在画布不透明时用 RGBX 视图，省去透明通道
+    mode = "RGBX" if FORMATS.get(fmt, ("",))[0] == "webp" and is_opaque(canvas) else "RGBA"
+    im = canvas_image(canvas, mode)
+    t0 = time.perf_counter()
+    if path is None:
+        out = io.BytesIO()
+        encode_image(im, fmt, out, **options)
+        size = out.getbuffer().nbytes
+    else:
+        encode_image(im, fmt, path, **options)
+        size = os.path.getsize(path)
+    return EncodeResult(fmt, path, size, time.perf_counter()-t0)
+
+
+def encode_bytes(canvas, fmt: str = "png", **options) -> bytes:
+    """
+    把画布编码为指定格式并返回编码后的字节，供 HTTP 服务等直接发送。
+
+    参数:
+    canvas (FigureCanvasAgg): 已调用过 draw() 的画布。
+    fmt (str): FORMATS 中的格式名。
+    options: 覆盖 FORMATS 中的默认参数。
+
+    返回:
+    bytes: 编码后的图像。
+    """
+    mode = "RGBX" if FORMATS.get(fmt, ("",))[0] == "webp" and is_opaque(canvas) else "RGBA"
+    out = io.BytesIO()
+    encode_image(canvas_image(canvas, mode), fmt, out, **options)
+    return out.getvalue()
+
+
+def compare_formats(canvas, formats=None) -> list[EncodeResult]:
+    """
+    在内存中依次尝试各种格式，返回每种格式的耗时与大小。
+
+    参数:
+    canvas (FigureCanvasAgg): 已调用过 draw() 的画布。
+    formats (Iterable[str] | None): 要比较的格式名，默认全部。
+
+    返回:
+    list[EncodeResult]: 各格式的编码结果。
+    """
+    return [encode_canvas(canvas, fmt) for fmt in (formats or FORMATS)]
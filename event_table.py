@@ -0,0 +1,167 @@
+"""
+绘图热路径使用的活动表。
+
+EventTable 用几个平行的 NumPy 数组保存活动：int64 秒的开始与结束时间、int8 的类型，
+以及偏移量加字节块形式的名称。它可以直接内存映射快照，或快速读取日期已标准化的 CSV，
+支持绘图所需的窗口筛选与“类型/结束时间/开始时间”降序排序，整个过程不导入 pandas。
+只有 CSV 中含有需要展开的简写（天数、排期模板、非标准日期）时才交给 schedule 处理。
+"""
+
+import csv
+import os
+import re
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from snapshot import StringColumn, encode_strings, encode_types, is_fresh, read_snapshot, snapshot_path
+
+HEADER = ["名称", "开始时间", "结束时间", "类型"]
+ISO_DATE = re.compile(r"^\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}(:\d{2})?$")
+
+
+def _parse_type(text: str) -> int:
+    """类型一栏的值，空值与非数字记为 -1"""
+    try:
+        return int(float(text))
+    except (ValueError, OverflowError):
+        return -1
+
+
+class EventTable:
+    """以平行数组保存的活动表"""
+
+    def __init__(self, names: StringColumn, starts: np.ndarray, ends: np.ndarray, types: np.ndarray):
+        """
+        参数:
+        names (StringColumn): 名称。
+        starts (np.ndarray): 开始时间（int64 秒，NaT 为 int64 最小值）。
+        ends (np.ndarray): 结束时间（int64 秒）。
+        types (np.ndarray): 类型（int8）。
+        """
+        self.names = names
+        self.starts = starts
+        self.ends = ends
+        self.types = types
+
+    @classmethod
+    def from_rows(cls, names: list[str], starts, ends, types) -> "EventTable":
+        """由名称列表与时间、类型数组构造"""
+        offsets, data = encode_strings(names)
+        return cls(
+            StringColumn(offsets, data),
+            np.asarray(starts, dtype="datetime64[s]").view(np.int64),
+            np.asarray(ends, dtype="datetime64[s]").view(np.int64),
+            encode_types(types),
+        )
+
+    @classmethod
+    def from_snapshot(cls, path: str) -> "EventTable":
+        """内存映射快照，各列都是映射上的视图"""
+        snap = read_snapshot(path)
+        return cls(snap.strings(0), snap.columns["start"], snap.columns["end"], snap.types)
+
+    @classmethod
+    def from_csv(cls, path: str) -> "EventTable":
+        """
+        读取活动 CSV。日期均为标准格式时直接用 NumPy 解析，否则交给 schedule.expand_columns
+        展开天数简写与排期模板，两条路径都不导入 pandas。
+        """
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            reader = csv.reader(f)
+            header = next(reader)
+            rows = list(reader)
+        type_col = header.index("类型")
+        names = [row[0] for row in rows]
+        types = [_parse_type(row[type_col]) for row in rows]
+        start_text = [row[1].strip() for row in rows]
+        end_text = [row[2].strip() for row in rows]
+        if all(not t or ISO_DATE.match(t) for t in start_text+end_text):
+            return cls.from_rows(names, np.array(start_text, dtype="datetime64[s]"),
+                                 np.array(end_text, dtype="datetime64[s]"), types)
+
+        from schedule import expand_columns
+
+        source, names, starts, ends = expand_columns(names, start_text, end_text)
+        return cls.from_rows(names, starts, ends, np.asarray(types)[source])
+
+    @classmethod
+    def load(cls, path: str) -> "EventTable":
+        """同名快照存在且不比 CSV 旧时读取快照，否则读取 CSV"""
+        snap = snapshot_path(path)
+        if is_fresh(snap, path):
+            return cls.from_snapshot(snap)
+        return cls.from_csv(path)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    @property
+    def start_times(self) -> np.ndarray:
+        """开始时间（datetime64[s]）"""
+        return self.starts.view("datetime64[s]")
+
+    @property
+    def end_times(self) -> np.ndarray:
+        """结束时间（datetime64[s]）"""
+        return self.ends.view("datetime64[s]")
+
+    def name_list(self) -> list[str]:
+        """全部名称"""
+        return self.names.tolist()
+
+    def take(self, idx) -> "EventTable":
+        """
+        按下标（或布尔掩码）取出若干行组成新表。
+
+        参数:
+        idx (np.ndarray): 下标数组或布尔掩码。
+
+        返回:
+        EventTable: 新表。
+        """
+        idx = np.asarray(idx)
+        if idx.dtype == bool:
+            idx = np.flatnonzero(idx)
+        return EventTable(self.names.take(idx), self.starts[idx], self.ends[idx], self.types[idx])
+
+    def window(self, now: datetime, right_border: datetime) -> np.ndarray:
+        """
+        绘图窗口内的活动掩码：结束时间晚于 now 之后 4 小时，且开始时间早于右边界。
+
+        参数:
+        now (datetime): 当前时间。
+        right_border (datetime): 绘图的右边界时间。
+
+        返回:
+        np.ndarray: 布尔掩码。
+        """
+        return (self.end_times > np.datetime64(now+timedelta(hours=4), "s")) & (
+            self.start_times < np.datetime64(right_border, "s"))
+
+    def select(self, types: list[int] | None = None, keyword: str | None = None) -> np.ndarray:
+        """按类型与名称关键字筛选的掩码，参数为 None 时不筛选"""
+        mask = np.ones(len(self), dtype=bool)
+        if types is not None:
+            mask &= np.isin(self.types, types)
+        if keyword:
+            mask &= np.array([keyword in name for name in self.name_list()], dtype=bool)
+        return mask
+
+    def render_order(self) -> np.ndarray:
+        """按类型、结束时间、开始时间降序排列的下标，缺失的时间排在最后，完全相同的行保持原有顺序"""
+        def descending(values: np.ndarray) -> np.ndarray:
+            nat = values == np.iinfo(np.int64).min
+            return np.where(nat, np.iinfo(np.int64).max, -np.where(nat, 0, values))
+
+        return np.lexsort((descending(self.starts), descending(self.ends), -self.types.astype(np.int64)))
+
+    def to_csv(self, path: str) -> None:
+        """写出与 DataFrame.to_csv(index=False) 格式相同的 CSV"""
+        def fmt(values: np.ndarray) -> list[str]:
+            return [("" if np.isnat(v) else str(v).replace("T", " ")) for v in values]
+
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f, lineterminator=os.linesep)
+            writer.writerow(HEADER)
+            writer.writerows(zip(self.name_list(), fmt(self.start_times), fmt(self.end_times), self.types.tolist()))
@@ -0,0 +1,203 @@
+"""
+活动名称标签引擎。
+
+LabelEngine 通过渲染器的文本测量接口批量测量标签宽度，按（字体, 字号, 字重, dpi）缓存，
+并为每个条形挑选能放下的最长标签；CachedLabel 把每个标签只栅格化一次，
+之后的渲染直接贴缓存的位图，省去 Agg 每次重新排版、光栅化 SimHei 字形的开销。
+缓存在模块级别保存并按占用的字节数限制容量，守护进程和批量绘图中的多次渲染可以共用。
+"""
+
+import sys
+import threading
+from collections import OrderedDict
+from math import ceil
+
+import numpy as np
+from matplotlib.artist import Artist
+from matplotlib.backends.backend_agg import RendererAgg
+from matplotlib.colors import to_rgba
+from matplotlib.font_manager import FontProperties
+
+ELLIPSIS = "…"
+WIDTH_CACHE_BYTES = 4 << 20
+BITMAP_CACHE_BYTES = 64 << 20
+ENTRY_OVERHEAD = 160  # 每个缓存项在 OrderedDict 节点、键元组与值对象上的大致开销（字节）
+
+
+def font_key(prop: FontProperties, dpi: float) -> tuple:
+    """字体缓存键：字体族、字号、字重、样式与 dpi"""
+    return (tuple(prop.get_family()), prop.get_size_in_points(), prop.get_weight(), prop.get_style(), dpi)
+
+
+class _LabelCache:
+    """按总字节数限制容量的线程安全 LRU 缓存，键的最后一项为标签文本"""
+
+    def __init__(self, max_bytes: int, sizeof=lambda value: 0):
+        """
+        参数:
+        max_bytes (int): 容量（字节）。
+        sizeof (Callable): 值本身占用的字节数，标签文本与 ENTRY_OVERHEAD 另外计入。
+        """
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.size = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _nbytes(self, key, value) -> int:
+        return ENTRY_OVERHEAD+sys.getsizeof(key[-1])+self.sizeof(value)
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value) -> None:
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= self._nbytes(key, old)
+            self._entries[key] = value
+            self.size += self._nbytes(key, value)
+            while self.size > self.max_bytes:
+                evicted_key, evicted = self._entries.popitem(last=False)
+                self.size -= self._nbytes(evicted_key, evicted)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_width_cache = _LabelCache(WIDTH_CACHE_BYTES)
+_bitmap_cache = _LabelCache(BITMAP_CACHE_BYTES, lambda bitmap: bitmap.nbytes)
+
+
+class LabelEngine:
+    """批量测量并缓存标签宽度，为条形挑选能放下的最长标签"""
+
+    def __init__(self, renderer, prop: FontProperties, scale: float = 1.0):
+        """
+        参数:
+        renderer: 用于测量文本的渲染器（例如 fig.canvas.get_renderer()）。
+        prop (FontProperties): 标签字体。
+        scale (float): 每像素对应的数据单位（例如小时），width/fit 以该单位返回结果。
+        """
+        self.renderer = renderer
+        self.prop = prop
+        self.scale = scale
+        self.key = font_key(prop, renderer.dpi)
+
+    def measure_batch(self, texts) -> np.ndarray:
+        """
+        批量测量字符串的像素宽度，已缓存的直接返回。
+
+        参数:
+        texts (Iterable[str]): 要测量的字符串。
+
+        返回:
+        np.ndarray: 各字符串的像素宽度。
+        """
+        widths = []
+        for text in texts:
+            width = _width_cache.get((self.key, text))
+            if width is None:
+                width, _, _ = self.renderer.get_text_width_height_descent(text, self.prop, ismath=False)
+                _width_cache.put((self.key, text), width)
+            widths.append(width)
+        return np.asarray(widths, dtype=float)
+
+    def width(self, text: str) -> float:
+        """字符串宽度（以 scale 为单位）"""
+        return float(self.measure_batch([text])[0])*self.scale
+
+    def fit(self, name: str, avail: float) -> str | None:
+        """
+        二分查找能放进宽度 avail 的最长标签：完整名称，或名称前缀加省略号。
+
+        参数:
+        name (str): 活动名称。
+        avail (float): 可用宽度（以 scale 为单位）。
+
+        返回:
+        str | None: 选出的标签，连一个字加省略号都放不下时返回 None。
+        """
+        if self.width(name) <= avail:
+            return name
+        lo, hi = 0, len(name)-1
+        while lo < hi:
+            mid = (lo+hi+1) // 2
+            if self.width(name[:mid]+ELLIPSIS) <= avail:
+                lo = mid
+            else:
+                hi = mid-1
+        return name[:lo]+ELLIPSIS if lo > 0 else None
+
+
+def rasterize(text: str, prop: FontProperties, color, dpi: float) -> np.ndarray:
+    """
+    把单行文本栅格化为透明背景的 RGBA 位图并缓存。
+
+    位图的高度与宽度和 Text 排版时的外框一致，因此居中贴图与 ha/va="center" 的文本对齐。
+
+    参数:
+    text (str): 文本。
+    prop (FontProperties): 字体。
+    color: 文字颜色。
+    dpi (float): 分辨率。
+
+    返回:
+    np.ndarray: 自下而上存储的 RGBA 位图，可直接交给 renderer.draw_image。
+    """
+    key = (font_key(prop, dpi), to_rgba(color), text)
+    bitmap = _bitmap_cache.get(key)
+    if bitmap is None:
+        renderer = RendererAgg(1, 1, dpi)
+        w, h, d = renderer.get_text_width_height_descent(text, prop, ismath=False)
+        pad = 1
+        renderer = RendererAgg(ceil(w)+2*pad, ceil(h)+2*pad, dpi)
+        gc = renderer.new_gc()
+        gc.set_foreground(color)
+        # Agg 的 draw_text 以自上而下的行号给出基线位置
+        renderer.draw_text(gc, pad, pad+h-d, text, prop, 0)
+        gc.restore()
+        bitmap = np.asarray(renderer.buffer_rgba())[::-1].copy()
+        _bitmap_cache.put(key, bitmap)
+    return bitmap
+
+
+class CachedLabel(Artist):
+    """以数据坐标为中心、贴缓存位图绘制的单行标签"""
+
+    zorder = 3  # 与 Text 相同，画在条形之上
+
+    def __init__(self, x: float, y: float, text: str, prop: FontProperties, color="k"):
+        super().__init__()
+        self._x = x
+        self._y = y
+        self._text = text
+        self._prop = prop
+        self._color = color
+
+    def set_position(self, xy) -> None:
+        self._x, self._y = xy
+        self.stale = True
+
+    def set_text(self, text: str) -> None:
+        self._text = text
+        self.stale = True
+
+    def get_text(self) -> str:
+        return self._text
+
+    def draw(self, renderer) -> None:
+        if not self.get_visible() or not self._text:
+            return
+        bitmap = rasterize(self._text, self._prop, self._color, renderer.dpi)
+        px, py = self.axes.transData.transform((self._x, self._y))
+        h, w = bitmap.shape[:2]
+        gc = renderer.new_gc()
+        self._set_gc_clip(gc)
+        renderer.draw_image(gc, round(px-w/2), round(py-h/2), bitmap)
+        gc.restore()
+        self.stale = False
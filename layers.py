@@ -0,0 +1,199 @@
+"""
+静态图层缓存。
+
+甘特图中除条形与标签外的部分（背景图片、纹理、标题、x 轴刻度、主次网格线、“今天”的高亮带）
+只随窗口、主题与尺寸变化。StaticLayer 把它们光栅化一次，分成两层保存：
+
+- 底层：画布底色、背景图片与纹理；
+- 覆盖层：坐标轴中的标题、刻度、网格线与高亮带，其余部分透明。
+
+原图中网格线与高亮带画在条形之上、标签之下，因此每次绘制时依次把底层拷入画布、画条形、
+叠加覆盖层、画标签，只有条形与标签需要重新绘制，窗口不变、只有数据变化时不再重新排版刻度、
+绘制网格和贴背景图。与直接绘制相比，只有覆盖层半透明边缘的取整略有差别。
+"""
+
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+import numpy as np
+
+from event_table import EventTable
+from profiling import StageProfiler
+
+
+class StaticLayer:
+    """一个（窗口, 主题, 尺寸）对应的静态图层，绘制时加锁，同一时刻只服务一次绘制"""
+
+    def __init__(
+        self,
+        left_border: datetime,
+        right_border: datetime,
+        img: np.ndarray,
+        tw: np.ndarray,
+        figsize: tuple[float, float] = (16, 9),
+        today: datetime | None = None,
+    ):
+        """
+        参数:
+        left_border (datetime): 绘图的左边界时间。
+        right_border (datetime): 绘图的右边界时间。
+        img (np.ndarray): 处理好的背景图片。
+        tw (np.ndarray): 处理好的纹理。
+        figsize (tuple[float, float]): 图的尺寸（英寸，dpi 为 100）。
+        today (datetime | None): 高亮的日期，默认为左边界之后的第 3 天。
+        """
+        import matplotlib as mpl
+
+        from main import FONT_SIZE, decorate_axes, new_figure
+
+        self.left_border = left_border
+        self.right_border = right_border
+        self.lock = threading.Lock()
+        self.fig, self.ax = new_figure(figsize)
+        images = [self.fig.figimage(img, 0, 0, zorder=-3), self.fig.figimage(tw, 0, 0, zorder=-2)]
+        # 只有一行时高亮带恰好占满坐标轴的高度，之后改变 y 轴范围不影响已经光栅化的覆盖层
+        decorate_axes(self.ax, left_border, right_border, 1, today)
+        self.fig.tight_layout(pad=1.08*FONT_SIZE/mpl.rcParams["font.size"])
+
+        self.ax.set_visible(False)
+        self.fig.canvas.draw()
+        self.base = np.array(self.fig.canvas.buffer_rgba())
+
+        self.ax.set_visible(True)
+        self.fig.patch.set_visible(False)
+        for im in images:
+            im.set_visible(False)
+        self.fig.canvas.draw()
+        overlay = np.array(self.fig.canvas.buffer_rgba()).reshape(-1, 4)
+        # 覆盖层大部分透明（1600×900 时约八成），只保存不透明度非零的像素，叠加时只处理这些像素
+        self.overlay_index = np.flatnonzero(overlay[:, 3])
+        alpha = overlay[self.overlay_index, 3:4].astype(np.float32)/255
+        self.overlay_rgb = overlay[self.overlay_index, :3]*alpha
+        self.overlay_keep = 1-alpha
+
+    @property
+    def nbytes(self) -> int:
+        """底层、覆盖层与 Agg 画布缓冲区占用的字节数"""
+        width, height = self.fig.canvas.get_width_height()
+        return (self.base.nbytes+self.overlay_index.nbytes+self.overlay_rgb.nbytes+self.overlay_keep.nbytes
+                + width*height*4)
+
+    def _composite(self, buffer: np.ndarray) -> None:
+        pixels = buffer.reshape(-1, 4)
+        rgb = pixels[self.overlay_index, :3]
+        pixels[self.overlay_index, :3] = np.rint(self.overlay_rgb+rgb*self.overlay_keep).astype(np.uint8)
+
+    def render(
+        self,
+        events: EventTable,
+        color: list[str],
+        pack: bool = False,
+        profiler: StageProfiler | None = None,
+    ):
+        """
+        在静态图层上绘制活动，返回可以直接编码的画布。
+
+        画布在释放锁之前有效，调用方应在 with layer.lock 中调用本方法并完成编码。
+
+        参数:
+        events (EventTable): 预处理后的活动表。
+        color (list[str]): 条形颜色。
+        pack (bool): 是否把同一类型中互不重叠的活动压缩到同一行。
+        profiler (StageProfiler | None): 性能剖析器。
+
+        返回:
+        FigureCanvasAgg: 绘制好的画布。
+        """
+        from main import assign_rows, event_geometry, plot_events
+
+        profiler = profiler or StageProfiler()
+        ax = self.ax
+        with profiler.stage("assign_rows"):
+            geometry = event_geometry(events, self.left_border, self.right_border)
+            rows, row_num = assign_rows(events, geometry, pack)
+        ax.set_ylim(-0.5, row_num-0.5)
+        canvas = self.fig.canvas
+        renderer = canvas.get_renderer()
+        buffer = np.asarray(renderer.buffer_rgba())
+        before = set(ax.get_children())
+        with profiler.stage("plot_events", events=len(events), rows=int(row_num)):
+            plot_events(ax, events, self.left_border, self.right_border, color, rows, geometry)
+        added = sorted((a for a in ax.get_children() if a not in before), key=lambda a: a.get_zorder())
+        try:
+            with profiler.stage("draw"):
+                buffer[...] = self.base
+                # 条形在覆盖层之下，标签（zorder 3）在覆盖层之上
+                for artist in added:
+                    if artist.get_zorder() < 1.5:
+                        artist.draw(renderer)
+                self._composite(buffer)
+                for artist in added:
+                    if artist.get_zorder() >= 1.5:
+                        artist.draw(renderer)
+        finally:
+            for artist in added:
+                artist.remove()
+        return canvas
+
+
+class LayerCache:
+    """按（窗口, 主题, 尺寸）缓存静态图层的 LRU 缓存，按图层占用的总字节数限制容量"""
+
+    def __init__(self, max_bytes: int = 256 << 20):
+        """
+        参数:
+        max_bytes (int): 容量（字节）。1600×900 的图层约 20 MB，超过容量的单个图层照常使用但不缓存。
+        """
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._layers: OrderedDict[tuple, StaticLayer] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(
+        self,
+        theme: tuple,
+        left_border: datetime,
+        right_border: datetime,
+        img: np.ndarray,
+        tw: np.ndarray,
+        figsize: tuple[float, float] = (16, 9),
+        today: datetime | None = None,
+    ) -> StaticLayer:
+        """
+        取得静态图层，不存在时新建。
+
+        参数:
+        theme (tuple): 标识背景图片与纹理的键，例如两者的文件名。
+        其余参数同 StaticLayer。
+
+        返回:
+        StaticLayer: 静态图层。
+        """
+        key = (theme, left_border, right_border, figsize, today)
+        with self._lock:
+            layer = self._layers.get(key)
+            if layer is not None:
+                self._layers.move_to_end(key)
+                self.hits += 1
+                return layer
+            self.misses += 1
+        layer = StaticLayer(left_border, right_border, img, tw, figsize, today)
+        if layer.nbytes > self.max_bytes:
+            return layer
+        with self._lock:
+            existing = self._layers.get(key)
+            if existing is not None:
+                self._layers.move_to_end(key)
+                return existing
+            self._layers[key] = layer
+            self.size += layer.nbytes
+            while self.size > self.max_bytes:
+                _, evicted = self._layers.popitem(last=False)
+                self.size -= evicted.nbytes
+        return layer
+
+    def __len__(self) -> int:
+        return len(self._layers)
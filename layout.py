@@ -0,0 +1,67 @@
+"""
+甘特图行布局。
+
+默认每个活动独占一行；开启车道压缩后，同一类型中时间上互不重叠的活动会共用一行（车道），
+用按开始时间排序后的区间图着色实现，总复杂度 O(n log n)。
+"""
+
+import heapq
+
+import numpy as np
+
+
+def pack_lanes(
+    starts: np.ndarray,
+    ends: np.ndarray,
+    groups: np.ndarray,
+    gap: float = 0,
+) -> tuple[np.ndarray, int]:
+    """
+    将互不重叠的活动压缩到同一车道中，不同类型的活动不会共用车道。
+
+    车道按类型分块，块的先后顺序与各类型在输入中首次出现的顺序一致，
+    因此沿用 preprocess_data 的排序时，类型的上下位置不变。
+
+    参数:
+    starts (np.ndarray): 每个活动的开始位置（例如相对左边界的小时数）。
+    ends (np.ndarray): 每个活动的结束位置，单位与 starts 相同，NaN 表示一直持续。
+    groups (np.ndarray): 每个活动的分组（类型）。
+    gap (float): 同一车道中前后两个活动之间至少保留的间隔。
+
+    返回:
+    tuple[np.ndarray, int]: 每个活动（按输入顺序）所在的车道编号，以及车道总数。
+    """
+    # 缺失的开始位置视为很早开始，缺失的结束位置视为一直持续，NaN 会打乱堆的顺序
+    starts = np.asarray(starts, dtype=float)
+    starts = np.where(np.isnan(starts), -np.inf, starts)
+    ends = np.asarray(ends, dtype=float)
+    ends = np.where(np.isnan(ends), np.inf, ends)
+    groups = np.asarray(groups)
+    n = len(starts)
+    lanes = np.zeros(n, dtype=np.int64)
+    if n == 0:
+        return lanes, 0
+
+    # 按类型首次出现的顺序给分组编号，再按（分组, 开始时间）排序
+    _, first_index, group_ids = np.unique(groups, return_index=True, return_inverse=True)
+    group_rank = np.argsort(np.argsort(first_index))[group_ids]
+    order = np.lexsort((starts, group_rank))
+
+    offset = 0
+    lane_count = 0
+    current_group = None
+    free: list[tuple[float, int]] = []  # (车道末尾位置, 车道编号) 的小根堆
+    for idx in order:
+        if group_rank[idx] != current_group:
+            offset += lane_count
+            lane_count = 0
+            free = []
+            current_group = group_rank[idx]
+        if free and free[0][0]+gap <= starts[idx]:
+            _, lane = heapq.heappop(free)
+        else:
+            lane = lane_count
+            lane_count += 1
+        heapq.heappush(free, (ends[idx], lane))
+        lanes[idx] = offset+lane
+    return lanes, offset+lane_count
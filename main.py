@@ -1,13 +1,33 @@
-import matplotlib.pyplot as plt
+import matplotlib as mpl
 import matplotlib.image as image
+from matplotlib.axes import Axes
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 from matplotlib.ticker import MultipleLocator
-import pandas as pd
+from matplotlib.font_manager import FontProperties
 from datetime import datetime, timedelta
-from dateutil.parser import parse
 import numpy as np
 from PIL import Image as PILimage
 from glob import glob
 from random import choice
+from profiling import StageProfiler
+from layout import pack_lanes
+from calendar_axis import WINDOW_AFTER_DAYS, WINDOW_BEFORE_DAYS, CalendarFormatter, CalendarLocator
+from culling import BarGeometry, compute_geometry, merge_small_bars, place_labels
+from labels import ELLIPSIS, CachedLabel, LabelEngine
+from encoding import FORMATS, compare_formats, encode_canvas
+from event_table import EventTable
+from taskgraph import TaskGraph
+from layers import LayerCache
+
+# 字体直接传给各个文本对象，不修改全局的 rcParams，多个线程可以同时绘图
+FONT_FAMILY = ["SimHei", "sans-serif"]
+FONT_SIZE = 16
+
+
+def font(size: float = FONT_SIZE, **kwargs) -> FontProperties:
+    """绘图使用的字体，kwargs 传给 FontProperties（例如 weight="bold"）"""
+    return FontProperties(family=FONT_FAMILY, size=size, **kwargs)
 
 
 def get_random_paths() -> tuple[str, str, str, str]:
@@ -26,36 +46,70 @@ def get_random_paths() -> tuple[str, str, str, str]:
     return background_pic_dir, texture_dir, all_data_path, data_path
 
 
+def time_window(now: datetime, before: int = WINDOW_BEFORE_DAYS, after: int | None = None) -> tuple[datetime, datetime]:
+    """
+    计算绘图的左右边界。
+
+    参数:
+    now (datetime): 当天零点。
+    before (int): 左边界在 now 之前的天数。
+    after (int | None): 右边界在 now 之后的天数，默认画到三周后的周日结束。
+
+    返回:
+    tuple[datetime, datetime]: 左边界与右边界。
+    """
+    after = WINDOW_AFTER_DAYS-now.weekday() if after is None else after
+    return now-timedelta(days=before), now+timedelta(days=after)
+
+
+def load_events(all_data_path: str) -> EventTable:
+    """
+    读取活动数据，结束时间中的天数简写与排期模板一并展开。
+    同名快照（.snap）存在且不比 CSV 旧时直接内存映射快照，不再解析 CSV。
+
+    参数:
+    all_data_path (str): 活动数据文件路径。
+
+    返回:
+    EventTable: 活动表。
+    """
+    return EventTable.load(all_data_path)
+
+
 def preprocess_data(
     data_path: str,
     all_data_path: str,
     now: datetime,
     left_border: datetime,
     right_border: datetime,
-) -> pd.DataFrame:
+    types: list[int] | None = None,
+    keyword: str | None = None,
+) -> EventTable:
     """
-    对活动数据进行预处理，包括日期标准化、删除过期和未到事件、排序并保存处理后的数据。
+    对活动数据进行预处理，包括删除过期和未到事件、排序并保存处理后的数据。
 
     参数:
-    data_path (str): 活动数据文件路径。
+    data_path (str | None): 活动数据文件路径，为 None 时不保存。
     all_data_path (str): 所有活动数据文件路径。
     now (datetime): 当前时间。
     left_border (datetime): 绘图的左边界时间。
     right_border (datetime): 绘图的右边界时间。
+    types (list[int] | None): 只保留这些类型的活动，None 表示不筛选。
+    keyword (str | None): 只保留名称中含有该关键字的活动，None 表示不筛选。
 
     返回:
-    pd.DataFrame: 处理后的活动数据 DataFrame。
+    EventTable: 处理后的活动表。
     """
-    df = pd.read_csv(all_data_path)
-    df.iloc[:, 1] = [parse(ii) for ii in df.iloc[:, 1]]
-    df.iloc[:, 2] = [parse(ii) for ii in df.iloc[:, 2]]
-    df = df.loc[df.iloc[:, 2] > now+timedelta(hours=4)]
-    df = df.loc[df.iloc[:, 1] < right_border]
-    df = df.sort_values(by=["类型", "结束时间", "开始时间"], ascending=False)
-    df = df[df["类型"] != -1]
-    print("这些活动未归类\n", df[df["类型"] == -1])
-    df.to_csv(data_path, index=False)
-    return df
+    events = load_events(all_data_path)
+    events = events.take(events.window(now, right_border) & events.select(types, keyword))
+    events = events.take(events.render_order())
+    unclassified = events.types == -1
+    if unclassified.any():
+        print("这些活动未归类\n", [events.names[i] for i in np.flatnonzero(unclassified)])
+    events = events.take(~unclassified)
+    if data_path is not None:
+        events.to_csv(data_path)
+    return events
 
 
 def extract_main_colors(background_pic_dir: str, num_colors: int) -> list[str]:
@@ -113,60 +167,130 @@ def set_alpha_channel(image_data: np.ndarray, alphavalue: float) -> np.ndarray:
         return image_data
 
 
-def plot_events(df: pd.DataFrame, left_border: datetime, right_border: datetime, color: list[str]) -> None:
+def event_geometry(events: EventTable, left_border: datetime, right_border: datetime) -> BarGeometry:
+    """
+    向量化地计算所有活动在窗口中的条形位置，并标记需要绘制的活动。
+
+    参数:
+    events (EventTable): 活动表。
+    left_border (datetime): 绘图的左边界时间。
+    right_border (datetime): 绘图的右边界时间。
+
+    返回:
+    BarGeometry: 条形几何信息。
+    """
+    return compute_geometry(events.start_times, events.end_times, left_border, right_border)
+
+
+def assign_rows(events: EventTable, geometry: BarGeometry, pack: bool = False) -> tuple[np.ndarray, int]:
+    """
+    为每个活动分配所在的行。
+
+    参数:
+    events (EventTable): 活动表。
+    geometry (BarGeometry): event_geometry 计算出的条形几何信息。
+    pack (bool): 是否把同一类型中互不重叠的活动压缩到同一行，不绘制的活动不占用行。
+
+    返回:
+    tuple[np.ndarray, int]: 每个活动所在的行号（不绘制的活动为 -1），以及总行数。
+    """
+    if not pack:
+        return np.arange(len(events)), len(events)
+    rows = np.full(len(events), -1, dtype=np.int64)
+    idx = np.flatnonzero(geometry.visible)
+    left = geometry.left[idx]
+    rows[idx], row_num = pack_lanes(left, left+geometry.width[idx], events.types[idx])
+    return rows, row_num
+
+
+def plot_events(
+    ax: Axes,
+    events: EventTable,
+    left_border: datetime,
+    right_border: datetime,
+    color: list[str],
+    rows: np.ndarray | None = None,
+    geometry: BarGeometry | None = None,
+    min_bar_px: float = 3,
+) -> int:
     """
     绘制活动事件的条形图，并添加事件名称。
 
+    不可见的活动在创建图元之前就被剔除；窄于 min_bar_px 像素的条形按行合并为摘要标记；
+    活动名称按条形宽度依次放置，用渲染器实测宽度挑选能放下的最长标签，
+    与同一行已有标签重叠时省略或不显示。
+
     参数:
-    df (pd.DataFrame): 包含活动数据的 DataFrame，第一列是事件名称，第二列是开始时间，第三列是结束时间。
+    ax (Axes): 绘图的 Axes 对象。
+    events (EventTable): 活动表。
     left_border (datetime): 绘图的左边界时间。
     right_border (datetime): 绘图的右边界时间。
     color (list[str]): 用于绘制条形图的颜色列表。
+    rows (np.ndarray | None): 每个活动所在的行号，默认每个活动独占一行。
+    geometry (BarGeometry | None): 预先计算的条形几何信息，默认现场计算。
+    min_bar_px (float): 单独绘制一个条形所需的最小像素宽度。
 
     返回:
     int: 绘制的事件总数。
     """
-    total_event_num = 0
+    if geometry is None:
+        geometry = event_geometry(events, left_border, right_border)
+    rows = np.arange(len(events)) if rows is None else np.asarray(rows)
     rb = (right_border-left_border).total_seconds() // 3600
-    for ii, name in enumerate(df.iloc[:, 0]):
-        start_time = df.iloc[ii, 1]
-        end_time = df.iloc[ii, 2]
-        tmp1 = (end_time-start_time).total_seconds() // 3600
-        tmp2 = (end_time-left_border).total_seconds() // 3600
-        width = min(tmp1, tmp2)+1
-        left = max((start_time-left_border).total_seconds() // 3600, -1)
-        if tmp2 > 0 and left < rb and left+width >= 3*24:
-            plt.barh(
-                y=ii,
-                width=width,
-                left=left,
-                edgecolor="k",
-                linewidth=1.618,
-                color=color[ii % len(color)],
-                alpha=0.75,
-                joinstyle="bevel",
-            )
-            tmp3 = (right_border-start_time).total_seconds() // 3600
-            lwth = min(width, tmp3, rb)
-            namestr = name[:lwth // 8] if lwth <= 24*3 else name
-            plt.text(
-                x=left+lwth/2,
-                y=ii,
-                s=namestr,
-                va="center",
-                ha="center",
-                fontweight="bold",
-            )
-            total_event_num += 1
+    hours_per_px = rb/ax.get_window_extent().width
+    idx = np.flatnonzero(geometry.visible)
+    small, summaries = merge_small_bars(
+        geometry.left[idx],
+        geometry.width[idx],
+        rows[idx],
+        min_bar_px*hours_per_px,
+        min_bar_px*hours_per_px,
+    )
+    drawn = idx[~small]
+    if len(drawn) == 0 and not summaries:
+        return 0
+    if len(drawn):
+        ax.barh(
+            y=rows[drawn],
+            width=geometry.width[drawn],
+            left=geometry.left[drawn],
+            edgecolor="k",
+            linewidth=1.618,
+            color=[color[ii % len(color)] for ii in drawn],
+            alpha=0.75,
+            joinstyle="bevel",
+        )
+    if summaries:
+        summary_rows, summary_left, summary_width, _ = zip(*summaries)
+        ax.barh(
+            y=summary_rows,
+            width=summary_width,
+            left=summary_left,
+            color="gray",
+            alpha=0.5,
+            hatch="////",
+            linewidth=0,
+        )
+    lwth = geometry.label_width[drawn]
+    centers = geometry.left[drawn]+lwth/2
+    names = [events.names[i] for i in drawn]
+    engine = LabelEngine(ax.figure.canvas.get_renderer(), font(weight="bold"), hours_per_px)
+    engine.measure_batch(names+[ELLIPSIS])
+    labels = place_labels(names, centers, lwth, rows[drawn], rb, engine)
+    for x, y, namestr in zip(centers, rows[drawn], labels):
+        if namestr is None:
+            continue
+        ax.add_artist(CachedLabel(x, y, namestr, engine.prop))
+    return len(drawn)
 
 
-def set_x_ticks(ax: plt.Axes, left_border: datetime, right_border: datetime) -> None:
+def set_x_ticks(ax: Axes, left_border: datetime, right_border: datetime) -> None:
     """
     设置 x 轴的刻度和标签。
 
     参数:
-    ax (plt.Axes): 绘图的 Axes 对象。
-    left_border (datetime): 绘图的左边界时间。
+    ax (Axes): 绘图的 Axes 对象。
+    left_border (datetime): 绘图的左边界时间，即 x 轴原点。
     right_border (datetime): 绘图的右边界时间。
 
     返回:
@@ -175,87 +299,263 @@ def set_x_ticks(ax: plt.Axes, left_border: datetime, right_border: datetime) ->
     ax.minorticks_on()
     ax.tick_params(axis="both", which="major", direction="in", width=1, length=5)
     ax.tick_params(axis="both", which="minor", direction="in", width=1, length=2)
+    ax.tick_params(axis="x", which="major", labelcolor="white", labelsize=FONT_SIZE, labelfontfamily=FONT_FAMILY)
     ax.xaxis.set_minor_locator(MultipleLocator(4))
-    xticks_positions = []
-    xticks_labels = []
-    weekname = ["一", "二", "三", "四", "五", "六", "日"]
-    current_date = left_border
-    tmp, tmp2 = 0, 0
-    while current_date <= right_border:
-        iwn = "\n·\n"+"周"+weekname[current_date.weekday()]
-        tmp = (current_date-left_border).seconds // 3600+(current_date-left_border).days*24
-        if tmp == 0:
-            if (current_date.day+3+22-current_date.weekday() < (current_date.replace(month=(current_date.month+1) % 12, day=1)-timedelta(days=1)).day):
-                xticks_labels.append(current_date.strftime(f"%m月{iwn}"))
-            else:
-                xticks_labels.append(current_date.strftime(f"%d{iwn}"))
-            xticks_positions.append(tmp)
-        elif current_date.month != tmp2:
-            xticks_labels.append(current_date.strftime(f"%m月{iwn}"))
-            xticks_positions.append(tmp)
-        elif tmp % 24 == 0:
-            xticks_labels.append(current_date.strftime(f"%d{iwn}"))
-            xticks_positions.append(tmp)
-        tmp2 = current_date.month
-        current_date += timedelta(hours=4)
-    plt.xticks(xticks_positions, xticks_labels, fontweight="bold", c="white")
-
-
-def main() -> None:
-    num_colors = 10
-    background_pic_dir, texture_dir, all_data_path, data_path = get_random_paths()
-    now = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-    today_weekday = now.weekday()
-    left_border = now-timedelta(days=3)
-    right_border = now+timedelta(days=22-today_weekday)
-    df = preprocess_data(data_path, all_data_path, now, left_border, right_border)
-    color = extract_main_colors(background_pic_dir, num_colors)
-    plt.rcParams["font.sans-serif"] = ["SimHei"]
-    plt.rcParams["font.size"] = 16
-    fig = plt.figure(figsize=(16, 9), facecolor="silver")
-    ax = plt.subplot(111, frameon=False)
-    img = image.imread(background_pic_dir)
-    tw = image.imread(texture_dir)
-    img = set_alpha_channel(img, 0.6)
-    tw = set_alpha_channel(tw, 0.2)
+    locator = CalendarLocator(left_border, hour_step=4)
+    ax.xaxis.set_major_locator(locator)
+    ax.xaxis.set_major_formatter(CalendarFormatter(locator))
+    # 之后新建的刻度会复制已有刻度标签的字体属性
+    for label in ax.get_xticklabels():
+        label.set_fontweight("bold")
+
+
+def load_background(background_pic_dir: str, texture_dir: str) -> tuple[np.ndarray, np.ndarray]:
+    """
+    读取背景图片与纹理，并设置好透明度。
+
+    参数:
+    background_pic_dir (str): 背景图片的路径。
+    texture_dir (str): 纹理的路径。
+
+    返回:
+    tuple[np.ndarray, np.ndarray]: 调暗后的背景图片与纹理（RGBA）。
+    """
+    return load_background_image(background_pic_dir), load_texture(texture_dir)
+
+
+def load_background_image(background_pic_dir: str) -> np.ndarray:
+    """读取背景图片，设置透明度并调暗"""
+    img = set_alpha_channel(image.imread(background_pic_dir), 0.6)
     img[:, :, :-1] = img[:, :, :-1]/3
-    fig.figimage(img, 0, 0, zorder=-3)
-    fig.figimage(tw, 0, 0, zorder=-2)
-    plot_events(df, left_border, right_border, color)
-    plt.title("近期活动一览", c="white")
+    return img
+
+
+def load_texture(texture_dir: str) -> np.ndarray:
+    """读取纹理并设置透明度"""
+    return set_alpha_channel(image.imread(texture_dir), 0.2)
+
+
+def decorate_axes(ax: Axes, left_border: datetime, right_border: datetime, row_num: int,
+                  today: datetime | None = None) -> None:
+    """
+    绘制标题、坐标轴刻度、网格线和“今天”的高亮带，并设置坐标范围。
+
+    参数:
+    ax (Axes): 绘图的 Axes 对象。
+    left_border (datetime): 绘图的左边界时间。
+    right_border (datetime): 绘图的右边界时间。
+    row_num (int): 总行数。
+    today (datetime | None): 高亮的日期（零点），默认为左边界之后的第 3 天。
+
+    返回:
+    None
+    """
+    today_hour = 24*3 if today is None else (today-left_border).total_seconds() // 3600
+    ax.set_title("近期活动一览", c="white", fontproperties=font(FONT_SIZE*1.2))
     set_x_ticks(ax, left_border, right_border)
-    plt.yticks([])
-    plt.grid(
+    ax.set_yticks([])
+    ax.grid(
         True,
         which="major",
         linestyle="--",
         color=[0.2, 0.2, 0.2],
         linewidth=1,
     )
-    plt.grid(
+    ax.grid(
         True,
         which="minor",
         linestyle=":",
         color="gray",
         linewidth=0.75,
     )
-    plt.fill_betweenx(
-        [-0.5, df.shape[0]-0.5],
-        24*3,
-        24*3+24,
+    ax.fill_betweenx(
+        [-0.5, row_num-0.5],
+        today_hour,
+        today_hour+24,
         color="white",
         alpha=0.3,
+        zorder=1.1,  # 盖在条形（zorder 1）之上，与先画条形还是先画高亮带无关
     )
-    plt.xlim(0, (right_border-left_border).total_seconds() // 3600)
-    plt.ylim(-0.5, df.shape[0]-0.5)
+    ax.set_xlim(0, (right_border-left_border).total_seconds() // 3600)
+    ax.set_ylim(-0.5, row_num-0.5)
     ax.spines[["right", "left"]].set_visible(False)
-    plt.tight_layout()
-    plt.savefig(f"./Gantt.png")
+
+
+def new_figure(figsize: tuple[float, float] = (16, 9), dpi: float = 100) -> tuple[Figure, Axes]:
+    """
+    新建一张绑定 Agg 画布的图。
+
+    不经过 pyplot，图不会登记到全局的图管理器，也不需要 close；
+    每张图只被创建它的线程使用，因此多张图可以在线程池中同时绘制。
+
+    参数:
+    figsize (tuple[float, float]): 图的尺寸（英寸）。
+    dpi (float): 每英寸像素数。
+
+    返回:
+    tuple[Figure, Axes]: 图与绘图的 Axes 对象。
+    """
+    fig = Figure(figsize=figsize, dpi=dpi, facecolor="silver")
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111, frameon=False)
+    return fig, ax
+
+
+def render_figure(
+    events: EventTable,
+    left_border: datetime,
+    right_border: datetime,
+    color: list[str],
+    img: np.ndarray,
+    tw: np.ndarray,
+    pack: bool = False,
+    profiler: StageProfiler | None = None,
+    figsize: tuple[float, float] = (16, 9),
+    today: datetime | None = None,
+) -> Figure:
+    """
+    绘制甘特图并完成 Agg 渲染，之后可以直接编码 fig.canvas。
+
+    参数:
+    events (EventTable): 预处理后的活动表。
+    left_border (datetime): 绘图的左边界时间。
+    right_border (datetime): 绘图的右边界时间。
+    color (list[str]): 条形颜色。
+    img (np.ndarray): 处理好的背景图片。
+    tw (np.ndarray): 处理好的纹理。
+    pack (bool): 是否把同一类型中互不重叠的活动压缩到同一行。
+    profiler (StageProfiler | None): 性能剖析器。
+    figsize (tuple[float, float]): 图的尺寸（英寸，dpi 为 100）。
+    today (datetime | None): 高亮的日期，默认为左边界之后的第 3 天。
+
+    返回:
+    Figure: 已渲染的图。
+    """
+    profiler = profiler or StageProfiler()
+    fig, ax = new_figure(figsize)
+    fig.figimage(img, 0, 0, zorder=-3)
+    fig.figimage(tw, 0, 0, zorder=-2)
+    with profiler.stage("assign_rows"):
+        geometry = event_geometry(events, left_border, right_border)
+        rows, row_num = assign_rows(events, geometry, pack)
+    # 先排版坐标轴：标签按坐标轴的最终像素宽度测量与省略，与静态图层的绘制结果一致
+    with profiler.stage("decorate"):
+        decorate_axes(ax, left_border, right_border, row_num, today)
+        # tight_layout 的边距以全局字号为单位，换算成按 FONT_SIZE 计算的边距
+        fig.tight_layout(pad=1.08*FONT_SIZE/mpl.rcParams["font.size"])
+    with profiler.stage("plot_events", events=len(events), rows=int(row_num)):
+        plot_events(ax, events, left_border, right_border, color, rows, geometry)
+    profiler.record_artists(fig)
+    with profiler.stage("draw"):
+        fig.canvas.draw()
+    return fig
+
+
+def main(
+    profiler: StageProfiler | None = None,
+    pack: bool = False,
+    fmt: str = "png",
+    output: str | None = None,
+    compare: bool = False,
+    paths: tuple[str, str, str, str | None] | None = None,
+    types: list[int] | None = None,
+    keyword: str | None = None,
+    assets: tuple[np.ndarray, np.ndarray, list[str]] | None = None,
+    layers: LayerCache | None = None,
+) -> None:
+    """
+    绘制近期活动甘特图并保存。
+
+    参数:
+    profiler (StageProfiler | None): 性能剖析器。
+    pack (bool): 是否把同一类型中互不重叠的活动压缩到同一行。
+    fmt (str): 输出格式，见 encoding.FORMATS。
+    output (str | None): 输出路径，默认为 ./Gantt.<扩展名>。
+    compare (bool): 是否额外比较所有输出格式的编码耗时与文件大小。
+    paths (tuple | None): 背景图片、纹理、所有活动数据、活动数据的路径，默认同 get_random_paths。
+    types (list[int] | None): 只绘制这些类型的活动。
+    keyword (str | None): 只绘制名称中含有该关键字的活动。
+    assets (tuple | None): 预先处理好的背景图片、纹理与主要颜色，给出时不再读取图片。
+    layers (LayerCache | None): 静态图层缓存，给出时只在缓存的背景、刻度与网格上重新绘制条形与标签。
+
+    返回:
+    None
+    """
+    profiler = profiler or StageProfiler()
+    output = output or f"./Gantt.{FORMATS[fmt][0]}"
+    num_colors = 10
+    background_pic_dir, texture_dir, all_data_path, data_path = paths or get_random_paths()
+    now = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    left_border, right_border = time_window(now)
+    with profiler.stage("render"):
+        # 准备阶段互不依赖，在线程池中同时进行
+        with profiler.stage("prepare"):
+            graph = TaskGraph(profiler)
+            graph.add("preprocess_data", preprocess_data, data_path, all_data_path, now, left_border, right_border,
+                      types, keyword)
+            if not assets:
+                graph.add("extract_main_colors", extract_main_colors, background_pic_dir, num_colors)
+                graph.add("load_background_image", load_background_image, background_pic_dir)
+                graph.add("load_texture", load_texture, texture_dir)
+            prepared = graph.run()
+        events = prepared["preprocess_data"]
+        if assets:
+            img, tw, color = assets
+        else:
+            img, tw = prepared["load_background_image"], prepared["load_texture"]
+            color = prepared["extract_main_colors"]
+        if layers is None:
+            fig = render_figure(events, left_border, right_border, color, img, tw, pack, profiler)
+            save_canvas(fig.canvas, fmt, output, compare, profiler)
+        else:
+            layer = layers.get((background_pic_dir, texture_dir), left_border, right_border, img, tw)
+            with layer.lock:
+                save_canvas(layer.render(events, color, pack, profiler), fmt, output, compare, profiler)
+
+
+def save_canvas(canvas: FigureCanvasAgg, fmt: str, output: str, compare: bool, profiler: StageProfiler) -> None:
+    """
+    编码并保存画布，compare 为真时额外比较所有输出格式。
+
+    参数:
+    canvas (FigureCanvasAgg): 已渲染的画布。
+    fmt (str): 输出格式。
+    output (str): 输出路径。
+    compare (bool): 是否额外比较所有输出格式的编码耗时与文件大小。
+    profiler (StageProfiler): 性能剖析器。
+    """
+    with profiler.stage("encode", format=fmt):
+        result = encode_canvas(canvas, fmt, output)
+    print(f"已保存 {output}：{result.size/1024:.1f} KB，编码用时 {result.seconds*1000:.1f} ms")
+    if compare:
+        print(f"{'格式':<9}{'大小':>11}{'编码用时':>10}")
+        for result in compare_formats(canvas):
+            print(result.describe())
+            profiler.emit({"event": "encode", "format": result.format, "bytes": result.size, "seconds": result.seconds})
 
 
 if __name__ == "__main__":
     import os
+    import argparse
+
+    parser = argparse.ArgumentParser(description="绘制明日方舟活动甘特图")
+    parser.add_argument("--pack-lanes", action="store_true", help="将同一类型中互不重叠的活动压缩到同一行")
+    parser.add_argument("--format", default="png", choices=list(FORMATS), help="输出格式")
+    parser.add_argument("--output", help="输出路径，默认为 ./Gantt.<扩展名>")
+    parser.add_argument("--compare-formats", action="store_true", help="比较各输出格式的编码耗时与文件大小")
+    StageProfiler.add_arguments(parser)
+    args = parser.parse_args()
+    profiler = StageProfiler.from_args(args)
 
     # os.system(r"python ./爬虫/test2.py")
-    os.system(r"python ./爬虫/six2csv.py")
-    main()
+    # 剖析参数原样转发给爬虫脚本，使其输出到同一位置
+    profile_flags = ""
+    if args.profile:
+        profile_flags += " --profile"
+        if args.profile_output:
+            profile_flags += f' --profile-output "{args.profile_output}"'
+        if args.cprofile_dir:
+            profile_flags += f' --cprofile-dir "{args.cprofile_dir}"'
+    with profiler.stage("six2csv"):
+        os.system(r"python ./爬虫/six2csv.py"+profile_flags)
+    main(profiler, pack=args.pack_lanes, fmt=args.format, output=args.output, compare=args.compare_formats)
@@ -0,0 +1,474 @@
+"""
+原始网页存档。
+
+爬虫抓取的公告页面（例如 anniversary_activity.html、babel_activity.html，每个 240–270 KB）
+按页压缩后追加到一个存档文件中，解析器改进后可以对过去的公告重新提取：
+
+    python page_archive.py add anniversary_activity.html babel_activity.html
+    python page_archive.py train            # 用已存档的页面训练压缩字典，之后追加的页面使用该字典
+    python page_archive.py list --url https://ak.hypergryph.com/
+    python page_archive.py cat https://ak.hypergryph.com/news/123 --at 2025-05-20 > page.html
+    python page_archive.py extract 导出目录  # 逐页流式导出
+    python page_archive.py rebuild-index
+
+存档由两个文件组成：
+
+- 数据文件（.gka）：只追加的记录序列，每条记录是固定长度的记录头、URL 与压缩后的内容，
+  记录头带有魔数、编码、原始长度、压缩长度、抓取时间与 CRC32，可以不依赖索引从头扫描；
+- 索引文件（.gka.idx）：每条记录一行 JSON，记录 URL、抓取时间与记录在数据文件中的偏移量。
+
+读取单个页面只需按索引 seek 到该记录、解压这一条。写入（追加、训练字典、重建索引）在锁文件（.gka.lock）
+上持有文件锁，并在锁内补齐上次中断留下的索引、截掉末尾不完整的记录；只读打开存档时不修改任何文件，
+只看得到已写入索引的记录。每页单独压缩：安装了 zstandard 时使用 zstd，
+否则使用标准库的 zlib；两者都支持预先训练的字典（zlib 为预置字典 zdict），同一站点的页面共享
+大段模板，使用字典后单页的压缩率接近整体压缩。字典本身也作为记录存放在数据文件中。
+"""
+
+import json
+import os
+import struct
+import zlib
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Iterable, Iterator
+
+try:
+    import zstandard
+except ImportError:  # 可选依赖，未安装时使用 zlib
+    zstandard = None
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+DEFAULT_PATH = "./网页存档/pages.gka"
+MAGIC = b"GKPG"
+# 魔数、记录类型、编码、URL 长度、字典编号、原始长度、压缩长度、抓取时间（Unix 秒）、原始内容的 CRC32
+HEADER = struct.Struct("<4sBBHIIIdI")
+PAGE, DICTIONARY = 0, 1
+CODECS = {0: "raw", 1: "zlib", 2: "zstd"}
+CODEC_IDS = {name: codec for codec, name in CODECS.items()}
+ZLIB_DICT_SIZE = 32*1024  # zlib 的窗口只有 32 KB，更长的预置字典没有意义
+
+
+@dataclass
+class IndexEntry:
+    """索引中的一条记录"""
+
+    url: str
+    fetched_at: str
+    offset: int
+    length: int
+    size: int
+    codec: str
+    dict_id: int = 0
+    kind: int = PAGE
+
+    @property
+    def time(self) -> datetime:
+        """抓取时间"""
+        return datetime.fromisoformat(self.fetched_at)
+
+
+def default_codec() -> str:
+    """安装了 zstandard 时为 zstd，否则为 zlib"""
+    return "zstd" if zstandard is not None else "zlib"
+
+
+def train_zlib_dictionary(samples: list[bytes], size: int = ZLIB_DICT_SIZE) -> bytes:
+    """
+    为 zlib 构造预置字典：挑出在多个样本中都出现的行，按出现的页数与长度排序后拼接。
+
+    zlib 查找匹配时离当前位置越近越省字节，因此越常用的行放在字典越靠后的位置。
+
+    参数:
+    samples (list[bytes]): 样本页面。
+    size (int): 字典的最大长度。
+
+    返回:
+    bytes: 字典，样本不足两页或没有公共行时为空。
+    """
+    pages = Counter()
+    for sample in samples:
+        pages.update({line.strip() for line in sample.splitlines() if len(line.strip()) >= 8})
+    common = sorted((line for line, n in pages.items() if n >= 2), key=lambda line: (pages[line], len(line)),
+                    reverse=True)
+    chosen, total = [], 0
+    for line in common:
+        if total+len(line)+1 > size:
+            continue
+        chosen.append(line)
+        total += len(line)+1
+    return b"\n".join(reversed(chosen))
+
+
+def compress(data: bytes, codec: str, dictionary: bytes = b"") -> bytes:
+    """按编码压缩，dictionary 为空时不使用字典"""
+    if codec == "raw":
+        return data
+    if codec == "zlib":
+        compressor = zlib.compressobj(9, zdict=dictionary) if dictionary else zlib.compressobj(9)
+        return compressor.compress(data)+compressor.flush()
+    if codec == "zstd":
+        dict_data = zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+        return zstandard.ZstdCompressor(level=19, dict_data=dict_data).compress(data)
+    raise ValueError(f"未知的编码 {codec}，可选：{', '.join(CODEC_IDS)}")
+
+
+def decompress(data: bytes, codec: str, dictionary: bytes = b"") -> bytes:
+    """compress 的逆操作"""
+    if codec == "raw":
+        return data
+    if codec == "zlib":
+        decompressor = zlib.decompressobj(zdict=dictionary) if dictionary else zlib.decompressobj()
+        return decompressor.decompress(data)+decompressor.flush()
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("该记录使用 zstd 压缩，需要安装 zstandard")
+        dict_data = zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+        return zstandard.ZstdDecompressor(dict_data=dict_data).decompress(data)
+    raise ValueError(f"未知的编码 {codec}，可选：{', '.join(CODEC_IDS)}")
+
+
+class PageArchive:
+    """只追加的压缩网页存档，写入时持有文件锁，读取不加锁"""
+
+    def __init__(self, path: str = DEFAULT_PATH, codec: str | None = None):
+        """
+        参数:
+        path (str): 数据文件路径，索引文件为同名加 .idx。
+        codec (str | None): 新追加页面的编码，默认见 default_codec。
+        """
+        self.path = path
+        self.index_path = path+".idx"
+        self.codec = codec or default_codec()
+        self.entries: list[IndexEntry] = []
+        self.by_url: dict[str, list[IndexEntry]] = defaultdict(list)
+        self._dictionaries: dict[int, bytes] = {}
+        self._load_index()
+
+    def _load_index(self) -> None:
+        """读取索引文件；同一偏移量出现多次时只保留第一行，正在写入、还没有换行的最后一行跳过"""
+        self.entries.clear()
+        self.by_url.clear()
+        if not os.path.exists(self.index_path):
+            return
+        offsets = set()
+        with open(self.index_path, encoding="utf-8") as f:
+            for line in f:
+                if not line.endswith("\n") or not line.strip():
+                    continue
+                entry = IndexEntry(**json.loads(line))
+                if entry.offset not in offsets:
+                    offsets.add(entry.offset)
+                    self._add_entry(entry)
+
+    @contextmanager
+    def _write_lock(self) -> Iterator[None]:
+        """写入时持有的文件锁，多个写入进程依次进行"""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path+".lock", "a+") as f:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def _repair(self) -> None:
+        """
+        在写锁内调用：重新读取索引（其他进程可能追加过），上次写入数据后、写入索引前中断时
+        从数据文件补齐索引，并截掉末尾不完整的记录。
+        """
+        self._load_index()
+        end = max((e.offset+self._record_size(e) for e in self.entries), default=0)
+        if os.path.exists(self.path) and os.path.getsize(self.path) > end:
+            for entry in self._scan(end, truncate=True):
+                self._add_entry(entry)
+                self._write_index(entry)
+
+    def _add_entry(self, entry: IndexEntry) -> None:
+        self.entries.append(entry)
+        if entry.kind == PAGE:
+            self.by_url[entry.url].append(entry)
+
+    def _write_index(self, entry: IndexEntry) -> None:
+        with open(self.index_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(asdict(entry), ensure_ascii=False)+"\n")
+
+    @staticmethod
+    def _record_size(entry: IndexEntry) -> int:
+        return HEADER.size+len(entry.url.encode("utf-8"))+entry.length
+
+    def _scan(self, start: int = 0, truncate: bool = False) -> Iterator[IndexEntry]:
+        """从 start 开始扫描数据文件中的记录头，truncate 为 True 时截掉末尾不完整的记录（须持有写锁）"""
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            offset = start
+            while True:
+                head = f.read(HEADER.size)
+                if len(head) < HEADER.size:
+                    break
+                magic, kind, codec, url_len, dict_id, size, length, fetched, _ = HEADER.unpack(head)
+                if magic != MAGIC:
+                    raise ValueError(f"{self.path} 在偏移 {offset} 处的记录头损坏")
+                url = f.read(url_len)
+                f.seek(length, os.SEEK_CUR)
+                if f.tell() > os.path.getsize(self.path) or len(url) < url_len:
+                    break
+                yield IndexEntry(url.decode("utf-8"), datetime.fromtimestamp(fetched).isoformat(" ", "seconds"),
+                                 offset, length, size, CODECS[codec], dict_id, kind)
+                offset = f.tell()
+        if truncate and offset < os.path.getsize(self.path):
+            print(f"{self.path} 末尾有不完整的记录，已截断到 {offset} 字节")
+            os.truncate(self.path, offset)
+
+    def rebuild_index(self) -> int:
+        """
+        扫描数据文件重建索引文件。
+
+        返回:
+        int: 记录数。
+        """
+        with self._write_lock():
+            self.entries.clear()
+            self.by_url.clear()
+            entries = list(self._scan(truncate=True)) if os.path.exists(self.path) else []
+            # 先写临时文件再替换，读取方不会看到写了一半的索引
+            with open(self.index_path+".tmp", "w", encoding="utf-8") as f:
+                for entry in entries:
+                    self._add_entry(entry)
+                    f.write(json.dumps(asdict(entry), ensure_ascii=False)+"\n")
+            os.replace(self.index_path+".tmp", self.index_path)
+        return len(entries)
+
+    def _append(self, kind: int, url: str, data: bytes, fetched_at: datetime, dict_id: int | None = None,
+                codec: str | None = None) -> IndexEntry:
+        """在写锁内追加一条记录，dict_id 为 None 时使用当前编码最近训练的字典"""
+        with self._write_lock():
+            self._repair()
+            if dict_id is None:
+                dict_id = self.latest_dictionary()
+            return self._append_locked(kind, url, data, fetched_at, dict_id, codec)
+
+    def _append_locked(self, kind: int, url: str, data: bytes, fetched_at: datetime, dict_id: int,
+                       codec: str | None) -> IndexEntry:
+        codec = codec or self.codec
+        # 字典记录的 dict_id 是它自己的编号，字典本身不用字典压缩
+        payload = compress(data, codec, self.dictionary(dict_id) if kind == PAGE and dict_id else b"")
+        url_bytes = url.encode("utf-8")
+        head = HEADER.pack(MAGIC, kind, CODEC_IDS[codec], len(url_bytes), dict_id, len(data), len(payload),
+                           fetched_at.timestamp(), zlib.crc32(data))
+        with open(self.path, "ab") as f:
+            offset = f.tell()
+            f.write(head+url_bytes+payload)
+            f.flush()
+            os.fsync(f.fileno())
+        entry = IndexEntry(url, fetched_at.isoformat(" ", "seconds"), offset, len(payload), len(data), codec,
+                           dict_id, kind)
+        self._add_entry(entry)
+        self._write_index(entry)
+        return entry
+
+    def append(self, url: str, page: str | bytes, fetched_at: datetime | None = None) -> IndexEntry:
+        """
+        追加一个页面，使用最近训练的字典（若有）。
+
+        参数:
+        url (str): 页面 URL。
+        page (str | bytes): 页面内容，str 按 UTF-8 编码。
+        fetched_at (datetime | None): 抓取时间，默认为现在。
+
+        返回:
+        IndexEntry: 新记录的索引。
+        """
+        data = page.encode("utf-8") if isinstance(page, str) else page
+        return self._append(PAGE, url, data, fetched_at or datetime.now())
+
+    def train(self, samples: Iterable[bytes] | None = None, size: int | None = None) -> int:
+        """
+        用样本页面训练压缩字典并写入存档，之后追加的页面使用该字典。
+
+        参数:
+        samples (Iterable[bytes] | None): 样本，默认为存档中每个 URL 的最新版本。
+        size (int | None): 字典长度，zlib 默认 32 KB，zstd 默认 112 KB。
+
+        返回:
+        int: 字典编号，样本不足无法训练时为 0。
+        """
+        if samples is None:
+            samples = [self.read(versions[-1]) for versions in self.by_url.values()]
+        samples = list(samples)
+        if self.codec == "zstd":
+            if len(samples) < 2:
+                return 0
+            dictionary = zstandard.train_dictionary(size or 112*1024, samples).as_bytes()
+        else:
+            dictionary = train_zlib_dictionary(samples, min(size or ZLIB_DICT_SIZE, ZLIB_DICT_SIZE))
+        if not dictionary:
+            return 0
+        with self._write_lock():
+            self._repair()
+            dict_id = max((e.dict_id for e in self.entries if e.kind == DICTIONARY), default=0)+1
+            self._append_locked(DICTIONARY, f"dictionary:{self.codec}", dictionary, datetime.now(), dict_id, "zlib")
+        return dict_id
+
+    def latest_dictionary(self) -> int:
+        """当前编码最近训练的字典编号，没有时为 0"""
+        ids = [e.dict_id for e in self.entries if e.kind == DICTIONARY and e.url == f"dictionary:{self.codec}"]
+        return max(ids, default=0)
+
+    def dictionary(self, dict_id: int) -> bytes:
+        """读取字典，读过的字典缓存在内存中"""
+        if dict_id not in self._dictionaries:
+            for entry in self.entries:
+                if entry.kind == DICTIONARY and entry.dict_id == dict_id:
+                    with open(self.path, "rb") as f:
+                        self._dictionaries[dict_id] = self._read_record(f, entry)
+                    break
+            else:
+                raise KeyError(f"存档中没有编号为 {dict_id} 的字典")
+        return self._dictionaries[dict_id]
+
+    def _read_record(self, f, entry: IndexEntry) -> bytes:
+        f.seek(entry.offset)
+        head = f.read(HEADER.size)
+        magic, *_, crc = HEADER.unpack(head)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} 在偏移 {entry.offset} 处的记录头损坏，可以尝试 rebuild-index")
+        f.seek(len(entry.url.encode("utf-8")), os.SEEK_CUR)
+        payload = f.read(entry.length)
+        dictionary = b"" if entry.kind == DICTIONARY or not entry.dict_id else self.dictionary(entry.dict_id)
+        data = decompress(payload, entry.codec, dictionary)
+        if zlib.crc32(data) != crc:
+            raise ValueError(f"{entry.url}（{entry.fetched_at}）的内容校验失败")
+        return data
+
+    def read(self, entry: IndexEntry) -> bytes:
+        """随机读取一条记录：seek 到记录所在位置，只解压这一条"""
+        with open(self.path, "rb") as f:
+            return self._read_record(f, entry)
+
+    def versions(self, url: str) -> list[IndexEntry]:
+        """某个 URL 的全部版本，按追加顺序排列"""
+        return list(self.by_url.get(url, []))
+
+    def get(self, url: str, at: datetime | None = None) -> str:
+        """
+        读取某个 URL 在 at 时刻或之前抓取的最新版本。
+
+        参数:
+        url (str): 页面 URL。
+        at (datetime | None): 时间，默认为最新版本。
+
+        返回:
+        str: 页面内容。
+        """
+        versions = [e for e in self.by_url.get(url, []) if at is None or e.time <= at]
+        if not versions:
+            raise KeyError(f"存档中没有 {url}" + (f" 在 {at} 之前的版本" if at else ""))
+        return self.read(max(versions, key=lambda e: e.fetched_at)).decode("utf-8")
+
+    def iter_pages(self, url_prefix: str = "", since: datetime | None = None,
+                   until: datetime | None = None) -> Iterator[tuple[IndexEntry, str]]:
+        """
+        按数据文件中的顺序逐页读取，适合对全部存档重新提取；同一时刻只有一页在内存中。
+
+        参数:
+        url_prefix (str): 只读取 URL 以此开头的页面。
+        since (datetime | None): 只读取此时刻及之后抓取的页面。
+        until (datetime | None): 只读取此时刻之前抓取的页面。
+
+        返回:
+        Iterator[tuple[IndexEntry, str]]: （索引, 页面内容）。
+        """
+        with open(self.path, "rb") as f:
+            for entry in sorted(self.entries, key=lambda e: e.offset):
+                if entry.kind != PAGE or not entry.url.startswith(url_prefix):
+                    continue
+                if (since and entry.time < since) or (until and entry.time >= until):
+                    continue
+                yield entry, self._read_record(f, entry).decode("utf-8")
+
+    def stats(self) -> dict:
+        """页数、URL 数、原始总大小与数据文件大小"""
+        pages = [e for e in self.entries if e.kind == PAGE]
+        return {
+            "pages": len(pages),
+            "urls": len(self.by_url),
+            "raw_bytes": sum(e.size for e in pages),
+            "archive_bytes": os.path.getsize(self.path) if os.path.exists(self.path) else 0,
+        }
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="原始网页存档")
+    parser.add_argument("--archive", default=DEFAULT_PATH, help="存档数据文件")
+    parser.add_argument("--codec", choices=list(CODEC_IDS), help="新追加页面的编码，默认有 zstandard 时为 zstd，否则为 zlib")
+    sub = parser.add_subparsers(dest="command", required=True)
+    add = sub.add_parser("add", help="追加本地保存的页面")
+    add.add_argument("files", nargs="+")
+    add.add_argument("--url", help="页面 URL，默认为 file:文件名（只能用于单个文件）")
+    add.add_argument("--fetched", help="抓取时间，例如 2025-05-20 12:00，默认为文件的修改时间")
+    train = sub.add_parser("train", help="用每个 URL 的最新版本训练压缩字典")
+    train.add_argument("--size", type=int, help="字典长度（字节）")
+    listing = sub.add_parser("list", help="列出存档中的页面")
+    listing.add_argument("--url", default="", help="URL 前缀")
+    cat = sub.add_parser("cat", help="输出某个页面")
+    cat.add_argument("url")
+    cat.add_argument("--at", help="输出此时刻或之前的最新版本")
+    extract = sub.add_parser("extract", help="逐页导出到目录")
+    extract.add_argument("out_dir")
+    extract.add_argument("--url", default="", help="URL 前缀")
+    sub.add_parser("rebuild-index", help="扫描数据文件重建索引")
+    sub.add_parser("stats", help="统计压缩率")
+    args = parser.parse_args()
+
+    archive = PageArchive(args.archive, args.codec)
+    if args.command == "add":
+        if args.url and len(args.files) > 1:
+            parser.error("--url 只能用于单个文件")
+        for path in args.files:
+            with open(path, "rb") as f:
+                data = f.read()
+            fetched = datetime.fromisoformat(args.fetched) if args.fetched else datetime.fromtimestamp(
+                os.path.getmtime(path))
+            entry = archive.append(args.url or f"file:{os.path.basename(path)}", data, fetched)
+            print(f"{entry.url}：{entry.size/1024:.1f} KB -> {entry.length/1024:.1f} KB（{entry.codec}）")
+    elif args.command == "train":
+        dict_id = archive.train(size=args.size)
+        print(f"已训练字典 {dict_id}" if dict_id else "样本不足，未训练字典")
+    elif args.command == "list":
+        for entry in archive.entries:
+            if entry.kind == PAGE and entry.url.startswith(args.url):
+                print(f"{entry.fetched_at}  {entry.size:>9}  {entry.length:>8}  {entry.url}")
+    elif args.command == "cat":
+        sys.stdout.write(archive.get(args.url, datetime.fromisoformat(args.at) if args.at else None))
+    elif args.command == "extract":
+        os.makedirs(args.out_dir, exist_ok=True)
+        for i, (entry, page) in enumerate(archive.iter_pages(args.url)):
+            name = f"{i:05d}_{entry.fetched_at[:10]}_{''.join(c if c.isalnum() else '_' for c in entry.url)[-80:]}.html"
+            with open(os.path.join(args.out_dir, name), "w", encoding="utf-8") as f:
+                f.write(page)
+        print(f"已导出到 {args.out_dir}")
+    elif args.command == "rebuild-index":
+        print(f"已重建索引：{archive.rebuild_index()} 条记录")
+    elif args.command == "stats":
+        s = archive.stats()
+        ratio = s["archive_bytes"]/s["raw_bytes"] if s["raw_bytes"] else 0
+        print(f"{s['pages']} 个页面（{s['urls']} 个 URL），原始 {s['raw_bytes']/1024:.1f} KB，"
+              f"存档 {s['archive_bytes']/1024:.1f} KB，压缩后为原来的 {ratio:.1%}")
@@ -0,0 +1,356 @@
+"""
+全历史海报。
+
+把所有活动数据按固定天数切成若干时间段（分块），每块绘制成一条与海报等宽的横向长条，
+从上到下依次拼接成一张按小时分辨率覆盖数年的大图。各块用 WindowIndex 查出时间上重叠的活动，
+在线程池中并行绘制（绘图核心不使用 pyplot 的全局状态），绘制好的块按顺序逐行压缩写入 PNG，
+同一时刻只有线程数加一个块的像素在内存中，峰值内存与海报总长度无关。
+
+可选地同时写出逐级缩小一半的金字塔图层（poster.1.png、poster.2.png……），同样流式写入。
+"""
+
+import struct
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+import numpy as np
+from PIL import Image
+
+from culling import BarGeometry
+from event_table import EventTable
+from window_index import WindowIndex
+
+HOUR = np.timedelta64(1, "h")
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+class PNGStreamWriter:
+    """
+    逐行写入 8 位 RGBA PNG，不需要在内存中保存整张图。
+
+    每行使用 Up 滤波（与上一行逐字节相减），甘特图上下相邻的行大多相同，压缩率明显高于不滤波。
+    """
+
+    def __init__(self, path: str, width: int, height: int, level: int = 6, chunk: int = 1 << 20):
+        """
+        参数:
+        path (str): 输出路径。
+        width (int): 图像宽度（像素）。
+        height (int): 图像高度（像素），写满这么多行后才能 close。
+        level (int): zlib 压缩级别。
+        chunk (int): 压缩数据攒到这么多字节时写出一个 IDAT 块。
+        """
+        self.width = width
+        self.height = height
+        self.rows = 0
+        self.chunk = chunk
+        self._file = open(path, "wb")
+        self._compressor = zlib.compressobj(level)
+        self._pending = []
+        self._pending_size = 0
+        self._previous = np.zeros((width*4,), dtype=np.uint8)
+        self._file.write(PNG_SIGNATURE)
+        self._write_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0))
+
+    def _write_chunk(self, kind: bytes, data: bytes) -> None:
+        self._file.write(struct.pack(">I", len(data))+kind+data)
+        self._file.write(struct.pack(">I", zlib.crc32(kind+data) & 0xFFFFFFFF))
+
+    def _feed(self, data: bytes) -> None:
+        if data:
+            self._pending.append(data)
+            self._pending_size += len(data)
+        if self._pending_size >= self.chunk:
+            self._flush_idat()
+
+    def _flush_idat(self) -> None:
+        if self._pending:
+            self._write_chunk(b"IDAT", b"".join(self._pending))
+            self._pending.clear()
+            self._pending_size = 0
+
+    def write(self, pixels: np.ndarray) -> None:
+        """
+        追加若干行像素。
+
+        参数:
+        pixels (np.ndarray): 形状为 (行数, width, 4) 的 uint8 数组。
+        """
+        rows = np.asarray(pixels, dtype=np.uint8).reshape(len(pixels), self.width*4)
+        if self.rows+len(rows) > self.height:
+            raise ValueError(f"写入的行数超过图像高度 {self.height}")
+        filtered = np.empty((len(rows), self.width*4+1), dtype=np.uint8)
+        filtered[:, 0] = 2  # Up 滤波
+        filtered[:, 1:] = rows-np.vstack((self._previous, rows[:-1]))
+        self._feed(self._compressor.compress(filtered.tobytes()))
+        self._previous = rows[-1].copy()
+        self.rows += len(rows)
+
+    def close(self) -> None:
+        """写出剩余数据与文件尾"""
+        if self.rows != self.height:
+            self._file.close()
+            raise ValueError(f"只写入了 {self.rows} 行，图像高度为 {self.height}")
+        self._feed(self._compressor.flush())
+        self._flush_idat()
+        self._write_chunk(b"IEND", b"")
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        else:
+            self._file.close()
+
+
+@dataclass
+class Band:
+    """海报中的一个分块：一段时间内的活动及其行号"""
+
+    left_border: datetime
+    right_border: datetime
+    events: EventTable
+    colors: list[str]
+    geometry: BarGeometry
+    rows: np.ndarray
+    row_num: int
+    height: int
+
+
+def band_geometry(events: EventTable, left_border: datetime, right_border: datetime) -> BarGeometry:
+    """
+    分块内的条形几何信息。
+
+    与主图不同，海报中的每个分块都只显示与它重叠的部分：从上一块延续过来的活动从左边界画起，
+    标签放在可见部分的中央。
+
+    参数:
+    events (EventTable): 分块内的活动。
+    left_border (datetime): 分块的左边界时间。
+    right_border (datetime): 分块的右边界时间。
+
+    返回:
+    BarGeometry: 条形几何信息。
+    """
+    lb = np.datetime64(left_border, "s")
+    rbt = np.datetime64(right_border, "s")
+    rb = (rbt-lb) // HOUR
+    left = np.maximum((events.start_times-lb) // HOUR, -1)
+    right = (events.end_times-lb) // HOUR+1
+    width = right-left
+    label_width = np.minimum(right, rb)-np.maximum(left, 0)
+    visible = (right > 0) & (left < rb)
+    return BarGeometry(left.astype(float), width.astype(float), label_width.astype(float), visible)
+
+
+def plan_bands(
+    events: EventTable,
+    palette: list[str],
+    band_days: int = 28,
+    row_px: int = 28,
+    chrome_px: int = 120,
+    start: datetime | None = None,
+    end: datetime | None = None,
+) -> list[Band]:
+    """
+    把时间轴切成分块并为每块分配行号，不做任何绘制，用于事先确定海报的总高度。
+
+    参数:
+    events (EventTable): 全部活动。
+    palette (list[str]): 条形颜色，每个活动在所有分块中使用同一种颜色。
+    band_days (int): 每块的天数。
+    row_px (int): 每行的高度（dpi 为 100 时的像素）。
+    chrome_px (int): 每块中标题与刻度标签占用的高度（dpi 为 100 时的像素）。
+    start (datetime | None): 海报起点，默认为最早的活动所在周的周一零点。
+    end (datetime | None): 海报终点，默认为最晚的结束时间。
+
+    返回:
+    list[Band]: 分块列表。
+    """
+    from main import assign_rows
+
+    valid = (events.types != -1) & ~np.isnat(events.start_times) & ~np.isnat(events.end_times)
+    events = events.take(valid)
+    events = events.take(events.render_order())
+    if len(events) == 0:
+        return []
+    colors = [palette[i % len(palette)] for i in range(len(events))]
+    if start is None:
+        first = events.start_times.min().astype(datetime)
+        start = datetime(first.year, first.month, first.day)-timedelta(days=first.weekday())
+    end = end or events.end_times.max().astype(datetime)
+
+    index = WindowIndex(events.starts, events.ends)
+    bands = []
+    left_border = start
+    while left_border < end:
+        right_border = left_border+timedelta(days=band_days)
+        idx = np.sort(index.query(int(np.datetime64(left_border, "s").astype(np.int64)),
+                                  int(np.datetime64(right_border, "s").astype(np.int64))))
+        band_events = events.take(idx)
+        geometry = band_geometry(band_events, left_border, right_border)
+        rows, row_num = assign_rows(band_events, geometry, pack=True)
+        row_num = max(int(row_num), 1)
+        bands.append(Band(left_border, right_border, band_events, [colors[i] for i in idx], geometry, rows,
+                          row_num, chrome_px+row_num*row_px))
+        left_border = right_border
+    return bands
+
+
+def output_size(px: float, dpi: float) -> int:
+    """把 dpi 为 100 时的像素数换算为输出像素数"""
+    return round(px*dpi/100)
+
+
+def render_band(band: Band, width_px: int, dpi: float = 100, chrome_px: int = 120) -> np.ndarray:
+    """
+    绘制一个分块。
+
+    参数:
+    band (Band): plan_bands 得到的分块。
+    width_px (int): 海报宽度（dpi 为 100 时的像素）。
+    dpi (float): 输出 dpi，像素尺寸按 dpi/100 缩放。
+    chrome_px (int): 标题与刻度标签占用的高度（dpi 为 100 时的像素）。
+
+    返回:
+    np.ndarray: 分块的 RGBA 像素，形状为 (高, 宽, 4)。
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    from main import font, plot_events, set_x_ticks
+
+    width, height = output_size(width_px, dpi), output_size(band.height, dpi)
+    fig = Figure(figsize=(width/dpi, height/dpi), dpi=dpi, facecolor="#2b2b2b")
+    FigureCanvasAgg(fig)
+    title_px = 36
+    ax = fig.add_axes((0, (chrome_px-title_px)/band.height, 1, 1-chrome_px/band.height), frameon=False)
+    fig.text(8/width_px, 1-title_px/2/band.height, band.left_border.strftime("%Y年%m月%d日")+" — "
+             + (band.right_border-timedelta(days=1)).strftime("%Y年%m月%d日"),
+             color="white", va="center", fontproperties=font(weight="bold"))
+    rb = (band.right_border-band.left_border).total_seconds() // 3600
+    ax.set_xlim(0, rb)
+    ax.set_ylim(-0.5, band.row_num-0.5)
+    plot_events(ax, band.events, band.left_border, band.right_border, band.colors, band.rows, band.geometry)
+    set_x_ticks(ax, band.left_border, band.right_border)
+    ax.set_yticks([])
+    ax.grid(True, which="major", linestyle="--", color=[0.45, 0.45, 0.45], linewidth=1)
+    ax.grid(True, which="minor", linestyle=":", color="gray", linewidth=0.5)
+    fig.canvas.draw()
+    pixels = np.asarray(fig.canvas.buffer_rgba())
+    if pixels.shape[:2] != (height, width):
+        raise RuntimeError(f"分块尺寸 {pixels.shape[1]}×{pixels.shape[0]} 与预计的 {width}×{height} 不一致")
+    return pixels
+
+
+def render_poster(
+    events: EventTable,
+    output: str,
+    palette: list[str],
+    band_days: int = 28,
+    hour_px: float = 4,
+    row_px: int = 28,
+    dpi: float = 100,
+    levels: int = 0,
+    workers: int = 2,
+    start: datetime | None = None,
+    end: datetime | None = None,
+) -> tuple[int, int]:
+    """
+    绘制全历史海报并流式写入 PNG。
+
+    参数:
+    events (EventTable): 全部活动。
+    output (str): 输出 PNG 路径。
+    palette (list[str]): 条形颜色。
+    band_days (int): 每块的天数。
+    hour_px (float): 每小时的宽度（dpi 为 100 时的像素）。
+    row_px (int): 每行的高度（dpi 为 100 时的像素）。
+    dpi (float): 输出 dpi。
+    levels (int): 额外写出的金字塔图层数，第 k 层边长缩小为 1/2^k，写入 <output>.<k>.png。
+    workers (int): 并行绘制的线程数，内存中最多同时有 workers+1 个分块。
+    start (datetime | None): 海报起点。
+    end (datetime | None): 海报终点。
+
+    返回:
+    tuple[int, int]: 海报的宽与高（像素）。
+    """
+    chrome_px = 120
+    bands = plan_bands(events, palette, band_days, row_px, chrome_px, start, end)
+    if not bands:
+        raise ValueError("没有可绘制的活动")
+    width_px = round(band_days*24*hour_px)
+    width = output_size(width_px, dpi)
+    heights = [output_size(band.height, dpi) for band in bands]
+
+    base = output[:-4] if output.lower().endswith(".png") else output
+    writers = [PNGStreamWriter(output, width, sum(heights))]
+    for k in range(1, levels+1):
+        f = 2**k
+        writers.append(PNGStreamWriter(f"{base}.{k}.png", -(-width//f), sum(-(-h//f) for h in heights)))
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            for band in bands:
+                pending.append(pool.submit(render_band, band, width_px, dpi, chrome_px))
+                # 按顺序写出最早提交的分块，使内存中最多保留 workers+1 个分块
+                if len(pending) > workers:
+                    _write_band(writers, pending.popleft().result())
+            while pending:
+                _write_band(writers, pending.popleft().result())
+        for writer in writers:
+            writer.close()
+    except BaseException:
+        for writer in writers:
+            writer._file.close()
+        raise
+    print(f"已保存 {output}：{len(bands)} 个分块，{width}×{sum(heights)} 像素")
+    return width, sum(heights)
+
+
+def _write_band(writers: list[PNGStreamWriter], pixels: np.ndarray) -> None:
+    writers[0].write(pixels)
+    if len(writers) > 1:
+        im = Image.fromarray(pixels, "RGBA")
+        for k, writer in enumerate(writers[1:], start=1):
+            writer.write(np.asarray(im.reduce(2**k)))
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    import time
+
+    from main import extract_main_colors, get_random_paths
+
+    parser = argparse.ArgumentParser(description="把全部活动绘制成按时间分块拼接的大幅海报")
+    parser.add_argument("--data", default="./所有活动数据.csv", help="活动数据 CSV")
+    parser.add_argument("-o", "--output", default="./poster.png", help="输出 PNG")
+    parser.add_argument("--band-days", type=int, default=28, help="每个分块的天数")
+    parser.add_argument("--hour-px", type=float, default=4, help="每小时的宽度（dpi 为 100 时的像素）")
+    parser.add_argument("--row-px", type=int, default=28, help="每行的高度（dpi 为 100 时的像素）")
+    parser.add_argument("--dpi", type=float, default=100, help="输出 dpi，打印时可以调大")
+    parser.add_argument("--levels", type=int, default=0, help="额外写出的金字塔图层数")
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1), help="并行绘制的线程数")
+    parser.add_argument("--start", type=datetime.fromisoformat, help="海报起点，如 2024-01-01")
+    parser.add_argument("--end", type=datetime.fromisoformat, help="海报终点")
+    parser.add_argument("--background", help="提取条形颜色的背景图片，默认随机挑选")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    palette = extract_main_colors(args.background or get_random_paths()[0], 10)
+    render_poster(EventTable.load(args.data), args.output, palette, args.band_days, args.hour_px, args.row_px,
+                  args.dpi, args.levels, args.workers, args.start, args.end)
+    try:
+        import resource
+
+        print(f"用时 {time.perf_counter()-t0:.2f} s，峰值内存 {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss/1024:.0f} MB")
+    except ImportError:  # Windows 没有 resource 模块
+        print(f"用时 {time.perf_counter()-t0:.2f} s")
@@ -0,0 +1,267 @@
+"""
+分阶段性能剖析工具。
+
+记录每个阶段的墙钟时间、CPU 时间、tracemalloc 内存峰值，以及 matplotlib 图元数量，
+统一以 JSON 行（每行一条记录）的形式输出；可选为顶层阶段保存 cProfile 结果，
+长驻进程还可以开启一个本地 Prometheus 文本格式的指标端点。
+
+tracemalloc 的峰值是整个进程共用的，reset_peak 会打乱其他线程正在测量的峰值；
+Python 3.12 起 cProfile 基于 sys.monitoring，同一时刻也只能有一个剖析器处于启用状态。
+因此只有主线程中的阶段测量内存峰值、保存 cProfile 结果，工作线程中的阶段只记录墙钟时间与
+本线程的 CPU 时间（peak_bytes 为 null）。工作线程分配的内存计入包含它们的主线程阶段，
+这些阶段的记录带有 concurrent_stages 字段，表示峰值是与几个并发阶段合并的结果。
+
+未启用时所有方法都是空操作，因此可以无条件地在代码中埋点。
+"""
+
+import atexit
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import IO, Iterator
+
+
+class StageProfiler:
+    """分阶段性能剖析器"""
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        output: IO[str] | None = None,
+        cprofile_dir: str | None = None,
+        source: str = "main",
+    ):
+        """
+        参数:
+        enabled (bool): 是否启用剖析，未启用时所有埋点都是空操作。
+        output (IO[str] | None): JSON 行的输出流，默认为标准错误。
+        cprofile_dir (str | None): 若给出，则为每个顶层阶段保存一份 .prof 文件到该目录。
+        source (str): 记录来源名称，用于区分主程序与各个爬虫脚本。
+        """
+        self.enabled = enabled
+        self.output = output
+        self._owns_output = False  # 输出文件由 from_args 打开时，close 负责关闭
+        self.cprofile_dir = cprofile_dir
+        self.source = source
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._totals: dict[str, dict[str, float]] = {}
+        self._artists: dict[str, int] = {}
+        self._started_tracemalloc = False
+        self._active = 0  # 所有线程中尚未结束的阶段数
+        self._worker_stages = 0  # 工作线程中已经结束的阶段数
+
+    @property
+    def _stack(self) -> list[dict]:
+        """当前线程的阶段栈，多个线程同时绘图时各自嵌套"""
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    @classmethod
+    def from_args(cls, args, source: str = "main") -> "StageProfiler":
+        """
+        根据命令行参数（--profile / --profile-output / --cprofile-dir）创建剖析器。
+
+        --profile-output 打开的文件归剖析器所有，调用 close 或进程退出时关闭。
+        """
+        output = None
+        if getattr(args, "profile_output", None):
+            output = open(args.profile_output, "a", encoding="utf-8")
+        profiler = cls(
+            enabled=bool(getattr(args, "profile", False)),
+            output=output,
+            cprofile_dir=getattr(args, "cprofile_dir", None),
+            source=source,
+        )
+        if output is not None:
+            profiler._owns_output = True
+            atexit.register(profiler.close)
+        return profiler
+
+    def close(self) -> None:
+        """关闭自己打开的输出文件，之后的记录不再输出；传入的输出流由调用方关闭"""
+        with self._lock:
+            if self._owns_output and not self.output.closed:
+                self.output.close()
+
+    def __enter__(self) -> "StageProfiler":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @staticmethod
+    def add_arguments(parser) -> None:
+        """为 argparse 解析器添加剖析相关的命令行参数"""
+        parser.add_argument("--profile", action="store_true", help="输出分阶段性能数据（JSON 行）")
+        parser.add_argument("--profile-output", help="JSON 行输出文件，默认输出到标准错误")
+        parser.add_argument("--cprofile-dir", help="为每个顶层阶段保存 cProfile 结果的目录")
+
+    def emit(self, record: dict) -> None:
+        """输出一条 JSON 行记录"""
+        if not self.enabled:
+            return
+        record = {"source": self.source, "ts": round(time.time(), 3), **record}
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            if self.output is not None and self.output.closed:
+                return
+            stream = self.output or sys.stderr
+            stream.write(line + "\n")
+            stream.flush()
+
+    @contextmanager
+    def stage(self, name: str, **extra) -> Iterator[None]:
+        """
+        记录一个阶段的耗时与内存峰值，阶段可以嵌套。
+
+        参数:
+        name (str): 阶段名称。
+        extra: 附加到记录中的字段。
+        """
+        if not self.enabled:
+            yield
+            return
+        main_thread = threading.current_thread() is threading.main_thread()
+        with self._lock:
+            self._active += 1
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracemalloc = True
+            worker_stages = self._worker_stages
+        if main_thread:
+            tracemalloc.reset_peak()
+        frame = {"children_peak": 0}
+        self._stack.append(frame)
+        profile = None
+        if main_thread and self.cprofile_dir and len(self._stack) == 1:
+            profile = cProfile.Profile()
+            profile.enable()
+        clock = time.process_time if main_thread else time.thread_time
+        wall0 = time.perf_counter()
+        cpu0 = clock()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter()-wall0
+            cpu = clock()-cpu0
+            if profile is not None:
+                profile.disable()
+                os.makedirs(self.cprofile_dir, exist_ok=True)
+                profile.dump_stats(os.path.join(self.cprofile_dir, f"{self.source}.{name}.prof"))
+            self._stack.pop()
+            peak = None
+            if main_thread:
+                # 子阶段会重置峰值，因此本阶段峰值取自身与子阶段峰值中的较大者
+                peak = max(tracemalloc.get_traced_memory()[1], frame["children_peak"])
+                if self._stack:
+                    self._stack[-1]["children_peak"] = max(self._stack[-1]["children_peak"], peak)
+                tracemalloc.reset_peak()
+            with self._lock:
+                total = self._totals.setdefault(name, {"count": 0, "wall": 0.0, "cpu": 0.0, "peak": None})
+                total["count"] += 1
+                total["wall"] += wall
+                total["cpu"] += cpu
+                if main_thread:
+                    total["peak"] = max(total["peak"] or 0, peak)
+                    concurrent = self._worker_stages-worker_stages
+                    if concurrent:
+                        extra = {**extra, "concurrent_stages": concurrent}
+                else:
+                    self._worker_stages += 1
+                    extra = {**extra, "thread": threading.current_thread().name}
+            self.emit({
+                "event": "stage",
+                "stage": name,
+                "depth": len(self._stack),
+                "wall_s": round(wall, 6),
+                "cpu_s": round(cpu, 6),
+                "peak_bytes": peak,
+                **extra,
+            })
+            with self._lock:
+                self._active -= 1
+                if not self._active and self._started_tracemalloc:
+                    tracemalloc.stop()
+                    self._started_tracemalloc = False
+
+    def record_artists(self, fig, stage: str = "plot") -> None:
+        """
+        统计图像中各类 matplotlib 图元的数量并输出。
+
+        参数:
+        fig (matplotlib.figure.Figure): 要统计的图像。
+        stage (str): 统计时所处的阶段名称。
+        """
+        if not self.enabled:
+            return
+        counts = Counter(type(artist).__name__ for artist in fig.findobj())
+        with self._lock:
+            self._artists = dict(counts)
+        self.emit({
+            "event": "artists",
+            "stage": stage,
+            "total": sum(counts.values()),
+            "by_type": dict(counts.most_common()),
+        })
+
+    def prometheus_text(self) -> str:
+        """将累计的阶段数据导出为 Prometheus 文本格式"""
+        lines = [
+            "# TYPE ganttknights_stage_runs_total counter",
+            "# TYPE ganttknights_stage_wall_seconds_total counter",
+            "# TYPE ganttknights_stage_cpu_seconds_total counter",
+            "# TYPE ganttknights_stage_peak_bytes gauge",
+            "# TYPE ganttknights_artists gauge",
+        ]
+        with self._lock:
+            for name, total in sorted(self._totals.items()):
+                label = f'{{source="{self.source}",stage="{name}"}}'
+                lines.append(f"ganttknights_stage_runs_total{label} {total['count']}")
+                lines.append(f"ganttknights_stage_wall_seconds_total{label} {total['wall']:.6f}")
+                lines.append(f"ganttknights_stage_cpu_seconds_total{label} {total['cpu']:.6f}")
+                if total["peak"] is not None:
+                    lines.append(f"ganttknights_stage_peak_bytes{label} {total['peak']}")
+            for kind, count in sorted(self._artists.items()):
+                lines.append(f'ganttknights_artists{{source="{self.source}",type="{kind}"}} {count}')
+        return "\n".join(lines)+"\n"
+
+    def serve_metrics(self, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """
+        在后台线程中启动 Prometheus 文本格式的指标端点（/metrics），供长驻进程使用。
+
+        参数:
+        port (int): 监听端口。
+        host (str): 监听地址，默认只监听本机。
+
+        返回:
+        ThreadingHTTPServer: 已启动的服务器，调用 shutdown() 停止。
+        """
+        profiler = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = profiler.prometheus_text().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
@@ -0,0 +1,325 @@
+"""
+活动历史查询。
+
+    python query.py --operator 水月 --desc --limit 1       # 水月最近一次出现在哪个卡池
+    python query.py --name 集成 --during 2025-03           # 与三月重叠的全部集成活动
+    python query.py --type 0 --from 2025-04-01 --to 2025-05-01 --format json
+
+把全部活动数据读入同一张 EventTable 后建立三个索引：
+
+- 名称的三元组（trigram）倒排索引，查询串的全部三元组求交后再核对子串；
+  不足三个字的查询（例如两个字的干员名）直接查长度为一、二的子串倒排表；
+- 六星干员到卡池活动的倒排索引，干员取自 six2csv 拼进名称的部分（【标准池】提丰/黑键）；
+- 时间窗口索引（window_index.WindowIndex），按与时间段重叠筛选。
+
+各条件的结果都是排好序的下标数组，取交集即可，整个历史上的查询在毫秒级完成。
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import re
+import sys
+import time
+import unicodedata
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from event_table import HEADER, EventTable
+from window_index import WindowIndex
+
+DEFAULT_DATA = ["./output.csv", "./所有活动数据.csv"]
+GRAM = 3
+POOL_NAME = re.compile(r"^【(标准池|中坚池|限定池)】(.+)$")
+OPERATOR_SEP = re.compile(r"[/\\、，,]")
+NAT = np.iinfo(np.int64).min
+
+
+def normalize(text: str) -> str:
+    """全角半角统一、忽略大小写，查询串与名称使用同一规则"""
+    return unicodedata.normalize("NFKC", text).casefold()
+
+
+def pool_operators(name: str) -> list[str]:
+    """
+    从卡池活动名称中取出六星干员。
+
+    参数:
+    name (str): 活动名称，例如“【中坚池】水月/空弦”。
+
+    返回:
+    list[str]: 干员名，名称不是 six2csv 生成的卡池格式时为空列表。
+    """
+    match = POOL_NAME.match(name)
+    if not match:
+        return []
+    return [op.strip() for op in OPERATOR_SEP.split(match.group(2)) if op.strip()]
+
+
+def merge_tables(tables: list[EventTable]) -> EventTable:
+    """
+    合并多张活动表，名称与起止时间完全相同的活动只保留第一次出现的一条。
+
+    参数:
+    tables (list[EventTable]): 活动表。
+
+    返回:
+    EventTable: 合并后的活动表。
+    """
+    names, starts, ends, types = [], [], [], []
+    seen = set()
+    for table in tables:
+        for name, start, end, type_ in zip(table.name_list(), table.starts.tolist(), table.ends.tolist(),
+                                           table.types.tolist()):
+            key = (name, start, end)
+            if key in seen:
+                continue
+            seen.add(key)
+            names.append(name)
+            starts.append(start)
+            ends.append(end)
+            types.append(type_)
+    return EventTable.from_rows(names, np.array(starts, dtype=np.int64).view("datetime64[s]"),
+                                np.array(ends, dtype=np.int64).view("datetime64[s]"), types)
+
+
+class NameIndex:
+    """名称的 n 元组倒排索引，倒排表为升序的下标数组"""
+
+    def __init__(self, names: list[str], gram: int = GRAM):
+        """
+        参数:
+        names (list[str]): 活动名称。
+        gram (int): 元组长度，同时索引所有更短的子串。
+        """
+        self.gram = gram
+        self.names = [normalize(name) for name in names]
+        postings: dict[str, list[int]] = defaultdict(list)
+        for i, name in enumerate(self.names):
+            grams = {name[j:j+n] for n in range(1, gram+1) for j in range(len(name)-n+1)}
+            for g in grams:
+                postings[g].append(i)
+        self.postings = {g: np.array(ids, dtype=np.int64) for g, ids in postings.items()}
+
+    def search(self, text: str) -> np.ndarray:
+        """
+        查询名称中含有 text 的活动。
+
+        参数:
+        text (str): 子串。
+
+        返回:
+        np.ndarray: 升序的下标。
+        """
+        text = normalize(text)
+        empty = np.empty(0, dtype=np.int64)
+        if not text:
+            return np.arange(len(self.names), dtype=np.int64)
+        if len(text) <= self.gram:
+            return self.postings.get(text, empty)
+        candidates = None
+        # 先用最短的倒排表求交，候选集合尽快缩小
+        lists = sorted((self.postings.get(text[j:j+self.gram], empty) for j in range(len(text)-self.gram+1)),
+                       key=len)
+        for ids in lists:
+            candidates = ids if candidates is None else np.intersect1d(candidates, ids, assume_unique=True)
+            if len(candidates) == 0:
+                return empty
+        # 三元组都出现不代表按顺序相连，最后核对一次子串
+        return candidates[[text in self.names[i] for i in candidates]]
+
+
+class EventIndex:
+    """活动历史及其名称、干员与时间窗口索引"""
+
+    def __init__(self, events: EventTable):
+        """
+        参数:
+        events (EventTable): 全部活动。
+        """
+        self.events = events
+        self.names = events.name_list()
+        self.name_index = NameIndex(self.names)
+        operators: dict[str, list[int]] = defaultdict(list)
+        self.operators: list[list[str]] = []
+        for i, name in enumerate(self.names):
+            ops = pool_operators(name) if events.types[i] == 0 else []
+            self.operators.append(ops)
+            for op in ops:
+                operators[normalize(op)].append(i)
+        self.operator_index = {op: np.array(ids, dtype=np.int64) for op, ids in operators.items()}
+        # 开始时间缺失的活动视为很早开始，结束时间缺失的活动视为一直持续（由 WindowIndex 处理）
+        self.window_index = WindowIndex(events.starts, events.ends)
+
+    @classmethod
+    def load(cls, paths: list[str]) -> "EventIndex":
+        """读取并合并若干活动数据文件（同名快照较新时直接映射快照），不存在的文件跳过"""
+        return cls(merge_tables([EventTable.load(path) for path in paths if os.path.exists(path)]))
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def query(
+        self,
+        name: str | None = None,
+        operator: str | None = None,
+        types: list[int] | None = None,
+        lo: datetime | None = None,
+        hi: datetime | None = None,
+        desc: bool = False,
+        limit: int | None = None,
+    ) -> np.ndarray:
+        """
+        按条件查询活动，条件为 None 时不筛选。
+
+        参数:
+        name (str | None): 名称中含有的子串。
+        operator (str | None): 卡池中的六星干员（完整的干员名）。
+        types (list[int] | None): 类型。
+        lo (datetime | None): 时间段起点，与 [lo, hi) 重叠的活动命中。
+        hi (datetime | None): 时间段终点。
+        desc (bool): 是否按开始时间降序排列。
+        limit (int | None): 最多返回的条数。
+
+        返回:
+        np.ndarray: 命中活动的下标，按开始时间排序。
+        """
+        hits = None
+
+        def narrow(ids: np.ndarray) -> None:
+            nonlocal hits
+            hits = np.sort(ids) if hits is None else np.intersect1d(hits, ids)
+
+        if name:
+            narrow(self.name_index.search(name))
+        if operator:
+            narrow(self.operator_index.get(normalize(operator), np.empty(0, dtype=np.int64)))
+        if lo is not None or hi is not None:
+            lo_s = NAT+1 if lo is None else int(np.datetime64(lo, "s").astype(np.int64))
+            hi_s = np.iinfo(np.int64).max if hi is None else int(np.datetime64(hi, "s").astype(np.int64))
+            narrow(self.window_index.query(lo_s, hi_s))
+        if hits is None:
+            hits = np.arange(len(self), dtype=np.int64)
+        if types is not None:
+            hits = hits[np.isin(self.events.types[hits], types)]
+        order = np.argsort(self.events.starts[hits], kind="stable")
+        hits = hits[order[::-1] if desc else order]
+        return hits[:limit] if limit is not None else hits
+
+    def records(self, idx: np.ndarray) -> list[dict]:
+        """把下标转换为输出用的记录，列与活动数据 CSV 相同，另加六星干员"""
+        def fmt(value: int) -> str:
+            return "" if value == NAT else str(np.datetime64(value, "s")).replace("T", " ")
+
+        return [
+            {
+                HEADER[0]: self.names[i],
+                HEADER[1]: fmt(int(self.events.starts[i])),
+                HEADER[2]: fmt(int(self.events.ends[i])),
+                HEADER[3]: int(self.events.types[i]),
+                "六星干员": self.operators[i],
+            }
+            for i in idx
+        ]
+
+
+def format_records(records: list[dict], fmt: str = "csv") -> str:
+    """
+    把查询结果格式化为 CSV 或 JSON 文本。
+
+    参数:
+    records (list[dict]): EventIndex.records 的结果。
+    fmt (str): csv 或 json。
+
+    返回:
+    str: 文本。
+    """
+    if fmt == "json":
+        return json.dumps(records, ensure_ascii=False, indent=1)+"\n"
+    out = io.StringIO()
+    writer = csv.writer(out, lineterminator="\n")
+    writer.writerow(HEADER+["六星干员"])
+    for r in records:
+        writer.writerow([r[HEADER[0]], r[HEADER[1]], r[HEADER[2]], r[HEADER[3]], "/".join(r["六星干员"])])
+    return out.getvalue()
+
+
+def parse_period(text: str, end: bool = False) -> datetime:
+    """
+    解析 2025-03、2025-03-15 或 2025-03-15 12:00 形式的时间。
+
+    参数:
+    text (str): 时间文本。
+    end (bool): 作为终点时，只给出月份或日期表示包含整个月或整天。
+
+    返回:
+    datetime: 时间。
+    """
+    for pattern, step in [("%Y-%m", "month"), ("%Y-%m-%d", "day"), ("%Y-%m-%d %H:%M", None)]:
+        try:
+            value = datetime.strptime(text, pattern)
+        except ValueError:
+            continue
+        if end and step == "day":
+            value += timedelta(days=1)
+        elif end and step == "month":
+            value = value.replace(year=value.year+value.month // 12, month=value.month % 12+1)
+        return value
+    raise ValueError(f"无法解析时间：{text}")
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    """
+    解析命令行参数，把 --from、--to 或 --during 换算为时间段 lo、hi。
+
+    参数:
+    argv (list[str] | None): 命令行参数，None 表示 sys.argv。
+
+    返回:
+    argparse.Namespace: 参数，lo 与 hi 为 datetime 或 None。
+    """
+    parser = argparse.ArgumentParser(description="查询活动历史")
+    parser.add_argument("--data", action="append", help=f"活动数据文件，可重复，默认为 {' '.join(DEFAULT_DATA)}")
+    parser.add_argument("--name", help="名称中含有的文字")
+    parser.add_argument("--operator", help="卡池中的六星干员")
+    parser.add_argument("--type", type=int, action="append", dest="types", help="类型，可重复")
+    parser.add_argument("--from", dest="lo", help="时间段起点，例如 2025-03-01")
+    parser.add_argument("--to", dest="hi", help="时间段终点（包含当天或当月），例如 2025-03-31")
+    parser.add_argument("--during", help="与某月或某天重叠，例如 2025-03")
+    parser.add_argument("--desc", action="store_true", help="按开始时间降序排列")
+    parser.add_argument("--limit", type=int, help="最多输出的条数")
+    parser.add_argument("--format", choices=["csv", "json"], default="csv", help="输出格式")
+    parser.add_argument("--timing", action="store_true", help="在标准错误中输出读取、建索引与查询的用时")
+    args = parser.parse_args(argv)
+
+    if args.during and (args.lo or args.hi):
+        parser.error("--during 不能与 --from、--to 同时使用")
+    try:
+        if args.during:
+            args.lo, args.hi = parse_period(args.during), parse_period(args.during, end=True)
+        else:
+            args.lo = parse_period(args.lo) if args.lo else None
+            args.hi = parse_period(args.hi, end=True) if args.hi else None
+    except ValueError as e:
+        parser.error(str(e))
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    t0 = time.perf_counter()
+    events = merge_tables([EventTable.load(p) for p in args.data or DEFAULT_DATA if os.path.exists(p)])
+    t1 = time.perf_counter()
+    index = EventIndex(events)
+    t2 = time.perf_counter()
+    hits = index.query(args.name, args.operator, args.types, args.lo, args.hi, args.desc, args.limit)
+    t3 = time.perf_counter()
+    sys.stdout.write(format_records(index.records(hits), args.format))
+    if args.timing:
+        print(f"{len(index)} 条活动，命中 {len(hits)} 条；读取 {(t1-t0)*1000:.1f} ms，"
+              f"建索引 {(t2-t1)*1000:.1f} ms，查询 {(t3-t2)*1000:.2f} ms", file=sys.stderr)
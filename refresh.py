@@ -0,0 +1,284 @@
+"""
+数据源刷新调度。
+
+每个数据源（森空岛卡池、官网活动预告）各有一个有效期（TTL），刷新记录保存在
+.refresh_state.json 中：数据仍在有效期内时跳过，刷新失败后按带随机抖动的指数退避推迟下次尝试。
+整个调度过程持有一个单飞锁（.refresh.lock），cron 与守护进程重叠触发时不会同时启动两个浏览器会话。
+
+用法：
+    python refresh.py                 # 刷新到期的数据源
+    python refresh.py --force skland  # 无视有效期立即刷新
+    python refresh.py --loop 3600     # 以守护进程方式每小时检查一次
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+
+from profiling import StageProfiler
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+HOUR = 3600
+DAY = 24*HOUR
+STATE_PATH = ".refresh_state.json"
+LOCK_PATH = ".refresh.lock"
+
+
+@dataclass
+class Source:
+    """一个数据源：刷新命令、有效期与刷新成功后需要运行的后续命令"""
+
+    name: str
+    command: list[str]
+    ttl: float
+    after: list[list[str]] = field(default_factory=list)
+    timeout: float = 10*60
+
+
+# 卡池两周轮换一次、森空岛提前约一周公布；官网活动预告大约每周一次
+SOURCES = {
+    "skland": Source(
+        "skland",
+        [sys.executable, "./爬虫/test2.py"],
+        ttl=3*DAY,
+        after=[[sys.executable, "./爬虫/six2csv.py"]],
+    ),
+    "news": Source("news", [sys.executable, "./爬虫/get_theme_json.py"], ttl=2*DAY),
+}
+
+
+@dataclass
+class Freshness:
+    """一个数据源的刷新记录"""
+
+    last_success: float = 0.0
+    last_attempt: float = 0.0
+    failures: int = 0
+    next_attempt: float = 0.0
+    last_error: str = ""
+
+
+def load_state(path: str = STATE_PATH) -> dict[str, Freshness]:
+    """读取刷新记录，文件不存在或损坏时返回空记录"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return {name: Freshness(**record) for name, record in json.load(f).items()}
+    except (FileNotFoundError, ValueError, TypeError):
+        return {}
+
+
+def save_state(state: dict[str, Freshness], path: str = STATE_PATH) -> None:
+    """原子地写回刷新记录"""
+    tmp_path = path+".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({name: asdict(record) for name, record in state.items()}, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def backoff(failures: int, base: float = 5*60, cap: float = DAY) -> float:
+    """
+    第 failures 次连续失败后的等待时间：指数增长，封顶 cap，并在 [0.5, 1] 倍之间随机抖动，
+    避免多个数据源或多台机器在同一时刻重试。
+    """
+    return min(cap, base*2**(failures-1))*random.uniform(0.5, 1.0)
+
+
+def is_due(source: Source, record: Freshness, now: float) -> bool:
+    """数据已过有效期且不在退避等待中"""
+    return now-record.last_success >= source.ttl and now >= record.next_attempt
+
+
+class SingleFlightLock:
+    """
+    基于操作系统文件锁（fcntl.flock / msvcrt.locking）的进程锁，锁文件记录持有者的 pid 与时间。
+    锁属于打开锁文件的进程，持有者退出（包括被强制结束）时由系统释放，不会留下需要接管的残留锁；
+    锁文件本身一直保留，删除它会让后来的进程锁住另一个文件。
+    """
+
+    def __init__(self, path: str = LOCK_PATH):
+        self.path = path
+        self._file = None
+
+    @property
+    def held(self) -> bool:
+        return self._file is not None
+
+    def acquire(self) -> bool:
+        # 追加模式打开，抢锁失败时不会清空持有者写下的信息
+        f = open(self.path, "a+")
+        try:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            f.close()
+            return False
+        f.truncate(0)
+        f.write(f"{os.getpid()} {time.time()}")
+        f.flush()
+        self._file = f
+        return True
+
+    def release(self) -> None:
+        if self._file is None:
+            return
+        f, self._file = self._file, None
+        try:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            f.close()
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+def refresh_source(source: Source, profiler: StageProfiler) -> str | None:
+    """
+    运行数据源的刷新命令及后续命令。
+
+    返回:
+    str | None: 失败原因，成功时为 None。
+    """
+    for command in [source.command]+source.after:
+        with profiler.stage("refresh_command", source=source.name, command=" ".join(command[1:])):
+            try:
+                result = subprocess.run(command, timeout=source.timeout)
+            except (OSError, subprocess.TimeoutExpired) as e:
+                return str(e)
+        if result.returncode != 0:
+            return f"{' '.join(command[1:])} 退出码 {result.returncode}"
+    return None
+
+
+def run_once(
+    sources: dict[str, Source],
+    force: list[str] | None = None,
+    profiler: StageProfiler | None = None,
+    state_path: str = STATE_PATH,
+    lock_path: str = LOCK_PATH,
+) -> list[str]:
+    """
+    刷新所有到期（或被强制刷新）的数据源。
+
+    参数:
+    sources (dict[str, Source]): 数据源。
+    force (list[str] | None): 无视有效期与退避立即刷新的数据源名。
+    profiler (StageProfiler | None): 性能剖析器。
+    state_path (str): 刷新记录路径。
+    lock_path (str): 单飞锁路径。
+
+    返回:
+    list[str]: 本次刷新成功的数据源名。
+    """
+    profiler = profiler or StageProfiler()
+    force = force or []
+    lock = SingleFlightLock(lock_path)
+    if not lock.acquire():
+        print("另一个刷新进程正在运行，本次跳过")
+        return []
+    refreshed = []
+    try:
+        state = load_state(state_path)
+        for name, source in sources.items():
+            record = state.setdefault(name, Freshness())
+            now = time.time()
+            if name not in force and not is_due(source, record, now):
+                if now < record.next_attempt:
+                    print(f"[{name}] 上次刷新失败，{(record.next_attempt-now)/60:.0f} 分钟后重试")
+                else:
+                    print(f"[{name}] 数据仍有效，{(record.last_success+source.ttl-now)/HOUR:.1f} 小时后再检查")
+                continue
+            record.last_attempt = now
+            with profiler.stage("refresh", source=name):
+                error = refresh_source(source, profiler)
+            if error is None:
+                record.last_success, record.failures, record.next_attempt, record.last_error = time.time(), 0, 0.0, ""
+                refreshed.append(name)
+                print(f"[{name}] 刷新完成")
+            else:
+                record.failures += 1
+                record.next_attempt = time.time()+backoff(record.failures, cap=source.ttl)
+                record.last_error = error
+                print(f"[{name}] 刷新失败（第 {record.failures} 次）：{error}，"
+                      f"{(record.next_attempt-time.time())/60:.0f} 分钟后重试")
+            save_state(state, state_path)
+    finally:
+        lock.release()
+    return refreshed
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    """
+    解析命令行参数并校验数据源名称。
+
+    参数:
+    argv (list[str] | None): 命令行参数，None 表示 sys.argv。
+
+    返回:
+    argparse.Namespace: force 为需要立即刷新的数据源列表，ttl 为数据源到有效期（秒）的映射。
+    """
+    parser = argparse.ArgumentParser(description="按有效期刷新数据源")
+    parser.add_argument("--force", nargs="*", metavar="SOURCE", help="立即刷新的数据源，不给名称时刷新全部")
+    parser.add_argument("--ttl", nargs="*", default=[], metavar="SOURCE=HOURS", help="覆盖数据源的有效期（小时）")
+    parser.add_argument("--loop", type=float, metavar="SECONDS", help="以守护进程方式每隔若干秒检查一次")
+    parser.add_argument("--render", action="store_true", help="有数据源刷新后重新绘制甘特图")
+    StageProfiler.add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    def check(name: str) -> str:
+        if name not in SOURCES:
+            parser.error(f"未知的数据源：{name}（可选：{', '.join(SOURCES)}）")
+        return name
+
+    # 未给出 --force 时为 None，只给出 --force 时为空列表
+    if args.force is None:
+        args.force = []
+    else:
+        args.force = [check(name) for name in args.force] or list(SOURCES)
+    ttl = {}
+    for item in args.ttl:
+        name, sep, hours = item.partition("=")
+        try:
+            value = float(hours)
+        except ValueError:
+            value = -1.0
+        if not sep or not value > 0:
+            parser.error(f"--ttl 的格式应为 SOURCE=HOURS，小时数为正数：{item}")
+        ttl[check(name)] = value*HOUR
+    args.ttl = ttl
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    profiler = StageProfiler.from_args(args, source="refresh")
+
+    for name, seconds in args.ttl.items():
+        SOURCES[name].ttl = seconds
+    force = args.force
+    while True:
+        if run_once(SOURCES, force, profiler) and args.render:
+            subprocess.run([sys.executable, "./main.py"])
+        if not args.loop:
+            break
+        force = []
+        time.sleep(args.loop)
@@ -0,0 +1,6 @@
+# 打包版运行时钩子：使用随程序分发的 matplotlib 配置目录，其中有构建时生成的字体缓存，
+# 首次启动不必扫描系统字体。已设置 MPLCONFIGDIR 时保持不变。
+import os
+import sys
+
+os.environ.setdefault("MPLCONFIGDIR", os.path.join(sys._MEIPASS, "mplconfig"))
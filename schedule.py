@@ -0,0 +1,182 @@
+"""
+排期简写展开。
+
+活动数据的结束时间一栏除了完整日期外还可以写：
+- 天数简写（例如 14）：结束时间 = 开始时间 + 天数，开始时间不是 4 点时提前 12 小时，使其在 4 点结束；
+- 排期模板名（例如 大型ss）：按 README 中的排期经验展开为商店、各层关卡等全部子活动。
+
+展开对整列一次完成，可以一次性为规划场景生成成千上万条预测活动。
+展开本身只用 NumPy 与 dateutil，不打包 pandas 的打包版也能读取含简写的活动数据；
+只有 expand_schedule 这一 DataFrame 接口需要 pandas。
+"""
+
+import re
+from datetime import datetime
+from typing import TYPE_CHECKING, Sequence
+
+import numpy as np
+from dateutil.parser import parse
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+DAY = np.timedelta64(1, "D")
+HOUR = np.timedelta64(1, "h")
+NAT = np.datetime64("NaT", "s")
+DAYS = re.compile(r"\d{1,3}")
+
+# 模板名 -> ((子活动后缀, 开始天数, 结束天数), ...)
+TEMPLATES: dict[str, tuple[tuple[str, int, int], ...]] = {
+    "普通ss": (("商店", 0, 21), ("一层", 0, 14), ("二层", 7, 14)),
+    "大型ss": (("商店", 0, 28), ("一层", 0, 21), ("二层", 7, 21), ("三层", 14, 21)),
+    "SS复刻": (("商店", 0, 14), ("作战", 0, 10)),
+    "卡池": (("", 0, 14),),
+}
+
+
+def parse_date(text: str) -> datetime | None:
+    """解析一个日期字符串，无法解析时返回 None"""
+    try:
+        return parse(text)
+    except (ValueError, OverflowError):
+        return None
+
+
+def _to_datetime64(value) -> np.datetime64:
+    """把一个非字符串的日期值转换为 datetime64[s]，None、NaN 与 NaT 记为 NaT"""
+    if value is None or value != value:
+        return NAT
+    return np.datetime64(value, "s")
+
+
+def parse_dates(values) -> np.ndarray:
+    """
+    把日期字符串解析为 datetime64[s]，相同的字符串只解析一次，空值与无法解析的值记为 NaT。
+
+    参数:
+    values (Iterable): 日期字符串（允许 2024-11-1 16h 这样的简写）或 datetime。
+
+    返回:
+    np.ndarray: datetime64[s] 数组。
+    """
+    lookup: dict[str, np.datetime64] = {}
+    out = []
+    for value in values:
+        if not isinstance(value, str):
+            out.append(_to_datetime64(value))
+            continue
+        text = value.strip()
+        if text not in lookup:
+            parsed = parse_date(text) if text else None
+            lookup[text] = NAT if parsed is None else np.datetime64(parsed.replace(tzinfo=None), "s")
+        out.append(lookup[text])
+    return np.array(out, dtype="datetime64[s]")
+
+
+def shorthand_end(starts: np.ndarray, days: np.ndarray) -> np.ndarray:
+    """
+    由开始时间与天数计算结束时间：开始时间不是 4 点时提前 12 小时。
+
+    参数:
+    starts (np.ndarray): 开始时间（datetime64）。
+    days (np.ndarray): 持续天数。
+
+    返回:
+    np.ndarray: 结束时间（datetime64[s]）。
+    """
+    starts = np.asarray(starts, dtype="datetime64[s]")
+    hour = (starts-starts.astype("datetime64[D]")) // HOUR
+    return starts+np.asarray(days, dtype=np.int64)*DAY-np.where(hour != 4, 12, 0)*HOUR
+
+
+def expand_columns(
+    names: Sequence[str], start_values: Sequence, end_values: Sequence
+) -> tuple[np.ndarray, list[str], np.ndarray, np.ndarray]:
+    """
+    解析开始时间，并把结束时间一栏中的天数简写与排期模板展开，不依赖 pandas。
+
+    参数:
+    names (Sequence[str]): 名称。
+    start_values (Sequence): 开始时间。
+    end_values (Sequence): 结束时间、天数或模板名。
+
+    返回:
+    tuple[np.ndarray, list[str], np.ndarray, np.ndarray]: 每条展开结果的源行号、名称（源名称加子活动后缀）、
+    开始时间与结束时间（datetime64[s]），子活动按源行顺序排列。
+    """
+    starts = parse_dates(start_values)
+    end_values = np.asarray(end_values, dtype=object)
+    raw = [v.strip() if isinstance(v, str) else None for v in end_values]
+    is_days = np.array([t is not None and DAYS.fullmatch(t) is not None for t in raw], dtype=bool)
+    is_template = np.array([t in TEMPLATES for t in raw], dtype=bool)
+    is_date = ~(is_days | is_template)
+
+    ends = np.full(len(raw), NAT, dtype="datetime64[s]")
+    ends[is_date] = parse_dates(end_values[is_date])
+    ends[is_days] = shorthand_end(starts[is_days], [int(t) for t, d in zip(raw, is_days) if d])
+
+    if not is_template.any():
+        return np.arange(len(raw)), list(names), starts, ends
+
+    # 普通行与各模板的子活动分别向量化生成，再按源行号稳定排序
+    template = np.array([t if m else "" for t, m in zip(raw, is_template)], dtype=object)
+    source = [np.flatnonzero(~is_template)]
+    suffix = [np.full(len(source[0]), "", dtype=object)]
+    sub_starts = [starts[source[0]]]
+    sub_ends = [ends[source[0]]]
+    for name, parts in TEMPLATES.items():
+        rows = np.flatnonzero(template == name)
+        if len(rows) == 0:
+            continue
+        k = len(parts)
+        rep = np.repeat(rows, k)
+        first = np.tile([p[1] for p in parts], len(rows))
+        last = np.tile([p[2] for p in parts], len(rows))
+        source.append(rep)
+        suffix.append(np.tile(np.array([p[0] for p in parts], dtype=object), len(rows)))
+        sub_starts.append(starts[rep]+first*DAY)
+        sub_ends.append(shorthand_end(starts[rep], last))
+
+    source = np.concatenate(source)
+    order = np.argsort(source, kind="stable")
+    source = source[order]
+    suffix = np.concatenate(suffix)[order]
+    return (source, [str(names[i])+s for i, s in zip(source, suffix)], np.concatenate(sub_starts)[order],
+            np.concatenate(sub_ends)[order])
+
+
+def expand_schedule(df: "pd.DataFrame") -> "pd.DataFrame":
+    """
+    解析开始时间，并把结束时间一栏中的天数简写与排期模板展开。
+
+    前三列依次视为名称、开始时间、结束时间，其余列原样复制到展开出的子活动上；
+    子活动按源行顺序排列，名称为源名称加子活动后缀。
+
+    参数:
+    df (pd.DataFrame): 原始活动数据。
+
+    返回:
+    pd.DataFrame: 开始、结束时间均为 datetime64[s] 的活动数据。
+    """
+    name_col, start_col, end_col = df.columns[:3]
+    source, names, starts, ends = expand_columns(df[name_col].tolist(), df[start_col].to_numpy(dtype=object),
+                                                 df[end_col].to_numpy(dtype=object))
+    out = df.iloc[source].reset_index(drop=True)
+    out[name_col] = names
+    out[start_col] = starts
+    out[end_col] = ends
+    return out
+
+
+if __name__ == "__main__":
+    import argparse
+
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description="展开活动数据中的天数简写与排期模板")
+    parser.add_argument("input", help="输入 CSV")
+    parser.add_argument("output", nargs="?", help="输出 CSV，默认覆盖输入文件")
+    args = parser.parse_args()
+    expanded = expand_schedule(pd.read_csv(args.input, encoding="utf-8-sig"))
+    expanded.to_csv(args.output or args.input, index=False)
+    print(f"展开后共 {len(expanded)} 条活动")
@@ -0,0 +1,394 @@
+"""
+局域网甘特图服务。
+
+在 main 的绘图核心之上提供一个小型 HTTP 服务，桌面、壁纸引擎与看板等多台设备直接请求图片，
+不必各自运行一份脚本：
+
+    GET /gantt?date=2025-05-12&before=3&after=22&theme=theme-4.jpg&texture=神秘素材.jpg&w=1600&h=900&format=webp
+    GET /themes    可用的背景图片与纹理
+    GET /metrics   Prometheus 文本格式的分阶段耗时与缓存命中数
+
+参数都可以省略：日期默认为今天，窗口与主程序相同，主题取背景图与纹理目录中的第一个文件，
+尺寸为 1600×900。同一组参数（连同数据文件的修改时间）确定一个变体：编码后的图片按字节数上限
+保存在内存 LRU 缓存中，带 ETag，客户端用 If-None-Match 复查时未变化则返回 304；
+多个请求同时要求同一个尚未缓存的变体时只绘制一次，其余请求等待同一结果。
+裁剪后的背景图片、纹理与静态图层同样按字节数上限缓存。绘制出错时返回 500
+（数据文件不可用时为 503），调用栈输出到标准错误。
+"""
+
+import hashlib
+import json
+import os
+import sys
+import threading
+import traceback
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Hashable
+from urllib.parse import parse_qs, urlparse
+
+from calendar_axis import WINDOW_BEFORE_DAYS
+from encoding import FORMATS, encode_bytes
+from layers import LayerCache
+from profiling import StageProfiler
+
+BACKGROUND_DIR = Path("./背景图")
+TEXTURE_DIR = Path("./纹理")
+MIME_TYPES = {"png": "image/png", "webp": "image/webp"}
+MAX_SIDE = 7680
+
+
+@dataclass(frozen=True)
+class Variant:
+    """一个图片变体，同时用作缓存键"""
+
+    date: datetime
+    before: int
+    after: int | None
+    background: str
+    texture: str
+    width: int
+    height: int
+    format: str
+    types: tuple[int, ...] | None
+    keyword: str | None
+    pack: bool
+    data_mtime: float  # 数据文件更新后旧的缓存自然失效
+
+
+@dataclass
+class CacheEntry:
+    """缓存中一张编码好的图片"""
+
+    body: bytes
+    etag: str
+    content_type: str
+
+
+class ImageCache:
+    """按总字节数限制容量的线程安全 LRU 缓存"""
+
+    def __init__(self, max_bytes: int, sizeof: Callable[[Any], int] | None = None):
+        """
+        参数:
+        max_bytes (int): 容量（字节）。
+        sizeof (Callable | None): 每项占用的字节数，默认为编码后图片的长度。
+        """
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof or (lambda entry: len(entry.body))
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Hashable, Any] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: Hashable, entry: Any) -> None:
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= self.sizeof(old)
+            if self.sizeof(entry) > self.max_bytes:
+                return
+            self._entries[key] = entry
+            self.size += self.sizeof(entry)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= self.sizeof(evicted)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def list_themes() -> dict[str, list[str]]:
+    """背景图目录与纹理目录中的文件名"""
+    return {
+        "backgrounds": sorted(p.name for p in BACKGROUND_DIR.iterdir() if p.is_file()),
+        "textures": sorted(p.name for p in TEXTURE_DIR.iterdir() if p.is_file()),
+    }
+
+
+def theme_assets(background: str, texture: str, size: tuple[int, int]):
+    """
+    读取并处理一组背景图片与纹理，提取主要颜色。
+
+    figimage 只显示贴在画布左下角的 size 大小的部分，处理后裁剪到这一部分再缓存，
+    不必为每个主题常驻一份原图大小（最大 6932×4680）的数组，绘制结果不变。
+
+    参数:
+    background (str): 背景图片文件名。
+    texture (str): 纹理文件名。
+    size (tuple[int, int]): 画布的宽与高（像素）。
+
+    返回:
+    tuple[np.ndarray, np.ndarray, list[str]]: 背景图片、纹理与主要颜色。
+    """
+    from asset_cache import crop_visible
+    from main import extract_main_colors, load_background_image, load_texture
+
+    background_path = str(BACKGROUND_DIR / background)
+    return (crop_visible(load_background_image(background_path), size),
+            crop_visible(load_texture(str(TEXTURE_DIR / texture)), size),
+            extract_main_colors(background_path, 10))
+
+
+def parse_variant(query: dict[str, list[str]], data_path: str) -> Variant:
+    """
+    由查询参数得到变体。
+
+    参数:
+    query (dict[str, list[str]]): parse_qs 的结果。
+    data_path (str): 活动数据文件。
+
+    返回:
+    Variant: 变体。
+
+    Raises:
+        ValueError: 参数不合法时抛出，错误信息会返回给客户端。
+    """
+    def arg(name: str, default=None):
+        return query.get(name, [default])[-1]
+
+    themes = list_themes()
+    background = arg("theme", themes["backgrounds"][0])
+    texture = arg("texture", themes["textures"][0])
+    if background not in themes["backgrounds"]:
+        raise ValueError(f"未知的主题：{background}")
+    if texture not in themes["textures"]:
+        raise ValueError(f"未知的纹理：{texture}")
+    fmt = arg("format", "png")
+    if fmt not in FORMATS:
+        raise ValueError(f"未知的输出格式 {fmt}，可选：{', '.join(FORMATS)}")
+    width, height = int(arg("w", 1600)), int(arg("h", 900))
+    if not (320 <= width <= MAX_SIDE and 180 <= height <= MAX_SIDE):
+        raise ValueError(f"尺寸应在 320×180 到 {MAX_SIDE}×{MAX_SIDE} 之间")
+    date = datetime.fromisoformat(arg("date")) if arg("date") else datetime.now()
+    before = int(arg("before", WINDOW_BEFORE_DAYS))
+    after = int(arg("after")) if arg("after") is not None else None
+    if not 0 <= before <= 366 or (after is not None and not 1 <= after <= 366):
+        raise ValueError("before 应在 0 到 366 天之间，after 应在 1 到 366 天之间")
+    types = tuple(int(t) for t in arg("types").split(",")) if arg("types") else None
+    return Variant(
+        date.replace(hour=0, minute=0, second=0, microsecond=0), before, after, background, texture,
+        width, height, fmt, types, arg("keyword") or None, arg("pack", "0") in ("1", "true"),
+        os.path.getmtime(data_path),
+    )
+
+
+class GanttService:
+    """渲染、缓存与合并请求"""
+
+    def __init__(self, data_path: str = "./output.csv", cache_bytes: int = 64 << 20, workers: int = 2,
+                 profiler: StageProfiler | None = None, asset_bytes: int = 128 << 20, layer_bytes: int = 256 << 20):
+        """
+        参数:
+        data_path (str): 活动数据文件。
+        cache_bytes (int): 图片缓存的容量（字节）。
+        workers (int): 同时进行的绘制数，多余的请求排队。
+        profiler (StageProfiler | None): 性能剖析器。
+        asset_bytes (int): 处理好的背景图片与纹理的缓存容量（字节）。
+        layer_bytes (int): 静态图层缓存的容量（字节）。
+        """
+        self.data_path = data_path
+        self.cache = ImageCache(cache_bytes)
+        self.assets = ImageCache(asset_bytes, sizeof=lambda assets: assets[0].nbytes+assets[1].nbytes)
+        self.profiler = profiler or StageProfiler()
+        self.coalesced = 0
+        # 数据更新只使图片缓存失效，窗口、主题与尺寸相同的变体沿用同一个静态图层
+        self.layers = LayerCache(layer_bytes)
+        self._pool = ThreadPoolExecutor(max_workers=workers)
+        self._inflight: dict[Variant, Future] = {}
+        self._lock = threading.Lock()
+
+    def render(self, variant: Variant) -> CacheEntry:
+        """绘制一个变体并编码"""
+        from main import preprocess_data, time_window
+
+        left_border, right_border = time_window(variant.date, variant.before, variant.after)
+        with self.profiler.stage("serve_render", format=variant.format):
+            events = preprocess_data(None, self.data_path, variant.date, left_border, right_border,
+                                     list(variant.types) if variant.types else None, variant.keyword)
+            key = (variant.background, variant.texture, variant.width, variant.height)
+            assets = self.assets.get(key)
+            if assets is None:
+                assets = theme_assets(variant.background, variant.texture, (variant.width, variant.height))
+                self.assets.put(key, assets)
+            img, tw, color = assets
+            layer = self.layers.get((variant.background, variant.texture), left_border, right_border, img, tw,
+                                    figsize=(variant.width/100, variant.height/100), today=variant.date)
+            with layer.lock:
+                canvas = layer.render(events, color, variant.pack, self.profiler)
+                with self.profiler.stage("encode", format=variant.format):
+                    body = encode_bytes(canvas, variant.format)
+        etag = '"'+hashlib.blake2b(body, digest_size=16).hexdigest()+'"'
+        return CacheEntry(body, etag, MIME_TYPES[FORMATS[variant.format][0]])
+
+    def get(self, variant: Variant) -> tuple[CacheEntry, str]:
+        """
+        取得变体的图片。
+
+        返回:
+        tuple[CacheEntry, str]: 图片与来源（hit 命中缓存、miss 本次绘制、coalesced 等待了其他请求的绘制）。
+        """
+        # 查缓存与登记绘制在同一把锁内进行：绘制任务先写入缓存再注销，之后的请求要么命中缓存，要么等待同一个任务
+        with self._lock:
+            entry = self.cache.get(variant)
+            if entry is not None:
+                return entry, "hit"
+            future = self._inflight.get(variant)
+            owner = future is None
+            if owner:
+                future = self._pool.submit(self._render_and_cache, variant)
+                self._inflight[variant] = future
+            else:
+                self.coalesced += 1
+        return future.result(), "miss" if owner else "coalesced"
+
+    def _render_and_cache(self, variant: Variant) -> CacheEntry:
+        """在绘制任务内写入缓存并注销，等待者被唤醒前缓存已经可用"""
+        try:
+            entry = self.render(variant)
+            self.cache.put(variant, entry)
+            return entry
+        finally:
+            with self._lock:
+                self._inflight.pop(variant, None)
+
+    def metrics_text(self) -> str:
+        """剖析器的指标加上缓存统计"""
+        lines = [
+            f"ganttknights_cache_hits_total {self.cache.hits}",
+            f"ganttknights_cache_misses_total {self.cache.misses}",
+            f"ganttknights_cache_coalesced_total {self.coalesced}",
+            f"ganttknights_cache_entries {len(self.cache)}",
+            f"ganttknights_cache_bytes {self.cache.size}",
+            f"ganttknights_layer_hits_total {self.layers.hits}",
+            f"ganttknights_layer_misses_total {self.layers.misses}",
+            f"ganttknights_layers {len(self.layers)}",
+            f"ganttknights_layer_bytes {self.layers.size}",
+            f"ganttknights_asset_entries {len(self.assets)}",
+            f"ganttknights_asset_bytes {self.assets.size}",
+        ]
+        return self.profiler.prometheus_text()+"\n".join(lines)+"\n"
+
+
+def make_handler(service: GanttService):
+    """生成绑定到 service 的请求处理类"""
+
+    class GanttHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send(self, status: int, body: bytes, content_type: str, headers: dict | None = None):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            if self.command != "HEAD":
+                self.wfile.write(body)
+
+        def _fail(self, status: int, message: str):
+            """记录当前异常的调用栈，返回错误状态码"""
+            print(f"{self.command} {self.path} -> {status}", file=sys.stderr)
+            traceback.print_exc()
+            self._send(status, f"{message}\n".encode("utf-8"), "text/plain; charset=utf-8")
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == "/themes":
+                self._send(200, json.dumps(list_themes(), ensure_ascii=False).encode("utf-8"),
+                           "application/json; charset=utf-8")
+                return
+            if url.path == "/metrics":
+                self._send(200, service.metrics_text().encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8")
+                return
+            if url.path not in ("/", "/gantt"):
+                self._send(404, "未找到\n".encode("utf-8"), "text/plain; charset=utf-8")
+                return
+            try:
+                variant = parse_variant(parse_qs(url.query), service.data_path)
+            except ValueError as e:
+                self._send(400, f"{e}\n".encode("utf-8"), "text/plain; charset=utf-8")
+                return
+            except OSError:
+                self._fail(503, "活动数据不可用")
+                return
+            try:
+                entry, source = service.get(variant)
+            except OSError:
+                self._fail(503, "活动数据不可用")
+                return
+            except Exception:
+                self._fail(500, "绘制失败")
+                return
+            headers = {"ETag": entry.etag, "Cache-Control": "no-cache", "X-Cache": source}
+            if entry.etag in [tag.strip() for tag in self.headers.get("If-None-Match", "").split(",")]:
+                self.send_response(304)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.end_headers()
+                return
+            self._send(200, entry.body, entry.content_type, headers)
+
+        do_HEAD = do_GET
+
+        def log_message(self, format, *args):
+            pass
+
+    return GanttHandler
+
+
+def serve(host: str = "127.0.0.1", port: int = 8765, service: GanttService | None = None) -> ThreadingHTTPServer:
+    """
+    启动服务（阻塞前返回服务器对象，调用 serve_forever() 开始处理请求）。
+
+    参数:
+    host (str): 监听地址，局域网内其他设备访问时使用 0.0.0.0。
+    port (int): 监听端口。
+    service (GanttService | None): 绘图服务，默认使用 ./output.csv。
+
+    返回:
+    ThreadingHTTPServer: 服务器。
+    """
+    server = ThreadingHTTPServer((host, port), make_handler(service or GanttService()))
+    server.daemon_threads = True
+    return server
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="在局域网内提供活动甘特图")
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址，局域网访问时使用 0.0.0.0")
+    parser.add_argument("--port", type=int, default=8765, help="监听端口")
+    parser.add_argument("--data", default="./output.csv", help="活动数据文件")
+    parser.add_argument("--cache-mb", type=float, default=64, help="图片缓存容量（MB）")
+    parser.add_argument("--asset-cache-mb", type=float, default=128, help="背景图片与纹理缓存容量（MB）")
+    parser.add_argument("--layer-cache-mb", type=float, default=256, help="静态图层缓存容量（MB）")
+    parser.add_argument("--workers", type=int, default=2, help="同时进行的绘制数")
+    StageProfiler.add_arguments(parser)
+    args = parser.parse_args()
+
+    service = GanttService(args.data, int(args.cache_mb*(1 << 20)), args.workers,
+                           StageProfiler.from_args(args, source="server"),
+                           int(args.asset_cache_mb*(1 << 20)), int(args.layer_cache_mb*(1 << 20)))
+    server = serve(args.host, args.port, service)
+    print(f"甘特图服务已启动：http://{args.host}:{args.port}/gantt")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,243 @@
+"""
+活动数据的列式快照。
+
+快照是一个二进制文件：文件头之后依次存放按 64 字节对齐的各列数据。
+开始/结束时间存为 int64 秒（即 datetime64[s]，缺失值为 NaT），类型存为 int8，
+字符串列存为 UTF-8 字节块加 int64 偏移量。读取时整个文件只做一次内存映射，
+各列都是映射上的视图，不需要解析也不拷贝。
+
+文件布局：
+    b"GKSNAP1\\n" | uint32 头部长度 | JSON 头部 | 填充 | 列数据 ...
+
+爬虫脚本在写出 CSV 的同时写出同名的 .snap 快照，main.load_events 在快照比 CSV 新时直接读取快照；
+CSV 仍然可以随时由快照导出。读取快照不需要 pandas，只有写出快照与转换为 DataFrame 时才导入。
+"""
+
+import json
+import os
+import struct
+
+import numpy as np
+
+MAGIC = b"GKSNAP1\n"
+ALIGN = 64
+
+
+def snapshot_path(csv_path: str) -> str:
+    """与 CSV 文件同名的快照路径"""
+    return os.path.splitext(csv_path)[0]+".snap"
+
+
+def is_fresh(snap_path: str, csv_path: str) -> bool:
+    """快照存在且不比 CSV 旧（CSV 不存在时只要求快照存在）"""
+    if not os.path.exists(snap_path):
+        return False
+    return not os.path.exists(csv_path) or os.path.getmtime(snap_path) >= os.path.getmtime(csv_path)
+
+
+def _to_seconds(values) -> np.ndarray:
+    """把日期列转换为 int64 秒，无法解析的值记为 NaT；天数简写与排期模板须先经 expand_schedule 展开"""
+    from schedule import parse_dates
+
+    return parse_dates(values).view(np.int64)
+
+
+def _encode_strings(values) -> tuple[np.ndarray, np.ndarray]:
+    """把字符串列编码为（偏移量, 字节块），空值记为空字符串"""
+    import pandas as pd
+
+    return encode_strings(["" if pd.isna(v) else str(v) for v in values])
+
+
+def encode_strings(strings: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    """把字符串列表编码为（偏移量, 字节块）"""
+    encoded = [text.encode("utf-8") for text in strings]
+    offsets = np.zeros(len(encoded)+1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return offsets, np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+
+def encode_types(values) -> np.ndarray:
+    """把类型列转换为 int8，超出 int8 范围的值报错，不在转换时静默回绕"""
+    values = np.asarray(values)
+    info = np.iinfo(np.int8)
+    bad = values[(values < info.min) | (values > info.max)]
+    if len(bad):
+        raise ValueError(f"类型 {bad[0]} 超出 int8 的范围（{info.min}~{info.max}）")
+    return values.astype(np.int8)
+
+
+def write_snapshot(df, path: str) -> None:
+    """
+    把活动数据写成快照。前三列依次视为名称、开始时间、结束时间，另需“类型”列；
+    其余列按字符串列保存。结束时间中的天数简写与排期模板不会被展开，
+    原始数据请使用 csv_to_snapshot。
+
+    参数:
+    df (pd.DataFrame): 活动数据。
+    path (str): 快照路径。
+
+    Raises:
+        ValueError: 类型超出 int8 的范围时抛出。
+    """
+    import pandas as pd
+
+    arrays: dict[str, np.ndarray] = {
+        "start": _to_seconds(df.iloc[:, 1]),
+        "end": _to_seconds(df.iloc[:, 2]),
+        "type": encode_types(pd.to_numeric(df["类型"], errors="coerce").fillna(-1).to_numpy()),
+    }
+    strings = [df.columns[0]]+[c for c in df.columns[3:] if c != "类型"]
+    for i, column in enumerate(strings):
+        arrays[f"str{i}.offsets"], arrays[f"str{i}.bytes"] = _encode_strings(df[column])
+
+    header = {"rows": int(df.shape[0]), "strings": [str(c) for c in strings], "columns": {}}
+    offset = 0
+    for key, array in arrays.items():
+        header["columns"][key] = {"dtype": array.dtype.str, "offset": offset, "length": int(array.size)}
+        offset += -(-array.nbytes // ALIGN)*ALIGN
+    head = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    base = -(-(len(MAGIC)+4+len(head)) // ALIGN)*ALIGN
+
+    tmp_path = path+".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC+struct.pack("<I", len(head))+head)
+        for key, array in arrays.items():
+            f.seek(base+header["columns"][key]["offset"])
+            f.write(array.tobytes())
+        f.truncate(base+offset)
+    os.replace(tmp_path, path)
+
+
+class StringColumn:
+    """偏移量加字节块形式的字符串列，按需解码"""
+
+    def __init__(self, offsets: np.ndarray, data: np.ndarray):
+        self.offsets = offsets
+        self.data = data
+
+    def __len__(self) -> int:
+        return len(self.offsets)-1
+
+    def __getitem__(self, i: int) -> str:
+        return bytes(self.data[self.offsets[i]:self.offsets[i+1]]).decode("utf-8")
+
+    def tolist(self) -> list[str]:
+        raw = self.data.tobytes()
+        bounds = self.offsets.tolist()
+        return [raw[a:b].decode("utf-8") for a, b in zip(bounds[:-1], bounds[1:])]
+
+    def take(self, idx: np.ndarray) -> "StringColumn":
+        """按下标取出若干字符串，直接拼接字节区间，不解码"""
+        idx = np.asarray(idx, dtype=np.int64)
+        idx = np.where(idx < 0, idx+len(self), idx)
+        starts = self.offsets[idx]
+        lengths = self.offsets[idx+1]-starts
+        offsets = np.zeros(len(idx)+1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        # 新字节块中每个字节在原字节块中的位置：所在字符串的原起点加上它在字符串内的偏移
+        positions = np.repeat(starts-offsets[:-1], lengths)+np.arange(offsets[-1])
+        return StringColumn(offsets, self.data[positions])
+
+
+class Snapshot:
+    """内存映射的快照，各列均为映射上的只读视图"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._map = np.memmap(path, dtype=np.uint8, mode="r")
+        if bytes(self._map[:len(MAGIC)]) != MAGIC:
+            raise ValueError(f"{path} 不是活动数据快照")
+        (head_len,) = struct.unpack("<I", bytes(self._map[len(MAGIC):len(MAGIC)+4]))
+        head_start = len(MAGIC)+4
+        header = json.loads(bytes(self._map[head_start:head_start+head_len]).decode("utf-8"))
+        base = -(-(head_start+head_len) // ALIGN)*ALIGN
+        self.rows = header["rows"]
+        self.columns = {}
+        for key, meta in header["columns"].items():
+            dtype = np.dtype(meta["dtype"])
+            start = base+meta["offset"]
+            self.columns[key] = self._map[start:start+meta["length"]*dtype.itemsize].view(dtype)
+        self.string_names = header["strings"]
+
+    @property
+    def starts(self) -> np.ndarray:
+        """开始时间（datetime64[s]）"""
+        return self.columns["start"].view("datetime64[s]")
+
+    @property
+    def ends(self) -> np.ndarray:
+        """结束时间（datetime64[s]）"""
+        return self.columns["end"].view("datetime64[s]")
+
+    @property
+    def types(self) -> np.ndarray:
+        """类型（int8）"""
+        return self.columns["type"]
+
+    def strings(self, i: int = 0) -> StringColumn:
+        """第 i 个字符串列，第 0 个为名称"""
+        return StringColumn(self.columns[f"str{i}.offsets"], self.columns[f"str{i}.bytes"])
+
+    def to_frame(self):
+        """转换为与 CSV 读取结果列名一致的 DataFrame"""
+        import pandas as pd
+
+        data = {
+            self.string_names[0]: self.strings(0).tolist(),
+            "开始时间": self.starts,
+            "结束时间": self.ends,
+            "类型": self.types.astype(np.int64),
+        }
+        for i, name in enumerate(self.string_names[1:], start=1):
+            data[name] = self.strings(i).tolist()
+        return pd.DataFrame(data)
+
+
+def read_snapshot(path: str) -> Snapshot:
+    """内存映射打开快照"""
+    return Snapshot(path)
+
+
+def csv_to_snapshot(csv_path: str, snap_path: str | None = None) -> str:
+    """
+    读取 CSV（兼容带 BOM 的 UTF-8），展开排期简写后写出快照。
+
+    参数:
+    csv_path (str): CSV 路径。
+    snap_path (str | None): 快照路径，默认与 CSV 同名。
+
+    返回:
+    str: 快照路径。
+    """
+    import pandas as pd
+
+    from schedule import expand_schedule
+
+    snap_path = snap_path or snapshot_path(csv_path)
+    write_snapshot(expand_schedule(pd.read_csv(csv_path, encoding="utf-8-sig")), snap_path)
+    return snap_path
+
+
+def export_csv(snap_path: str, csv_path: str) -> None:
+    """把快照导出为 CSV"""
+    read_snapshot(snap_path).to_frame().to_csv(csv_path, index=False)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="活动数据快照与 CSV 互转")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="由 CSV 生成快照")
+    build.add_argument("csv")
+    build.add_argument("snap", nargs="?")
+    export = sub.add_parser("export", help="把快照导出为 CSV")
+    export.add_argument("snap")
+    export.add_argument("csv")
+    args = parser.parse_args()
+    if args.command == "build":
+        print("已生成", csv_to_snapshot(args.csv, args.snap))
+    else:
+        export_csv(args.snap, args.csv)
+        print("已导出", args.csv)
@@ -0,0 +1,89 @@
+"""
+绘图准备阶段的依赖图。
+
+每个任务声明它依赖的任务，依赖全部完成后立即提交到线程池；互不依赖的任务（读取数据、
+解码背景图片与纹理、提取主要颜色）同时进行。Pillow 解码 JPEG 与 NumPy 的数组运算都会释放 GIL，
+因此冷启动时准备阶段的总耗时接近其中最慢的一个任务。
+
+任务在工作线程中执行，剖析记录只有各任务的耗时，内存峰值由调用 run 的主线程阶段合并记录。
+"""
+
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from profiling import StageProfiler
+
+
+@dataclass
+class Task:
+    """依赖图中的一个任务"""
+
+    name: str
+    func: Callable
+    args: tuple = ()
+    deps: tuple[str, ...] = ()
+    kwargs: dict = field(default_factory=dict)
+
+
+class TaskGraph:
+    """按依赖关系并发执行任务，每个任务记录为剖析器中的一个阶段"""
+
+    def __init__(self, profiler: StageProfiler | None = None):
+        self.profiler = profiler or StageProfiler()
+        self.tasks: dict[str, Task] = {}
+
+    def add(self, name: str, func: Callable, *args, deps: tuple[str, ...] = (), **kwargs) -> None:
+        """
+        添加任务。
+
+        参数:
+        name (str): 任务名称，同时是剖析阶段名与结果的键。
+        func (Callable): 任务函数，调用方式为 func(*args, *依赖的结果, **kwargs)。
+        args: 位置参数。
+        deps (tuple[str, ...]): 依赖的任务名称，其结果按顺序追加在 args 之后。
+        kwargs: 关键字参数。
+        """
+        if name in self.tasks:
+            raise ValueError(f"任务 {name} 已存在")
+        self.tasks[name] = Task(name, func, args, tuple(deps), kwargs)
+
+    def _call(self, task: Task, results: dict[str, Any]) -> Any:
+        with self.profiler.stage(task.name):
+            return task.func(*task.args, *(results[d] for d in task.deps), **task.kwargs)
+
+    def run(self, workers: int | None = None) -> dict[str, Any]:
+        """
+        执行全部任务。
+
+        参数:
+        workers (int | None): 线程数，默认为任务数。
+
+        返回:
+        dict[str, Any]: 任务名称 -> 结果。任一任务出错时取消尚未开始的任务并抛出该异常。
+        """
+        for task in self.tasks.values():
+            missing = [d for d in task.deps if d not in self.tasks]
+            if missing:
+                raise ValueError(f"任务 {task.name} 依赖不存在的任务：{', '.join(missing)}")
+        results: dict[str, Any] = {}
+        pending = dict(self.tasks)
+        running: dict[Future, str] = {}
+        with ThreadPoolExecutor(max_workers=workers or max(len(self.tasks), 1)) as pool:
+            while pending or running:
+                for name, task in list(pending.items()):
+                    if all(d in results for d in task.deps):
+                        running[pool.submit(self._call, task, results)] = name
+                        del pending[name]
+                if not running:
+                    raise ValueError(f"任务之间存在循环依赖：{', '.join(pending)}")
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        results[name] = future.result()
+                    except BaseException:
+                        for other in running:
+                            other.cancel()
+                        raise
+        return results
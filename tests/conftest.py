@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+# 仓库中的模块都在根目录，爬虫脚本在 爬虫/ 下
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "爬虫"))
@@ -0,0 +1,33 @@
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+
+import batch
+import main
+from batch import Profile, build_store
+
+
+def test_build_store_releases_shared_memory_on_failure(monkeypatch):
+    created = []
+    SharedMemory = shared_memory.SharedMemory
+
+    def record(*args, **kwargs):
+        shm = SharedMemory(*args, **kwargs)
+        created.append(shm.name)
+        return shm
+
+    def missing_texture(path):
+        raise FileNotFoundError(path)
+
+    monkeypatch.setattr(batch.shared_memory, "SharedMemory", record)
+    monkeypatch.setattr(main, "load_background_image", lambda path: np.zeros((4, 4, 3), dtype=np.uint8))
+    monkeypatch.setattr(main, "extract_main_colors", lambda path, n: ["#000000"])
+    monkeypatch.setattr(main, "load_texture", missing_texture)
+    profiles = [Profile("a", "data.csv", "a.png", background="bg.png", texture="不存在.png")]
+    with pytest.raises(FileNotFoundError):
+        build_store(profiles)
+    assert len(created) == 1
+    monkeypatch.undo()
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=created[0])
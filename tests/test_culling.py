@@ -0,0 +1,99 @@
+from datetime import datetime
+
+import numpy as np
+
+from culling import compute_geometry, merge_small_bars, place_labels
+from labels import ELLIPSIS
+
+
+class CharMeasure:
+    """每个字符宽度为 1 的测量对象，fit 的规则与 LabelEngine 相同"""
+
+    def width(self, text):
+        return float(len(text))
+
+    def fit(self, name, avail):
+        if len(name) <= avail:
+            return name
+        keep = int(avail)-len(ELLIPSIS)
+        return name[:keep]+ELLIPSIS if keep > 0 else None
+
+
+def test_compute_geometry():
+    starts = np.array(["2025-04-25", "2025-04-20", "2025-05-27", "2025-04-28", "2025-05-20"], dtype="datetime64[s]")
+    ends = np.array(["2025-05-10", "2025-04-30", "2025-06-10", "2025-05-02", "2025-06-10"], dtype="datetime64[s]")
+    geometry = compute_geometry(starts, ends, datetime(2025, 5, 1), datetime(2025, 5, 26))
+    assert geometry.visible.tolist() == [True, False, False, False, True]
+    # 左端截在 -1，宽度算到结束时间为止；标签宽度被右边界截断
+    assert geometry.left[[0, 4]].tolist() == [-1, 456]
+    assert geometry.width[[0, 3, 4]].tolist() == [217, 25, 505]
+    assert geometry.label_width[[0, 4]].tolist() == [217, 144]
+
+
+def test_merge_small_bars():
+    left = np.array([0, 3, 10, 50, 0, 100], dtype=float)
+    width = np.array([1, 1, 1, 1, 1, 30], dtype=float)
+    rows = np.array([0, 0, 0, 0, 1, 0])
+    small, summaries = merge_small_bars(left, width, rows, min_width=2, max_gap=5)
+    assert small.tolist() == [True]*5+[False]
+    assert summaries == [(0, 0.0, 4.0, 2), (0, 10.0, 1.0, 1), (0, 50.0, 1.0, 1), (1, 0.0, 1.0, 1)]
+    small, summaries = merge_small_bars(left, width+10, rows, min_width=2, max_gap=5)
+    assert not small.any() and summaries == []
+
+
+def test_place_labels_rules():
+    names = ["AAAAAA", "BBBB", "长名称活动XYZ", "", "ABCD", "ABCD", "CCCC"]
+    centers = np.array([10, 14, 15, 20, 50, 1, 14], dtype=float)
+    spans = np.array([8, 6, 5, 4, 2, 2, 6], dtype=float)
+    rows = np.array([0, 0, 1, 1, 1, 2, 3])
+    labels = place_labels(names, centers, spans, rows, 60, CharMeasure())
+    assert labels == [
+        "AAAAAA",  # 较宽的条形优先
+        None,  # 与上一个标签重叠
+        "长名称活"+ELLIPSIS,  # 完整标签会压到同一行的条形上，在条形内省略
+        None,
+        "ABCD",  # 附近没有障碍时可以超出条形
+        "A"+ELLIPSIS,  # 完整标签超出窗口左边界
+        "CCCC",  # 不同行互不影响
+    ]
+
+
+def reference_labels(names, centers, spans, rows, x_max, measure):
+    """逐个比较全部已放置标签与条形的朴素实现"""
+    def overlaps(items, row, lo, hi):
+        return any(r == row and a < hi and b > lo for r, a, b in items)
+
+    bars = [(r, c-s/2, c+s/2) for c, s, r in zip(centers, spans, rows)]
+    placed, labels = [], [None]*len(names)
+    for i in np.argsort(-spans, kind="stable"):
+        text, w = names[i], measure.width(names[i])
+        if w > spans[i]:
+            lo, hi = centers[i]-w/2, centers[i]+w/2
+            bar_lo, bar_hi = centers[i]-spans[i]/2, centers[i]+spans[i]/2
+            if (lo >= 0 and hi <= x_max and not overlaps(placed, rows[i], lo, hi)
+                    and not overlaps(bars, rows[i], lo, bar_lo) and not overlaps(bars, rows[i], bar_hi, hi)):
+                placed.append((rows[i], lo, hi))
+                labels[i] = text
+                continue
+            text = measure.fit(names[i], spans[i])
+            if text is None:
+                continue
+            w = measure.width(text)
+        lo, hi = centers[i]-w/2, centers[i]+w/2
+        if not overlaps(placed, rows[i], lo, hi):
+            placed.append((rows[i], lo, hi))
+            labels[i] = text
+    return labels
+
+
+def test_place_labels_matches_brute_force():
+    rng = np.random.default_rng(0)
+    for _ in range(20):
+        n = 300
+        names = ["活"*k for k in rng.integers(1, 12, n)]
+        centers = rng.integers(0, 200, n).astype(float)
+        spans = rng.integers(1, 15, n).astype(float)
+        rows = rng.integers(0, 8, n)
+        measure = CharMeasure()
+        assert place_labels(names, centers, spans, rows, 200, measure) == \
+            reference_labels(names, centers, spans, rows, 200, measure)
@@ -0,0 +1,54 @@
+import random
+from itertools import combinations
+
+import numpy as np
+
+from dedup import MergeRule, duplicate_pairs, jaccard, near_duplicates, ngrams
+
+
+def dt(text: str) -> np.datetime64:
+    return np.datetime64(text, "s")
+
+
+def test_pool_name_variants_are_duplicates():
+    names = ["【中坚池】水月/空弦", "中坚寻访 水月、空弦"]
+    starts = np.array([dt("2025-05-01T04:00"), dt("2025-05-01T04:00")])
+    ends = np.array([dt("2025-05-15T03:59"), dt("2025-05-15T04:00")])
+    pairs = duplicate_pairs(names, starts, ends, np.array([0, 0]))
+    assert [(i, j) for i, j, _ in pairs] == [(0, 1)]
+    assert near_duplicates(names, starts, ends, np.array([0, 0])).tolist() == [True, False]
+
+
+def test_long_event_not_paired_by_overlap_alone():
+    names = ["【剿灭作战】长期活动", "【剿灭作战】长期活动 第二期"]
+    starts = np.array([dt("2025-01-01T04:00"), dt("2025-03-01T04:00")])
+    ends = np.array([dt("2025-12-31T04:00"), dt("2025-12-31T04:00")])
+    assert duplicate_pairs(names, starts, ends, rule=MergeRule(threshold=0.3)) == []
+
+
+def brute_force(names, starts, ends, types, rule):
+    tol = np.timedelta64(int(rule.tolerance_hours*3600), "s")
+    pairs = []
+    for i, j in combinations(range(len(names)), 2):
+        if abs(starts[i]-starts[j]) > tol or abs(ends[i]-ends[j]) > tol:
+            continue
+        if rule.same_type and types[i] != types[j]:
+            continue
+        score = jaccard(ngrams(names[i], rule.n), ngrams(names[j], rule.n))
+        if score >= rule.threshold:
+            pairs.append((i, j))
+    return pairs
+
+
+def test_matches_brute_force():
+    rng = random.Random(0)
+    words = ["水月", "空弦", "闪灵", "集成战略", "SideStory", "复刻", "【中坚池】", "中坚寻访", "签到"]
+    names = ["".join(rng.choice(words) for _ in range(rng.randint(1, 3))) for _ in range(300)]
+    base = dt("2025-01-01T04:00")
+    starts = np.array([base+np.timedelta64(rng.randint(0, 60*24), "h") for _ in names])
+    ends = starts+np.array([np.timedelta64(rng.choice([14*24, 14*24+1, 21*24]), "h") for _ in names])
+    types = np.array([rng.randint(0, 2) for _ in names])
+    rule = MergeRule(threshold=0.5)
+    found = [(i, j) for i, j, _ in duplicate_pairs(names, starts, ends, types, rule)]
+    assert found == brute_force(names, starts, ends, types, rule)
+    assert found
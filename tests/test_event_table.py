@@ -0,0 +1,37 @@
+import sys
+
+import numpy as np
+import pandas as pd
+
+from event_table import EventTable
+from schedule import expand_schedule
+from test_snapshot import SHORTHAND_CSV, write_csv
+
+
+def test_from_csv_expands_shorthand_without_pandas(tmp_path, monkeypatch):
+    path = write_csv(tmp_path / "events.csv", SHORTHAND_CSV+"未知,2025-05-01 04:00:00,,x\n")
+    expected = expand_schedule(pd.read_csv(path, encoding="utf-8-sig"))
+    # 打包版不含 pandas
+    monkeypatch.setitem(sys.modules, "pandas", None)
+    events = EventTable.from_csv(path)
+    assert events.name_list() == expected["名称"].tolist()
+    np.testing.assert_array_equal(events.start_times, expected["开始时间"].to_numpy(dtype="datetime64[s]"))
+    np.testing.assert_array_equal(events.end_times, expected["结束时间"].to_numpy(dtype="datetime64[s]"))
+    assert events.types.tolist() == [0, 1, 1, 1, 1, 1, 2, -1]
+
+
+def test_take_gathers_names_without_decoding(tmp_path):
+    path = write_csv(tmp_path / "events.csv", "名称,开始时间,结束时间,类型\n"
+                     "甲,2025-05-01 04:00:00,2025-05-15 03:59:00,0\n"
+                     ",2025-05-02 04:00:00,2025-05-16 03:59:00,1\n"
+                     "SideStory「乙」,2025-05-03 04:00:00,,2\n")
+    events = EventTable.from_csv(path)
+    names = events.name_list()
+    cases = [([2, 0, 0, 1], [2, 0, 0, 1]), ([-1], [2]), (np.empty(0, dtype=np.int64), []),
+             (np.array([True, False, True]), [0, 2])]
+    for idx, expected in cases:
+        taken = events.take(idx)
+        assert taken.name_list() == [names[i] for i in expected]
+        np.testing.assert_array_equal(taken.starts, events.starts[expected])
+        np.testing.assert_array_equal(taken.ends, events.ends[expected])
+        np.testing.assert_array_equal(taken.types, events.types[expected])
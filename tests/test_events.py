@@ -0,0 +1,32 @@
+from datetime import datetime
+
+from events import classify, iter_announcement_events
+from test import extract_structured_data
+
+ANNOUNCEMENT = """<div class="_0868052a">
+<p>一、SideStory「测试」限时活动开启</p>
+<p>◆<第一段>瞻望</p>
+<p>活动时间：05月01日 16:00 - 05月22日 03:59</p>
+<p>开放关卡：TS-1</p>
+<img src="x.png">
+<p>活动时间：05月08日 16:00 - 05月22日 03:59</p>
+<p>二、限时寻访开启，【如死亦终】限时寻访</p>
+<p>活动时间：05月01日 16:00 - 05月15日 03:59</p>
+<p>三、没有时间的说明</p>
+</div>"""
+
+
+def test_announcement_events():
+    events = list(classify(iter_announcement_events(ANNOUNCEMENT)))
+    assert [e.name for e in events] == ["第一段 - TS-1", "【如死亦终】限时寻访"]
+    year = datetime.now().year
+    # 图片之后的时间属于主标题，主标题有子标题时不单独输出
+    assert events[0].start == datetime(year, 5, 1, 16)
+    assert events[0].end == datetime(year, 5, 22, 3, 59)
+    assert [e.type for e in events] == [1, 0]
+
+
+def test_extracted_json_uses_same_rules():
+    records = extract_structured_data(ANNOUNCEMENT)
+    assert [r["title"] for r in records] == [e.name for e in iter_announcement_events(ANNOUNCEMENT)]
+    assert records[1]["end_time"] == f"{datetime.now().year}-05-15 03:59:00"
@@ -0,0 +1,18 @@
+from matplotlib.font_manager import FontProperties
+
+import labels
+
+
+def test_bitmap_cache_is_bounded_by_bytes(monkeypatch):
+    cache = labels._LabelCache(0, lambda bitmap: bitmap.nbytes)
+    monkeypatch.setattr(labels, "_bitmap_cache", cache)
+    prop = FontProperties(size=12)
+    bitmap = labels.rasterize("活动0", prop, "k", 100)
+    one = labels.ENTRY_OVERHEAD+bitmap.nbytes+100
+    cache.max_bytes = 3*one
+    for i in range(20):
+        labels.rasterize(f"活动{i}", prop, "k", 100)
+        assert cache.size <= cache.max_bytes
+    assert 1 < len(cache) <= 3
+    # 最近使用的标签留在缓存中
+    assert cache.get((labels.font_key(prop, 100), (0.0, 0.0, 0.0, 1.0), "活动19")) is not None
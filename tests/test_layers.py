@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+
+import layers
+from event_table import EventTable
+from layers import LayerCache, StaticLayer
+from main import render_figure
+
+LEFT, RIGHT = datetime(2025, 5, 1), datetime(2025, 5, 26)
+COLOR = ["#e6194b", "#3cb44b", "#4363d8", "#f58231"]
+
+
+def sample_events() -> EventTable:
+    names = ["SideStory「测试」", "【如死亦终】限时寻访", "常驻活动", "很短的活动", "超出右边界的长期活动「生于黑夜」限时复刻"]
+    starts = [LEFT-timedelta(days=5), LEFT+timedelta(days=2), LEFT+timedelta(days=1), LEFT+timedelta(days=10),
+              LEFT+timedelta(days=15)]
+    ends = [LEFT+timedelta(days=14), LEFT+timedelta(days=16), LEFT+timedelta(days=20), LEFT+timedelta(days=11),
+            LEFT+timedelta(days=60)]
+    return EventTable.from_rows(names, starts, ends, [0, 1, 2, 1, 0])
+
+
+def test_static_layer_matches_direct_rendering():
+    figsize = (16, 9)
+    rng = np.random.default_rng(0)
+    img = rng.integers(0, 256, (900, 1600, 3), dtype=np.uint8)
+    tw = np.zeros((900, 1600, 4), dtype=np.uint8)
+    tw[::7, :, 3] = 120
+    events = sample_events()
+    direct = render_figure(events, LEFT, RIGHT, COLOR, img, tw, figsize=figsize, today=LEFT+timedelta(days=3))
+    expected = np.asarray(direct.canvas.buffer_rgba()).astype(int)
+    layer = StaticLayer(LEFT, RIGHT, img, tw, figsize, today=LEFT+timedelta(days=3))
+    # 第二次绘制检查上一次的条形与标签没有留在图层上
+    for _ in range(2):
+        with layer.lock:
+            actual = np.asarray(layer.render(events, COLOR).buffer_rgba()).astype(int)
+        assert actual.shape == expected.shape
+        # 只有覆盖层半透明边缘的取整不同
+        assert np.abs(actual-expected).max() <= 2
+
+
+class FakeLayer:
+    def __init__(self, left_border, right_border, img, tw, figsize, today):
+        self.nbytes = int(figsize[0])
+
+
+def test_layer_cache_evicts_by_bytes(monkeypatch):
+    monkeypatch.setattr(layers, "StaticLayer", FakeLayer)
+    cache = LayerCache(max_bytes=10)
+    a = cache.get(("a",), LEFT, RIGHT, None, None, figsize=(4, 1))
+    b = cache.get(("b",), LEFT, RIGHT, None, None, figsize=(4, 1))
+    assert cache.get(("a",), LEFT, RIGHT, None, None, figsize=(4, 1)) is a
+    cache.get(("c",), LEFT, RIGHT, None, None, figsize=(4, 1))
+    # 最久未用的 b 被淘汰
+    assert cache.size == 8 and len(cache) == 2
+    assert cache.get(("b",), LEFT, RIGHT, None, None, figsize=(4, 1)) is not b
+    assert cache.get(("a",), LEFT, RIGHT, None, None, figsize=(4, 1)) is not a
+    assert cache.hits == 1 and cache.misses == 5
+
+
+def test_oversized_layer_bypasses_cache(monkeypatch):
+    monkeypatch.setattr(layers, "StaticLayer", FakeLayer)
+    cache = LayerCache(max_bytes=10)
+    small = cache.get(("a",), LEFT, RIGHT, None, None, figsize=(4, 1))
+    big = cache.get(("big",), LEFT, RIGHT, None, None, figsize=(20, 1))
+    assert big.nbytes == 20
+    assert cache.get(("big",), LEFT, RIGHT, None, None, figsize=(20, 1)) is not big
+    # 超过容量的图层不缓存，也不挤掉已有的图层
+    assert len(cache) == 1 and cache.size == 4
+    assert cache.get(("a",), LEFT, RIGHT, None, None, figsize=(4, 1)) is small
@@ -0,0 +1,55 @@
+import numpy as np
+
+from layout import pack_lanes
+
+
+def test_open_ended_event_keeps_its_lane():
+    lanes, count = pack_lanes([0, 1, 50], [np.nan, 10, 60], [1, 1, 1])
+    assert lanes.tolist() == [0, 1, 1]
+    assert count == 2
+
+
+def brute_force_check(starts, ends, groups, lanes, gap=0):
+    """同一车道中的活动互不重叠（含间隔），不同类型不共用车道"""
+    for lane in np.unique(lanes):
+        members = np.flatnonzero(lanes == lane)
+        assert len(set(np.asarray(groups)[members].tolist())) == 1
+        members = members[np.argsort(np.asarray(starts)[members])]
+        for a, b in zip(members[:-1], members[1:]):
+            assert ends[a]+gap <= starts[b]
+
+
+def test_random_events_never_overlap_in_a_lane():
+    rng = np.random.default_rng(0)
+    starts = rng.uniform(0, 1000, 500)
+    ends = starts+rng.uniform(1, 100, 500)
+    groups = rng.integers(0, 3, 500)
+    lanes, count = pack_lanes(starts, ends, groups, gap=2)
+    brute_force_check(starts, ends, groups, lanes, gap=2)
+    assert count == len(np.unique(lanes)) == lanes.max()+1
+
+
+def test_types_get_separate_blocks_in_first_seen_order():
+    lanes, count = pack_lanes([0, 0, 20], [10, 10, 30], [2, 0, 2])
+    # 类型 2 先出现，占第 0 块；类型 0 即使时间不重叠也不与它共用车道
+    assert lanes.tolist() == [0, 1, 0]
+    assert count == 2
+
+
+def test_lane_is_reused_when_end_equals_start():
+    lanes, count = pack_lanes([0, 10, 20], [10, 20, 30], [0, 0, 0])
+    assert lanes.tolist() == [0, 0, 0]
+    assert count == 1
+    lanes, count = pack_lanes([0, 10], [10, 20], [0, 0], gap=1)
+    assert lanes.tolist() == [0, 1]
+
+
+def test_reuses_the_lane_that_frees_first():
+    lanes, count = pack_lanes([0, 0, 5, 12], [20, 4, 11, 30], [0, 0, 0, 0])
+    assert lanes.tolist() == [0, 1, 1, 1]
+    assert count == 2
+
+
+def test_empty_input():
+    lanes, count = pack_lanes([], [], [])
+    assert lanes.tolist() == [] and count == 0
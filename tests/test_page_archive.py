@@ -0,0 +1,117 @@
+import os
+from datetime import datetime
+
+import pytest
+
+import page_archive
+from page_archive import DICTIONARY, PageArchive
+
+URL = "https://ak.hypergryph.com/news/1"
+
+
+def page(i: int) -> str:
+    # 同一站点的页面共享大段模板，只有正文不同
+    template = "".join(f'<div class="nav-item-{k}">导航 {k}</div>\n' for k in range(300))
+    return f"<html><body>\n{template}<p>第 {i} 条公告：活动时间 05月{i:02d}日 16:00</p>\n</body></html>\n"
+
+
+@pytest.fixture(params=["zlib", "raw"])
+def archive(tmp_path, request) -> PageArchive:
+    return PageArchive(str(tmp_path / "pages.gka"), request.param)
+
+
+def test_round_trip_and_versions(archive):
+    archive.append(URL, page(1), datetime(2025, 5, 1, 12))
+    archive.append(URL, page(2), datetime(2025, 5, 20, 12))
+    archive.append("file:other.html", page(3).encode("utf-8"), datetime(2025, 5, 2))
+    reopened = PageArchive(archive.path)
+    assert reopened.get(URL) == page(2)
+    assert reopened.get(URL, datetime(2025, 5, 10)) == page(1)
+    with pytest.raises(KeyError):
+        reopened.get(URL, datetime(2025, 4, 1))
+    assert [e.fetched_at for e in reopened.versions(URL)] == ["2025-05-01 12:00:00", "2025-05-20 12:00:00"]
+    assert [text for _, text in reopened.iter_pages("https://")] == [page(1), page(2)]
+    assert reopened.stats()["pages"] == 3
+
+
+def test_dictionary_is_used_for_later_pages(tmp_path):
+    archive = PageArchive(str(tmp_path / "pages.gka"), "zlib")
+    for i in range(1, 4):
+        archive.append(f"{URL}{i}", page(i))
+    plain = archive.append(f"{URL}plain", page(4))
+    dict_id = archive.train()
+    assert dict_id == 1
+    with_dict = archive.append(f"{URL}dict", page(5))
+    assert with_dict.dict_id == dict_id
+    assert with_dict.length < plain.length
+    reopened = PageArchive(archive.path)
+    assert [e.kind for e in reopened.entries].count(DICTIONARY) == 1
+    assert reopened.get(f"{URL}dict") == page(5)
+
+
+def test_torn_tail_is_repaired_only_by_writers(tmp_path):
+    archive = PageArchive(str(tmp_path / "pages.gka"), "zlib")
+    archive.append(URL, page(1), datetime(2025, 5, 1))
+    complete = os.path.getsize(archive.path)
+    # 写了一半的记录
+    with open(archive.path, "ab") as f:
+        f.write(open(archive.path, "rb").read()[:40])
+    torn = os.path.getsize(archive.path)
+    reader = PageArchive(archive.path)
+    assert os.path.getsize(archive.path) == torn
+    assert reader.get(URL) == page(1)
+    writer = PageArchive(archive.path)
+    writer.append(URL, page(2), datetime(2025, 5, 2))
+    assert writer.versions(URL)[-1].offset == complete
+    assert PageArchive(archive.path).get(URL) == page(2)
+
+
+def test_unindexed_record_is_indexed_once(tmp_path, monkeypatch):
+    path = str(tmp_path / "pages.gka")
+    seen = []
+    original = PageArchive._write_index
+
+    def interrupted(self, entry):
+        # 数据已经写入、索引还没写入时，另一个进程打开存档
+        seen.append(len(PageArchive(path).entries))
+        original(self, entry)
+
+    monkeypatch.setattr(PageArchive, "_write_index", interrupted)
+    PageArchive(path, "zlib").append(URL, page(1))
+    monkeypatch.setattr(PageArchive, "_write_index", original)
+    assert seen == [0]
+    archive = PageArchive(path)
+    assert len(archive.entries) == 1
+    assert len(list(archive.iter_pages())) == 1
+
+
+def test_duplicate_index_lines_are_skipped(tmp_path):
+    archive = PageArchive(str(tmp_path / "pages.gka"), "zlib")
+    archive.append(URL, page(1))
+    with open(archive.index_path, encoding="utf-8") as f:
+        line = f.read()
+    with open(archive.index_path, "a", encoding="utf-8") as f:
+        # 重复的一行，以及写了一半的一行
+        f.write(line+line[:20])
+    assert len(PageArchive(archive.path).entries) == 1
+
+
+def test_rebuild_index(tmp_path):
+    archive = PageArchive(str(tmp_path / "pages.gka"), "zlib")
+    archive.append(URL, page(1))
+    archive.train([page(1).encode("utf-8"), page(2).encode("utf-8")])
+    archive.append(URL, page(2), datetime(2030, 1, 1))
+    expected = [(e.offset, e.kind, e.dict_id) for e in archive.entries]
+    os.remove(archive.index_path)
+    assert PageArchive(archive.path).entries == []
+    rebuilt = PageArchive(archive.path)
+    assert rebuilt.rebuild_index() == 3
+    assert [(e.offset, e.kind, e.dict_id) for e in rebuilt.entries] == expected
+    assert PageArchive(archive.path).get(URL) == page(2)
+
+
+@pytest.mark.skipif(page_archive.zstandard is None, reason="需要 zstandard")
+def test_zstd_round_trip(tmp_path):
+    archive = PageArchive(str(tmp_path / "pages.gka"), "zstd")
+    archive.append(URL, page(1))
+    assert PageArchive(archive.path).get(URL) == page(1)
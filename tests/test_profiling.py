@@ -0,0 +1,77 @@
+import argparse
+import io
+import json
+import threading
+
+from profiling import StageProfiler
+from taskgraph import TaskGraph
+
+
+def allocate(size: int) -> int:
+    block = bytearray(size)
+    return len(block)
+
+
+def records(output: io.StringIO) -> dict[str, dict]:
+    return {r["stage"]: r for r in map(json.loads, output.getvalue().splitlines()) if r["event"] == "stage"}
+
+
+def test_worker_stages_do_not_measure_peaks(tmp_path):
+    output = io.StringIO()
+    profiler = StageProfiler(enabled=True, output=output, cprofile_dir=str(tmp_path))
+    barrier = threading.Barrier(2)
+
+    def task(size: int) -> int:
+        # 两个任务确实同时运行
+        barrier.wait(timeout=5)
+        return allocate(size)
+
+    with profiler.stage("prepare"):
+        graph = TaskGraph(profiler)
+        graph.add("small", task, 1 << 20)
+        graph.add("large", task, 8 << 20)
+        assert graph.run() == {"small": 1 << 20, "large": 8 << 20}
+
+    stages = records(output)
+    assert stages["small"]["peak_bytes"] is None
+    assert stages["large"]["peak_bytes"] is None
+    assert stages["small"]["thread"] != threading.main_thread().name
+    # 主线程阶段的峰值合并了两个并发任务
+    assert stages["prepare"]["peak_bytes"] >= 8 << 20
+    assert stages["prepare"]["concurrent_stages"] == 2
+    # 只有主线程的顶层阶段保存 cProfile 结果
+    assert [p.name for p in tmp_path.iterdir()] == ["main.prepare.prof"]
+
+
+def test_prometheus_skips_unmeasured_peaks():
+    profiler = StageProfiler(enabled=True, output=io.StringIO())
+    with profiler.stage("main"):
+        allocate(1 << 20)
+
+    def worker():
+        with profiler.stage("worker"):
+            allocate(1 << 20)
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join()
+    text = profiler.prometheus_text()
+    assert 'ganttknights_stage_peak_bytes{source="main",stage="main"}' in text
+    assert 'stage_peak_bytes{source="main",stage="worker"}' not in text
+    assert 'ganttknights_stage_runs_total{source="main",stage="worker"} 1' in text
+
+
+def test_profiler_closes_the_output_file_it_opened(tmp_path):
+    path = tmp_path / "profile.jsonl"
+    with StageProfiler.from_args(argparse.Namespace(profile=True, profile_output=str(path))) as profiler:
+        with profiler.stage("load"):
+            pass
+    assert profiler.output.closed
+    # 关闭后的记录直接丢弃
+    with profiler.stage("late"):
+        pass
+    assert [r["stage"] for r in map(json.loads, path.read_text(encoding="utf-8").splitlines())] == ["load"]
+
+    output = io.StringIO()
+    StageProfiler(enabled=True, output=output).close()
+    assert not output.closed
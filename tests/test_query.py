@@ -0,0 +1,69 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from event_table import EventTable
+from query import EventIndex, NameIndex, normalize, parse_args, parse_period, pool_operators
+
+
+def test_name_search_matches_brute_force():
+    rng = np.random.default_rng(0)
+    alphabet = list("集成战略ＡａBb水月")
+    names = ["".join(rng.choice(alphabet, rng.integers(0, 9))) for _ in range(400)]
+    index = NameIndex(names)
+    queries = {"", "Ａ", "ab", "集成", "水月集", "战略战略", "bbb"}
+    for name in names[:50]:
+        # 名称中截取的子串，长度覆盖短查询与三元组查询
+        for n in range(1, 6):
+            queries.add(name[:n])
+    for text in queries:
+        expected = [i for i, name in enumerate(names) if normalize(text) in normalize(name)]
+        assert index.search(text).tolist() == expected, text
+
+
+def test_pool_operators():
+    assert pool_operators("【标准池】提丰/黑键") == ["提丰", "黑键"]
+    assert pool_operators("【限定池】水月、 空弦") == ["水月", "空弦"]
+    assert pool_operators("【中坚池】 推进之王 ") == ["推进之王"]
+    assert pool_operators("【如死亦终】限时寻访") == []
+
+
+def test_operator_query_only_uses_pools():
+    events = EventTable.from_rows(
+        ["【标准池】提丰/黑键", "【限定池】水月、空弦", "【标准池】水月", "【标准池】水月/假卡池"],
+        np.array(["2025-01-01", "2025-03-01", "2025-05-01", "2025-06-01"], dtype="datetime64[s]"),
+        np.array(["2025-01-15", "2025-03-15", "2025-05-15", "2025-06-15"], dtype="datetime64[s]"),
+        [0, 0, 0, 1],
+    )
+    index = EventIndex(events)
+    assert index.query(operator="水月").tolist() == [1, 2]
+    assert index.query(operator="水月", desc=True, limit=1).tolist() == [2]
+    assert index.query(operator="黑键").tolist() == [0]
+    assert index.records(index.query(operator="空弦"))[0]["六星干员"] == ["水月", "空弦"]
+
+
+def test_parse_period():
+    assert parse_period("2025-03") == datetime(2025, 3, 1)
+    assert parse_period("2025-11", end=True) == datetime(2025, 12, 1)
+    assert parse_period("2025-12", end=True) == datetime(2026, 1, 1)
+    assert parse_period("2025-12-31", end=True) == datetime(2026, 1, 1)
+    assert parse_period("2025-03-15 12:00", end=True) == datetime(2025, 3, 15, 12)
+    with pytest.raises(ValueError):
+        parse_period("2025-13")
+
+
+def test_during_and_explicit_bounds():
+    args = parse_args(["--during", "2025-12"])
+    assert (args.lo, args.hi) == (datetime(2025, 12, 1), datetime(2026, 1, 1))
+    args = parse_args(["--from", "2025-03-01", "--to", "2025-03-31"])
+    assert (args.lo, args.hi) == (datetime(2025, 3, 1), datetime(2025, 4, 1))
+
+
+@pytest.mark.parametrize("argv", [["--during", "2025-03", "--from", "2025-01"],
+                                  ["--during", "2025-03", "--to", "2025-04"], ["--from", "昨天"]])
+def test_conflicting_or_invalid_periods_are_rejected(argv, capsys):
+    with pytest.raises(SystemExit) as exc:
+        parse_args(argv)
+    assert exc.value.code == 2
+    assert "error" in capsys.readouterr().err
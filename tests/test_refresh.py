@@ -0,0 +1,59 @@
+import subprocess
+import sys
+
+import pytest
+
+from refresh import HOUR, SOURCES, SingleFlightLock, parse_args
+
+HOLD = """
+import sys, time
+from refresh import SingleFlightLock
+lock = SingleFlightLock(sys.argv[1])
+assert lock.acquire()
+print("held", flush=True)
+time.sleep(60)
+"""
+
+
+def test_lock_is_exclusive(tmp_path):
+    path = str(tmp_path / ".refresh.lock")
+    first, second = SingleFlightLock(path), SingleFlightLock(path)
+    assert first.acquire()
+    assert not second.acquire()
+    first.release()
+    assert second.acquire()
+    second.release()
+
+
+def test_lock_is_released_when_holder_is_killed(tmp_path, request):
+    path = str(tmp_path / ".refresh.lock")
+    holder = subprocess.Popen([sys.executable, "-c", HOLD, path], stdout=subprocess.PIPE, text=True,
+                              cwd=request.config.rootpath)
+    try:
+        assert holder.stdout.readline().strip() == "held"
+        lock = SingleFlightLock(path)
+        assert not lock.acquire()
+        # 锁文件记录着持有者
+        with open(path) as f:
+            assert f.read().split()[0] == str(holder.pid)
+    finally:
+        holder.kill()
+        holder.wait()
+    assert lock.acquire()
+    lock.release()
+
+
+def test_force_and_ttl_arguments():
+    assert parse_args([]).force == []
+    assert parse_args(["--force"]).force == list(SOURCES)
+    assert parse_args(["--force", "news"]).force == ["news"]
+    assert parse_args(["--ttl", "news=1.5"]).ttl == {"news": 1.5*HOUR}
+
+
+@pytest.mark.parametrize("argv", [["--force", "unknown"], ["--ttl", "unknown=3"], ["--ttl", "news"],
+                                  ["--ttl", "news=abc"], ["--ttl", "news=0"]])
+def test_invalid_arguments_are_reported(argv, capsys):
+    with pytest.raises(SystemExit) as exc:
+        parse_args(argv)
+    assert exc.value.code == 2
+    assert "error" in capsys.readouterr().err
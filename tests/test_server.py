@@ -0,0 +1,59 @@
+import threading
+import time
+
+import pytest
+
+from server import CacheEntry, GanttService
+
+
+def test_concurrent_requests_render_once_and_cache_before_release(monkeypatch):
+    service = GanttService(workers=2)
+    release = threading.Event()
+    renders = []
+
+    def render(variant):
+        renders.append(variant)
+        release.wait(5)
+        return CacheEntry(b"png", '"etag"', "image/png")
+
+    put = service.cache.put
+    registered = []
+
+    def checked_put(key, entry):
+        # 写入缓存时绘制仍处于登记状态，之后到达的请求不会再次绘制
+        registered.append(key in service._inflight)
+        put(key, entry)
+
+    monkeypatch.setattr(service, "render", render)
+    monkeypatch.setattr(service.cache, "put", checked_put)
+    sources = []
+    threads = [threading.Thread(target=lambda: sources.append(service.get("v")[1])) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic()+5
+    while service.coalesced < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert sorted(sources) == ["coalesced"]*3+["miss"]
+    assert renders == ["v"]
+    assert registered == [True]
+    assert service._inflight == {}
+    assert service.get("v")[1] == "hit"
+
+
+def test_failed_render_is_not_left_in_flight(monkeypatch):
+    service = GanttService(workers=1)
+    calls = []
+
+    def render(variant):
+        calls.append(variant)
+        raise OSError("数据文件不可用")
+
+    monkeypatch.setattr(service, "render", render)
+    for _ in range(2):
+        with pytest.raises(OSError):
+            service.get("v")
+    assert calls == ["v", "v"]
+    assert service._inflight == {}
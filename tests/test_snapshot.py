@@ -0,0 +1,64 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from event_table import EventTable
+from snapshot import _to_seconds, csv_to_snapshot, is_fresh, snapshot_path
+
+SHORTHAND_CSV = """名称,开始时间,结束时间,类型
+卡池,2025-05-01 04:00:00,14,0
+活动,2025-05-01 16:00:00,14,1
+SideStory,2025-05-08 16:00:00,大型ss,1
+签到,2025-05-01 04:00:00,2025-05-15 03:59:00,2
+"""
+
+
+def write_csv(path, text: str = SHORTHAND_CSV) -> str:
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    return str(path)
+
+
+def assert_same(a: EventTable, b: EventTable) -> None:
+    assert a.name_list() == b.name_list()
+    np.testing.assert_array_equal(a.starts, b.starts)
+    np.testing.assert_array_equal(a.ends, b.ends)
+    np.testing.assert_array_equal(a.types, b.types)
+
+
+def test_snapshot_matches_csv_with_shorthand(tmp_path):
+    path = write_csv(tmp_path / "events.csv")
+    from_csv = EventTable.from_csv(path)
+    snap = csv_to_snapshot(path)
+    assert_same(EventTable.from_snapshot(snap), from_csv)
+    assert from_csv.end_times[0] == np.datetime64("2025-05-15T04:00:00")
+    assert len(from_csv) == 7
+
+
+def test_save_data_snapshot_matches_csv(tmp_path):
+    from six2csv import save_data
+
+    path = str(tmp_path / "merged.csv")
+    save_data(pd.read_csv(write_csv(tmp_path / "src.csv")), path)
+    assert is_fresh(snapshot_path(path), path)
+    assert_same(EventTable.load(path), EventTable.from_csv(path))
+    assert EventTable.load(path).end_times[0] == np.datetime64("2025-05-15T04:00:00")
+
+
+def test_unparseable_dates_become_nat():
+    seconds = _to_seconds(["2025-05-01 04:00:00", "大型ss", "", None])
+    assert seconds[0] == np.datetime64("2025-05-01T04:00:00", "s").astype(np.int64)
+    assert (seconds[1:] == np.iinfo(np.int64).min).all()
+
+
+def test_out_of_range_type_is_rejected(tmp_path):
+    path = write_csv(tmp_path / "events.csv", "名称,开始时间,结束时间,类型\n"
+                     "甲,2025-05-01 04:00:00,2025-05-15 03:59:00,127\n"
+                     "乙,2025-05-01 04:00:00,2025-05-15 03:59:00,200\n")
+    with pytest.raises(ValueError, match="200"):
+        csv_to_snapshot(path)
+    assert not os.path.exists(snapshot_path(path))
+    with pytest.raises(ValueError, match="200"):
+        EventTable.from_csv(path)
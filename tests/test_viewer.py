@@ -0,0 +1,32 @@
+from datetime import datetime
+
+import matplotlib
+import numpy as np
+
+matplotlib.use("Agg")
+
+import viewer  # noqa: E402
+from event_table import EventTable  # noqa: E402
+
+LEFT = datetime(2025, 5, 1)
+
+
+def test_open_ended_event_is_drawn(monkeypatch):
+    monkeypatch.setattr(viewer, "load_background", lambda *_: (np.zeros((9, 16, 3)), np.zeros((9, 16, 4))))
+    events = EventTable.from_rows(
+        ["一直持续", "普通活动", "之后的活动"],
+        np.array(["2025-04-20", "2025-05-02", "2025-05-20"], dtype="datetime64[s]"),
+        np.array(["NaT", "2025-05-10", "2025-05-25"], dtype="datetime64[s]"),
+        [1, 1, 1],
+    )
+    gantt = viewer.GanttViewer(events, "", "", ["red", "blue"], LEFT, datetime(2025, 5, 15))
+    # 一直持续的活动与之后的活动不能共用车道，普通活动结束后之后的活动可以沿用它的车道
+    assert gantt.rows[gantt.names.index("之后的活动")] == gantt.rows[gantt.names.index("普通活动")]
+    verts = gantt.bars.get_paths()
+    assert len(verts) == 2
+    assert all(np.isfinite(path.vertices).all() for path in verts)
+    # 一直持续的活动的条形延伸到视野右端之外
+    x1 = gantt.ax.get_xlim()[1]
+    assert max(path.vertices[:, 0].max() for path in verts) == x1+1
+    labels = [t.get_text() for t in gantt.texts if t.get_visible()]
+    assert any(label.startswith("一直") for label in labels)
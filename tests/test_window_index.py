@@ -0,0 +1,33 @@
+import numpy as np
+
+from window_index import WindowIndex
+
+STARTS = np.array(["2025-05-01", "NaT", "2025-05-10", "2025-04-01", "2025-05-20"], dtype="datetime64[s]")
+ENDS = np.array(["2025-05-05", "2025-05-03", "NaT", "2025-04-10", "2025-05-25"], dtype="datetime64[s]")
+# 开始时间缺失视为很早开始，结束时间缺失视为一直持续
+EXPECTED = {
+    ("2025-04-05", "2025-04-06"): [1, 3],
+    ("2025-05-04", "2025-05-06"): [0],
+    ("2025-05-12", "2025-05-21"): [2, 4],
+    ("2025-06-01", "2025-07-01"): [2],
+}
+
+
+def check(index: WindowIndex, convert) -> None:
+    for (lo, hi), expected in EXPECTED.items():
+        lo, hi = np.datetime64(lo, "s"), np.datetime64(hi, "s")
+        assert sorted(index.query(convert(lo), convert(hi)).tolist()) == expected
+
+
+def test_datetime64_with_nat():
+    check(WindowIndex(STARTS, ENDS), lambda t: t)
+
+
+def test_int64_seconds_with_nat():
+    check(WindowIndex(STARTS.view(np.int64), ENDS.view(np.int64)), lambda t: int(t.astype(np.int64)))
+
+
+def test_float_hours_with_nan():
+    origin = np.datetime64("2025-05-01", "s")
+    starts, ends = (STARTS-origin)/np.timedelta64(1, "h"), (ENDS-origin)/np.timedelta64(1, "h")
+    check(WindowIndex(starts, ends), lambda t: (t-origin)/np.timedelta64(1, "h"))
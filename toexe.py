@@ -1,7 +1,120 @@
-import os
-
-os.system(
-    r"pyinstaller -F -w F:\myPython\GanttKnights\main.py -n zl --add-data '背景图;背景图' --add-data '纹理;纹理' --add-data '所有活动数据.csv;.' --add-data '活动数据.csv;.' --add-data 'debug_page.html;.' --add-data 'zl.ico;.'"
-)
-
-os.system(r'copy .\dist\zl.exe .\zl.exe')
+"""
+打包脚本。
+
+    python toexe.py                 # 快速启动版：dist/zl/ 单目录，见 zl.spec
+    python toexe.py --font simhei.ttf --measure 5
+    python toexe.py --profile legacy  # 原来的单文件版 dist/zl(.exe)
+
+快速启动版不再每次启动都把整个程序包解压到临时目录，只包含绘图需要的模块与 Agg 后端，
+背景图片与纹理换成预处理、裁剪后可直接内存映射的缓存，matplotlib 字体缓存在构建时生成
+（构建机器上安装了 SimHei 或用 --font 指定字体文件时一并包含）。
+--measure 统计从启动程序到写出 PNG 的用时，Linux 上同样可以构建与测量。
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+PREPARED = os.path.join("build", "prepared")
+FONT_PROBE = (
+    "from matplotlib.font_manager import FontProperties, findfont; "
+    "print(findfont(FontProperties(family=['SimHei', 'sans-serif'])))"
+)
+
+
+def prepare(font: str | None = None) -> None:
+    """
+    生成随程序分发的缓存：素材缓存、活动数据及其快照、字体缓存。
+
+    参数:
+    font (str | None): 额外打包的字体文件（例如 simhei.ttf）。
+    """
+    from asset_cache import build_asset_cache
+    from snapshot import csv_to_snapshot
+
+    shutil.rmtree(PREPARED, ignore_errors=True)
+    os.makedirs(PREPARED)
+    build_asset_cache(os.path.join(PREPARED, "素材缓存"))
+    shutil.copy2("output.csv", PREPARED)
+    csv_to_snapshot(os.path.join(PREPARED, "output.csv"))
+
+    env = dict(os.environ, MPLCONFIGDIR=os.path.abspath(os.path.join(PREPARED, "mplconfig")))
+    if font:
+        os.makedirs(os.path.join(PREPARED, "fonts"))
+        shutil.copy2(font, os.path.join(PREPARED, "fonts"))
+    # 在空的配置目录中触发一次字体扫描，生成 fontlist-*.json
+    found = subprocess.run([sys.executable, "-c", FONT_PROBE], env=env, check=True, capture_output=True, text=True)
+    print("字体缓存已生成，SimHei 解析为:", found.stdout.strip() if not font else os.path.basename(font))
+
+
+def build(profile: str = "fast") -> str:
+    """
+    调用 PyInstaller 构建。
+
+    参数:
+    profile (str): fast 为快速启动的单目录版，legacy 为原来的单文件版。
+
+    返回:
+    str: 可执行文件路径。
+    """
+    exe = "zl.exe" if os.name == "nt" else "zl"
+    if profile == "fast":
+        subprocess.run([sys.executable, "-m", "PyInstaller", "--noconfirm", "zl.spec"], check=True)
+        return os.path.join("dist", "zl", exe)
+
+    args = [sys.executable, "-m", "PyInstaller", "--noconfirm", "-F", "-w", "main.py", "-n", "zl"]
+    for src, dst in [("背景图", "背景图"), ("纹理", "纹理"), ("所有活动数据.csv", "."), ("活动数据.csv", "."),
+                     ("debug_page.html", "."), ("zl.ico", ".")]:
+        if os.path.exists(src):
+            args += ["--add-data", f"{src}{os.pathsep}{dst}"]
+    subprocess.run(args, check=True)
+    shutil.copy2(os.path.join("dist", exe), exe)
+    return os.path.join("dist", exe)
+
+
+def measure(command: list[str], runs: int = 3) -> list[float]:
+    """
+    测量从启动到写出 PNG 的用时。
+
+    参数:
+    command (list[str]): 启动命令，会追加 --output 参数。
+    runs (int): 次数，第一次通常是冷启动。
+
+    返回:
+    list[float]: 每次的用时（秒）。
+    """
+    times = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in range(runs):
+            output = os.path.join(tmp, f"Gantt{i}.png")
+            t0 = time.perf_counter()
+            subprocess.run(command+["--output", output], check=True, capture_output=True)
+            times.append(time.perf_counter()-t0)
+            if not os.path.exists(output):
+                raise RuntimeError(f"{' '.join(command)} 没有写出 PNG")
+    return times
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="打包甘特图程序")
+    parser.add_argument("--profile", choices=["fast", "legacy"], default="fast", help="打包方式")
+    parser.add_argument("--font", help="一并打包的中文字体文件（例如 simhei.ttf）")
+    parser.add_argument("--measure", type=int, default=0, metavar="N", help="构建后测量 N 次启动到写出 PNG 的用时")
+    parser.add_argument("--skip-build", action="store_true", help="只测量已有的构建")
+    args = parser.parse_args()
+
+    exe = os.path.join("dist", "zl", "zl.exe" if os.name == "nt" else "zl")
+    if not args.skip_build:
+        if args.profile == "fast":
+            prepare(args.font)
+        exe = build(args.profile)
+        print("已构建", exe)
+    if args.measure:
+        for name, command in [("源码运行 app.py", [sys.executable, "app.py"]), ("打包版", [exe])]:
+            times = measure(command, args.measure)
+            print(f"{name}：首次 {times[0]:.2f} s，之后平均 {sum(times[1:])/max(len(times)-1, 1):.2f} s")
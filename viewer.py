@@ -0,0 +1,248 @@
+"""
+交互式甘特图浏览器。
+
+与 main.py 共用背景合成、坐标轴装饰、车道压缩和标签放置逻辑。背景图片与纹理只绘制一次，
+之后作为位图缓存（blit），平移和缩放时只重绘坐标轴中的条形、标签和刻度；
+每次视野变化时通过 WindowIndex 查询可见的活动。
+
+操作方式：
+    鼠标左键拖动 / ← → 键      平移
+    滚轮 / + - 键              以鼠标位置（键盘操作时以视野中心）为中心缩放
+    Home 键                    回到初始视野
+"""
+
+from datetime import datetime, timedelta
+
+import matplotlib as mpl
+import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.collections import PolyCollection
+from matplotlib.ticker import MultipleLocator
+
+from calendar_axis import CalendarFormatter, CalendarLocator
+from culling import place_labels
+from event_table import EventTable
+from labels import ELLIPSIS, CachedLabel, LabelEngine
+from layout import pack_lanes
+from main import FONT_SIZE, decorate_axes, extract_main_colors, font, get_random_paths, load_background, load_events
+from profiling import StageProfiler
+from window_index import WindowIndex
+
+
+class GanttViewer:
+    """基于 blit 的可平移、缩放的甘特图浏览器"""
+
+    MAX_MINOR_TICKS = 160
+
+    def __init__(
+        self,
+        events: EventTable,
+        background_pic_dir: str,
+        texture_dir: str,
+        color: list[str],
+        left_border: datetime,
+        right_border: datetime,
+        profiler: StageProfiler | None = None,
+    ):
+        """
+        参数:
+        events (EventTable): load_events 读取的全部活动数据。
+        background_pic_dir (str): 背景图片的路径。
+        texture_dir (str): 纹理的路径。
+        color (list[str]): 用于绘制条形图的颜色列表。
+        left_border (datetime): 初始视野的左边界时间，同时作为 x 轴原点。
+        right_border (datetime): 初始视野的右边界时间。
+        profiler (StageProfiler | None): 性能剖析器，每次重绘记录为一个 frame 阶段。
+        """
+        self.profiler = profiler or StageProfiler()
+        events = events.take(events.types != -1)
+        events = events.take(events.render_order())
+        origin = np.datetime64(left_border, "s")
+        self.names = events.name_list()
+        starts = (events.start_times-origin)/np.timedelta64(1, "h")
+        ends = (events.end_times-origin)/np.timedelta64(1, "h")
+        # 缺失的开始时间视为很早开始，缺失的结束时间视为一直持续，之后的裁剪与压缩都不会遇到 NaN
+        self.starts = np.where(np.isnan(starts), -np.inf, starts)
+        self.ends = np.where(np.isnan(ends), np.inf, ends)
+        # 整个历史只压缩一次车道，平移时活动所在的行保持不变
+        self.rows, row_num = pack_lanes(self.starts, self.ends, events.types)
+        self.colors = np.array([color[ii % len(color)] for ii in range(len(self.names))], dtype=object)
+        self.index = WindowIndex(self.starts, self.ends)
+        self.home = (0.0, (right_border-left_border).total_seconds() // 3600)
+
+        # 交互窗口需要 pyplot 创建图形界面后端的画布，字体仍然直接传给文本对象
+        self.fig = plt.figure(figsize=(16, 9), facecolor="silver")
+        self.ax = self.fig.add_subplot(111, frameon=False)
+        img, tw = load_background(background_pic_dir, texture_dir)
+        self.fig.figimage(img, 0, 0, zorder=-3)
+        self.fig.figimage(tw, 0, 0, zorder=-2)
+        decorate_axes(self.ax, left_border, right_border, max(row_num, 1))
+        # 视野较宽时只标注月份，避免刻度数随视野线性增长
+        locator = CalendarLocator(left_border, hour_step=4, max_days=45)
+        self.ax.xaxis.set_major_locator(locator)
+        self.ax.xaxis.set_major_formatter(CalendarFormatter(locator))
+        self.fig.tight_layout(pad=1.08*FONT_SIZE/mpl.rcParams["font.size"])
+        self.bars = PolyCollection([], edgecolor="k", linewidth=1.618, alpha=0.75, joinstyle="bevel")
+        self.ax.add_collection(self.bars)
+        self.texts = []
+        self.label_prop = font(weight="bold")
+        # 坐标轴标记为动画图元：整图重绘时不画它，背景缓存中也就不包含它
+        self.ax.set_animated(True)
+        self.background = None
+        self._drag_x = None
+
+        canvas = self.fig.canvas
+        canvas.mpl_connect("draw_event", self._on_draw)
+        canvas.mpl_connect("scroll_event", self._on_scroll)
+        canvas.mpl_connect("key_press_event", self._on_key)
+        canvas.mpl_connect("button_press_event", self._on_press)
+        canvas.mpl_connect("motion_notify_event", self._on_motion)
+        canvas.mpl_connect("button_release_event", self._on_release)
+        self.set_view(*self.home, blit=False)
+
+    def _text(self, k: int):
+        """从标签对象池中取出第 k 个标签，不够时新建"""
+        while len(self.texts) <= k:
+            label = CachedLabel(0, 0, "", self.label_prop)
+            label.set_visible(False)
+            self.texts.append(self.ax.add_artist(label))
+        return self.texts[k]
+
+    def set_view(self, x0: float, x1: float, blit: bool = True) -> None:
+        """
+        把视野设置为 [x0, x1]（相对原点的小时数），更新可见的条形与标签并重绘。
+
+        参数:
+        x0 (float): 视野左端。
+        x1 (float): 视野右端。
+        blit (bool): 是否立即用缓存背景重绘。
+        """
+        with self.profiler.stage("frame"):
+            self.ax.set_xlim(x0, x1)
+            # 副刻度（及副网格线）步长按 4 小时的 2 的幂次放大，数量保持在 MAX_MINOR_TICKS 以内
+            minor_step = 4
+            while (x1-x0)/minor_step > self.MAX_MINOR_TICKS:
+                minor_step *= 2
+            self.ax.xaxis.set_minor_locator(MultipleLocator(minor_step))
+            idx = self.index.query(x0, x1)
+            left = np.fmax(self.starts[idx], x0-1)
+            right = np.fmin(self.ends[idx], x1+1)
+            rows = self.rows[idx]
+            verts = np.stack([
+                np.column_stack([left, rows-0.4]),
+                np.column_stack([left, rows+0.4]),
+                np.column_stack([right, rows+0.4]),
+                np.column_stack([right, rows-0.4]),
+            ], axis=1)
+            self.bars.set_verts(verts)
+            self.bars.set_facecolor(self.colors[idx].tolist())
+
+            hours_per_px = (x1-x0)/self.ax.get_window_extent().width
+            names = [self.names[i] for i in idx]
+            engine = LabelEngine(self.fig.canvas.get_renderer(), self.label_prop, hours_per_px)
+            engine.measure_batch(names+[ELLIPSIS])
+            visible_left = np.fmax(self.starts[idx], x0)
+            spans = np.fmin(self.ends[idx], x1)-visible_left
+            centers = visible_left+spans/2
+            labels = place_labels(names, centers-x0, spans, rows, x1-x0, engine)
+            k = 0
+            for x, y, namestr in zip(centers, rows, labels):
+                if namestr is None:
+                    continue
+                text = self._text(k)
+                text.set_position((x, y))
+                text.set_text(namestr)
+                text.set_visible(True)
+                k += 1
+            for text in self.texts[k:]:
+                text.set_visible(False)
+            if blit:
+                self._blit()
+
+    def _blit(self) -> None:
+        """恢复缓存的背景，只重绘坐标轴"""
+        canvas = self.fig.canvas
+        if self.background is None:
+            canvas.draw_idle()
+            return
+        canvas.restore_region(self.background)
+        self.fig.draw_artist(self.ax)
+        canvas.blit(self.fig.bbox)
+        canvas.flush_events()
+
+    def _on_draw(self, event) -> None:
+        # 整图重绘（首次显示、窗口缩放）后重新缓存背景
+        self.background = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+        self.fig.draw_artist(self.ax)
+
+    def _zoom(self, factor: float, center: float | None = None) -> None:
+        x0, x1 = self.ax.get_xlim()
+        if center is None:
+            center = (x0+x1)/2
+        self.set_view(center-(center-x0)*factor, center+(x1-center)*factor)
+
+    def _pan(self, dx: float) -> None:
+        x0, x1 = self.ax.get_xlim()
+        self.set_view(x0+dx, x1+dx)
+
+    def _on_scroll(self, event) -> None:
+        self._zoom(1/1.25 if event.button == "up" else 1.25, event.xdata)
+
+    def _on_key(self, event) -> None:
+        x0, x1 = self.ax.get_xlim()
+        if event.key == "left":
+            self._pan(-(x1-x0)/4)
+        elif event.key == "right":
+            self._pan((x1-x0)/4)
+        elif event.key in ("+", "="):
+            self._zoom(1/1.25)
+        elif event.key == "-":
+            self._zoom(1.25)
+        elif event.key == "home":
+            self.set_view(*self.home)
+
+    def _on_press(self, event) -> None:
+        if event.button == 1 and event.inaxes is self.ax:
+            self._drag_x = event.x
+
+    def _on_motion(self, event) -> None:
+        if self._drag_x is None:
+            return
+        x0, x1 = self.ax.get_xlim()
+        hours_per_px = (x1-x0)/self.ax.get_window_extent().width
+        self._pan((self._drag_x-event.x)*hours_per_px)
+        self._drag_x = event.x
+
+    def _on_release(self, event) -> None:
+        self._drag_x = None
+
+
+if __name__ == "__main__":
+    import os
+    import argparse
+
+    parser = argparse.ArgumentParser(description="交互式浏览活动历史")
+    parser.add_argument("--data", default="./所有活动数据.csv", help="活动数据文件路径")
+    parser.add_argument("--metrics-port", type=int, help="在该端口提供 Prometheus 格式的性能指标")
+    StageProfiler.add_arguments(parser)
+    args = parser.parse_args()
+    profiler = StageProfiler.from_args(args, source="viewer")
+    if args.metrics_port:
+        # 指标端点需要采集数据；没有要求输出 JSON 行时丢弃它们
+        if not profiler.enabled:
+            profiler.enabled = True
+            profiler.output = open(os.devnull, "w")
+        profiler.serve_metrics(args.metrics_port)
+
+    background_pic_dir, texture_dir, _, _ = get_random_paths()
+    now = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    viewer = GanttViewer(
+        load_events(args.data),
+        background_pic_dir,
+        texture_dir,
+        extract_main_colors(background_pic_dir, 10),
+        now-timedelta(days=3),
+        now+timedelta(days=22-now.weekday()),
+        profiler,
+    )
+    plt.show()
@@ -0,0 +1,70 @@
+"""
+时间窗口索引。
+
+把活动按开始时间排序，并记录排序后结束时间的前缀最大值，
+查询与某个时间窗口重叠的活动只需两次二分查找加一次对候选区间的过滤。
+
+缺失的时间在索引内部统一处理：缺失的开始时间视为很早开始，缺失的结束时间视为一直持续，
+因此 datetime64 的 NaT、int64 秒中表示 NaT 的最小值（EventTable 的约定）与浮点数的 NaN
+都不会打乱排序和前缀最大值。
+"""
+
+import numpy as np
+
+NAT = np.iinfo(np.int64).min
+
+
+class WindowIndex:
+    """按时间窗口查询活动的内存索引"""
+
+    def __init__(self, starts: np.ndarray, ends: np.ndarray):
+        """
+        参数:
+        starts (np.ndarray): 每个活动的开始时间（数值或 datetime64）。
+        ends (np.ndarray): 每个活动的结束时间，类型与 starts 相同。
+        整数时间以 int64 最小值表示缺失（与 EventTable 相同）。
+        """
+        starts = np.asarray(starts)
+        ends = np.asarray(ends)
+        self.dtype = starts.dtype
+        if np.issubdtype(starts.dtype, np.datetime64):
+            starts = starts.view(np.int64)
+            ends = ends.astype(self.dtype).view(np.int64)
+        if np.issubdtype(starts.dtype, np.floating):
+            starts = np.where(np.isnan(starts), -np.inf, starts)
+            ends = np.where(np.isnan(ends), np.inf, ends)
+        else:
+            ends = np.where(ends == NAT, np.iinfo(np.int64).max, ends)
+        self.order = np.argsort(starts, kind="stable")
+        self.starts = starts[self.order]
+        self.ends = ends[self.order]
+        # 前缀最大结束时间单调不减，可以用二分查找跳过所有早已结束的活动
+        self.max_ends = np.maximum.accumulate(self.ends) if len(self.ends) else self.ends
+
+    def _key(self, value):
+        """把查询时间转换为索引内部的表示"""
+        if np.issubdtype(self.dtype, np.datetime64):
+            return np.asarray(value, dtype=self.dtype).view(np.int64)
+        return value
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def query(self, lo, hi) -> np.ndarray:
+        """
+        查询与窗口 [lo, hi) 重叠的活动，即开始时间早于 hi 且结束时间晚于 lo 的活动。
+
+        参数:
+        lo: 窗口起点，类型与建立索引时的时间相同。
+        hi: 窗口终点。
+
+        返回:
+        np.ndarray: 命中活动在原始输入中的下标，按开始时间排序。
+        """
+        lo, hi = self._key(lo), self._key(hi)
+        i0 = np.searchsorted(self.max_ends, lo, side="right")
+        i1 = np.searchsorted(self.starts, hi, side="left")
+        if i0 >= i1:
+            return np.empty(0, dtype=np.int64)
+        hit = self.ends[i0:i1] > lo
+        return self.order[i0:i1][hit]
@@ -0,0 +1,52 @@
+# -*- mode: python ; coding: utf-8 -*-
+# 快速启动的打包配置（由 toexe.py 调用）：单目录、预编译字节码，只保留 Agg 后端，
+# 不打包爬虫与 pandas，背景图片、纹理与字体缓存使用 toexe.py 预先生成在 build/prepared 中的版本。
+import os
+
+PREPARED = os.path.join("build", "prepared")
+
+EXCLUDES = [
+    "pandas", "selenium", "bs4", "webdriver_manager", "tqdm", "scipy",
+    "tkinter", "PyQt5", "PyQt6", "PySide2", "PySide6", "wx", "gi", "IPython", "jupyter", "pytest",
+    "matplotlib.pyplot", "matplotlib.backends.backend_qt", "matplotlib.backends.backend_qtagg",
+    "matplotlib.backends.backend_qtcairo", "matplotlib.backends.backend_tkagg", "matplotlib.backends.backend_tkcairo",
+    "matplotlib.backends.backend_gtk3agg", "matplotlib.backends.backend_gtk4agg", "matplotlib.backends.backend_wxagg",
+    "matplotlib.backends.backend_webagg", "matplotlib.backends.backend_nbagg", "matplotlib.backends.backend_pdf",
+    "matplotlib.backends.backend_ps", "matplotlib.backends.backend_svg", "matplotlib.backends.backend_pgf",
+    "matplotlib.backends.backend_cairo",
+]
+# mpl-data 中绘图用不到的部分：示例数据、工具栏图标、PDF/PS 核心字体
+MPL_DATA_DROP = [
+    os.path.join("mpl-data", name)+os.sep
+    for name in ("sample_data", "images", os.path.join("fonts", "afm"), os.path.join("fonts", "pdfcorefonts"))
+]
+
+datas = [
+    (os.path.join(PREPARED, "素材缓存"), "素材缓存"),
+    (os.path.join(PREPARED, "mplconfig"), "mplconfig"),
+    (os.path.join(PREPARED, "output.csv"), "."),
+    (os.path.join(PREPARED, "output.snap"), "."),
+]
+if os.path.isdir(os.path.join(PREPARED, "fonts")):
+    datas.append((os.path.join(PREPARED, "fonts"), "fonts"))
+
+a = Analysis(
+    ["app.py"],
+    datas=datas,
+    hooksconfig={"matplotlib": {"backends": ["Agg"]}},
+    runtime_hooks=["rthook_mplconfig.py"],
+    excludes=EXCLUDES,
+    optimize=1,
+)
+a.datas = [d for d in a.datas if not any(drop in d[0]+os.sep for drop in MPL_DATA_DROP)]
+pyz = PYZ(a.pure)
+exe = EXE(
+    pyz,
+    a.scripts,
+    [],
+    exclude_binaries=True,
+    name="zl",
+    console=False,
+    icon="zl.ico" if os.path.exists("zl.ico") else None,
+)
+coll = COLLECT(exe, a.binaries, a.datas, name="zl")
@@ -0,0 +1,93 @@
+import filecmp
+import gc
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import test2
+from test2 import pair_title_briefs, parse_six_star_events
+
+POOLS = ["【限定寻访·庆典】", "常驻标准寻访", "中坚寻访", "【联合行动】特选干员定向寻访", "中坚甄选"]
+OPERATORS = ["黑键", "提丰", "莫斯提马", "空弦", "水月", "霍尔海雅", "莱伊", "闪灵"]
+
+
+def synthetic_page(posts: int, seed: int = 0) -> str:
+    """生成含 posts 条帖子的森空岛个人主页，结构与真实页面的标题/简要嵌套一致
+
+    Args:
+        posts (int): 帖子数量
+        seed (int): 随机种子
+
+    Returns:
+        str: HTML 文本
+    """
+    rng = random.Random(seed)
+    items = []
+    for i in range(posts):
+        month, day = rng.randint(1, 12), rng.randint(1, 28)
+        star = "、".join(rng.sample(OPERATORS, 2))
+        content = (f"寻访开启时间：{month}月{day}日 04:00 ~ {month}月{min(day+14, 28)}日 03:59"
+                   f"★★★★★★：{star}（占6★出率的50%）") if rng.random() < 0.8 else "闲聊帖子"
+        items.append(
+            '<div class="PostItem__Wrapper-sc-1">'
+            f'<div class="PostItem__Header"><div class="title-name title-name-x">{rng.choice(POOLS)}{i}</div></div>'
+            f'<div class="PostItem__Brief-sc-2 brief">{content}</div>'
+            "</div>")
+    return '<html><body><div class="ProfilePostList__Wrapper">' + "".join(items) + "</div></body></html>"
+
+
+def best_time(func, *args, repeat: int = 3) -> float:
+    """关闭垃圾回收后多次运行，取最短耗时"""
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        gc.disable()
+        t0 = time.perf_counter()
+        func(*args)
+        times.append(time.perf_counter()-t0)
+        gc.enable()
+    return min(times)
+
+
+def legacy_pairs(soup):
+    """优化前的配对方式：每个简要都向前遍历文档查找标题，O(n²)"""
+    pairs = []
+    for content_container in soup.select('div[class^="PostItem__Brief-"]'):
+        title_block = content_container.find_previous(
+            'div', class_=lambda x: x and x.startswith('title-name'))
+        if not title_block:
+            title_block = content_container.find_parent().find(
+                'div', class_=lambda x: x and x.startswith('title-name'))
+        pairs.append((title_block, content_container))
+    return pairs
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="比较森空岛帖子标题/简要配对的耗时")
+    parser.add_argument("--posts", type=int, nargs="*", default=[1000, 2000, 5000, 10000])
+    args = parser.parse_args()
+
+    print(f"{'帖子数':>8}{'旧配对(s)':>12}{'新配对(s)':>12}{'加速比':>8}  CSV一致")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.posts:
+            soup = BeautifulSoup(synthetic_page(n), "html.parser")
+            old, new = legacy_pairs(soup), pair_title_briefs(soup)
+            old_time, new_time = best_time(legacy_pairs, soup), best_time(pair_title_briefs, soup)
+            assert [(a is b, c is d) for (a, c), (b, d) in zip(old, new)] == [(True, True)]*len(old)
+
+            new_csv, old_csv = Path(tmp) / "new.csv", Path(tmp) / "old.csv"
+            parse_six_star_events(soup, new_csv)
+            test2.pair_title_briefs, saved = legacy_pairs, test2.pair_title_briefs
+            try:
+                parse_six_star_events(soup, old_csv)
+            finally:
+                test2.pair_title_briefs = saved
+            same = filecmp.cmp(new_csv, old_csv, shallow=False)
+            print(f"{n:>8}{old_time:>12.3f}{new_time:>12.3f}{old_time/new_time:>8.1f}  {same}")
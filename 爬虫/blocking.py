@@ -0,0 +1,166 @@
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from urllib.parse import urlparse
+
+from selenium.webdriver.edge.options import Options
+
+RULES_PATH = Path(__file__).resolve().parent / "block_rules.json"
+BASELINE_PATH = Path(__file__).resolve().parent / ".block_baseline.json"
+
+# 所有站点默认屏蔽的资源（DevTools 通配符写法）：字体、音视频、图片与常见统计脚本
+DEFAULT_DENY = [
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp4", "*.webm", "*.m3u8", "*.mp3", "*.flv",
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*hm.baidu.com*", "*cnzz.com*", "*sentry.io*", "*sensorsdata*",
+]
+
+# 站点（按域名后缀匹配） -> 额外屏蔽的模式 deny 与从默认列表中放行的模式 allow
+DEFAULT_SITE_RULES = {
+    "skland.com": {"deny": ["*bilibili.com*"], "allow": []},
+    "hypergryph.com": {"deny": ["*bilibili.com*"], "allow": []},
+}
+
+
+def load_rules(path: Path = RULES_PATH) -> tuple[list[str], dict]:
+    """读取屏蔽规则
+
+    block_rules.json 存在时覆盖默认规则，格式为
+    {"deny": [...], "sites": {"skland.com": {"deny": [...], "allow": [...]}}}
+
+    Returns:
+        tuple[list[str], dict]: 默认屏蔽列表与各站点规则
+    """
+    if not path.exists():
+        return DEFAULT_DENY, DEFAULT_SITE_RULES
+    rules = json.loads(path.read_text(encoding="utf-8"))
+    return rules.get("deny", DEFAULT_DENY), rules.get("sites", DEFAULT_SITE_RULES)
+
+
+def blocked_patterns(url: str, deny: list[str] | None = None, sites: dict | None = None) -> list[str]:
+    """计算某个页面需要屏蔽的URL模式
+
+    DevTools 的屏蔽列表不支持例外，因此站点的 allow 列表表示从默认屏蔽列表中去掉的模式，
+    deny 列表表示在默认列表之外追加的模式。
+
+    Args:
+        url (str): 目标页面
+        deny (list[str] | None): 默认屏蔽列表，默认读取 load_rules
+        sites (dict | None): 各站点规则，默认读取 load_rules
+
+    Returns:
+        list[str]: 屏蔽模式
+    """
+    if deny is None or sites is None:
+        deny, sites = load_rules()
+    host = urlparse(url).hostname or ""
+    patterns = list(deny)
+    for domain, rule in sites.items():
+        if host == domain or host.endswith("."+domain):
+            allow = set(rule.get("allow", []))
+            patterns = [p for p in patterns if p not in allow]+[p for p in rule.get("deny", []) if p not in patterns]
+    return patterns
+
+
+def enable_performance_log(options: Options) -> Options:
+    """开启性能日志，用于统计传输字节数与被屏蔽的请求数"""
+    options.set_capability("ms:loggingPrefs", {"performance": "ALL"})
+    return options
+
+
+def enable_blocking(driver, url: str) -> list[str]:
+    """通过 DevTools 的 Network.setBlockedURLs 为接下来的页面加载设置屏蔽列表
+
+    Args:
+        driver: Edge驱动实例
+        url (str): 即将加载的页面
+
+    Returns:
+        list[str]: 生效的屏蔽模式
+    """
+    patterns = blocked_patterns(url)
+    try:
+        driver.get_log("performance")  # 清空之前页面的日志
+    except Exception:
+        pass
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+    return patterns
+
+
+@dataclass
+class FetchStats:
+    """一次页面加载的统计"""
+
+    url: str
+    load_seconds: float
+    transferred_bytes: int
+    blocked_requests: int
+    bytes_saved: int | None = None
+
+    def describe(self) -> str:
+        saved = "未知（先用 --no-block 记录基线）" if self.bytes_saved is None else f"{self.bytes_saved/1024:.0f} KB"
+        return (f"页面加载 {self.load_seconds:.2f} s，传输 {self.transferred_bytes/1024:.0f} KB，"
+                f"屏蔽 {self.blocked_requests} 个请求，节省 {saved}")
+
+
+def _load_baseline() -> dict:
+    try:
+        return json.loads(BASELINE_PATH.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def collect_stats(driver, url: str, blocking: bool = True) -> FetchStats:
+    """统计刚完成的页面加载
+
+    传输字节数与被屏蔽的请求数取自性能日志（没有开启时退回到 Resource Timing，跨域资源可能统计不到），
+    加载时间取自 Navigation Timing。不屏蔽时把传输字节数记为该站点的基线，
+    屏蔽时用基线减去本次传输量得到节省的字节数。
+
+    Args:
+        driver: Edge驱动实例
+        url (str): 页面地址
+        blocking (bool): 本次加载是否开启了屏蔽
+
+    Returns:
+        FetchStats: 统计结果
+    """
+    load_ms = driver.execute_script(
+        "const n = performance.getEntriesByType('navigation')[0];"
+        "return n ? n.duration : 0;")
+    transferred, blocked = 0, 0
+    try:
+        entries = driver.get_log("performance")
+    except Exception:
+        entries = []
+    for entry in entries:
+        message = json.loads(entry["message"])["message"]
+        if message["method"] == "Network.loadingFinished":
+            transferred += int(message["params"].get("encodedDataLength", 0))
+        elif message["method"] == "Network.loadingFailed" and message["params"].get("blockedReason") == "inspector":
+            blocked += 1
+    if not entries:
+        transferred = int(driver.execute_script(
+            "return performance.getEntries().reduce((s, e) => s + (e.transferSize || 0), 0);"))
+
+    host = urlparse(url).hostname or url
+    baseline = _load_baseline()
+    if not blocking:
+        baseline[host] = transferred
+        BASELINE_PATH.write_text(json.dumps(baseline), encoding="utf-8")
+    saved = baseline[host]-transferred if blocking and host in baseline else None
+    return FetchStats(url, load_ms/1000, transferred, blocked, saved)
+
+
+def report_fetch(driver, url: str, blocking: bool = True) -> FetchStats | None:
+    """统计并打印页面加载情况，统计失败不影响爬取"""
+    try:
+        stats = collect_stats(driver, url, blocking)
+    except Exception as e:
+        print(f"统计页面加载失败: {e}")
+        return None
+    print(stats.describe())
+    return stats
@@ -0,0 +1,123 @@
+import json
+import os
+import shutil
+import subprocess
+import time
+from pathlib import Path
+
+from selenium import webdriver
+from selenium.webdriver.edge.options import Options
+from selenium.webdriver.edge.service import Service
+
+CACHE_PATH = Path(__file__).resolve().parent / ".edgedriver.json"
+DEFAULT_DEBUG_PORT = 9222
+EDGE_CANDIDATES = [
+    r"C:\Program Files (x86)\Microsoft\Edge\Application\msedge.exe",
+    r"C:\Program Files\Microsoft\Edge\Application\msedge.exe",
+]
+
+
+def driver_path(refresh: bool = False) -> str:
+    """获取本地缓存的Edge驱动路径
+
+    首次调用或 refresh=True 时才通过 webdriver_manager 检查版本并下载驱动，
+    结果写入 .edgedriver.json；之后直接使用缓存的路径，离线时也能启动。
+    刷新失败（例如离线）时回退到已缓存的驱动。
+
+    Args:
+        refresh (bool): 是否强制重新解析驱动版本
+
+    Returns:
+        str: 驱动可执行文件路径
+
+    Raises:
+        RuntimeError: 既无法解析驱动又没有可用的缓存时抛出
+    """
+    cached = None
+    if CACHE_PATH.exists():
+        try:
+            cached = json.loads(CACHE_PATH.read_text(encoding="utf-8"))["path"]
+        except (ValueError, KeyError):
+            cached = None
+    if cached and not os.path.exists(cached):
+        cached = None
+    if cached and not refresh:
+        return cached
+
+    try:
+        from webdriver_manager.microsoft import EdgeChromiumDriverManager
+
+        path = EdgeChromiumDriverManager().install()
+    except Exception as e:
+        if cached:
+            print(f"驱动更新失败，继续使用缓存的驱动: {e}")
+            return cached
+        raise RuntimeError(f"无法获取Edge驱动: {e}") from e
+    CACHE_PATH.write_text(json.dumps({"path": path, "resolved_at": time.time()}), encoding="utf-8")
+    print("已缓存驱动路径:", path)
+    return path
+
+
+def create_driver(options: Options, debugger_address: str | None = None) -> webdriver.Edge:
+    """创建Edge驱动实例
+
+    Args:
+        options (Options): 浏览器选项（附加到已有浏览器时大部分选项不生效）
+        debugger_address (str | None): 已运行浏览器的远程调试地址，如 "127.0.0.1:9222"；
+            给出时附加到该浏览器，不再冷启动新的浏览器进程
+
+    Returns:
+        webdriver.Edge: 驱动实例
+    """
+    if debugger_address:
+        options = Options()
+        options.add_experimental_option("debuggerAddress", debugger_address)
+    return webdriver.Edge(service=Service(driver_path()), options=options)
+
+
+def release_driver(driver: webdriver.Edge, attached: bool) -> None:
+    """释放驱动：自己启动的浏览器直接退出，附加的浏览器只停止驱动进程，保留浏览器供下次复用"""
+    if attached:
+        driver.service.stop()
+    else:
+        driver.quit()
+
+
+def launch_debug_browser(port: int = DEFAULT_DEBUG_PORT, user_data_dir: str | None = None,
+                         headless: bool = True) -> subprocess.Popen:
+    """启动一个常驻的、开启远程调试端口的Edge浏览器，供多次爬取附加复用
+
+    Args:
+        port (int): 远程调试端口
+        user_data_dir (str | None): 浏览器用户数据目录，默认在爬虫目录下的 .edge-profile
+        headless (bool): 是否无头模式
+
+    Returns:
+        subprocess.Popen: 浏览器进程
+    """
+    edge = shutil.which("msedge") or shutil.which("microsoft-edge") or next(
+        (p for p in EDGE_CANDIDATES if os.path.exists(p)), None)
+    if edge is None:
+        raise RuntimeError("未找到Edge浏览器")
+    user_data_dir = user_data_dir or str(Path(__file__).resolve().parent / ".edge-profile")
+    args = [edge, f"--remote-debugging-port={port}", f"--user-data-dir={user_data_dir}",
+            "--disable-gpu", "--no-first-run"]
+    if headless:
+        args.append("--headless=new")
+    return subprocess.Popen(args)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="管理Edge驱动缓存与常驻浏览器")
+    parser.add_argument("--refresh", action="store_true", help="重新解析并缓存驱动版本")
+    parser.add_argument("--launch", type=int, nargs="?", const=DEFAULT_DEBUG_PORT, metavar="PORT",
+                        help="启动开启远程调试端口的常驻浏览器")
+    parser.add_argument("--headed", action="store_true", help="常驻浏览器使用有界面模式")
+    args = parser.parse_args()
+
+    print("驱动路径:", driver_path(refresh=args.refresh))
+    if args.launch:
+        process = launch_debug_browser(args.launch, headless=not args.headed)
+        print(f"常驻浏览器已启动（pid {process.pid}），爬虫可使用 --debugger-address 127.0.0.1:{args.launch} 附加")
@@ -0,0 +1,254 @@
+import csv
+import re
+import sys
+from dataclasses import dataclass, replace
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Iterator, List
+
+from bs4 import BeautifulSoup
+from dateutil.parser import parse
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+@dataclass(frozen=True, slots=True)
+class Event:
+    """一条活动记录，开始/结束时间只在解析时转换一次"""
+
+    name: str
+    start: datetime | None
+    end: datetime | None
+    type: int = -1
+
+
+@dataclass
+class ActivityTypeRule:
+    id: int
+    name: str
+    keywords: List[str]
+
+
+ACTIVITY_RULES = [
+    ActivityTypeRule(0, "卡池", ["寻访", "中坚", "招募"]),
+    ActivityTypeRule(1, "活动", ["-", "SideStory", "#", "故事集", "资源收集", "集成"]),
+    ActivityTypeRule(2, "福利", ["签到", "赠送", "领取", "墙", "资深干员特别调用"]),
+    ActivityTypeRule(-1, "商店", ["家具", "新装", "时装", "主题", "上架", "风尚回顾"]),
+    ActivityTypeRule(99, "长期", ["剿灭", "保全"]),
+]
+
+DATE_PATTERN = re.compile(r"(\d{1,2}月\d{1,2}日\s*\d{2}:\d{2})\s*[～~-]\s*(\d{1,2}月\d{1,2}日\s*\d{2}:\d{2})")
+TITLE_PATTERN = re.compile(r'^([一二三四五六七八九十]+、|\d+\.)\s*(.+)')
+SUBTITLE_PATTERN = re.compile(r'(?:◆|<|【)(第.+?)(?:>|】|$)')
+STAGE_PATTERN = re.compile(r'开放关卡：\s*(\S+)')
+CSV_HEADER = ['名称', '开始时间', '结束时间', '类型']
+
+
+def determine_activity_type(title: str) -> int:
+    """
+    根据标题判断活动类型
+    :param title: 活动标题
+    :return: 类型ID (未匹配时返回-1)
+    """
+    for rule in ACTIVITY_RULES:
+        if any(keyword in title for keyword in rule.keywords):
+            return rule.id
+    return -1
+
+
+def transform_data(input_str: str):
+    """
+    将日期字符串转换为标准日期格式
+    """
+    try:
+        input_str = input_str.replace("日", " ").replace("月", "-")
+        input_str = input_str.replace("年", "-")
+        return parse(input_str)
+    except ValueError:
+        return None
+
+
+def _parse_time(text: str | None) -> datetime | None:
+    return transform_data(text) if text else None
+
+
+def _flush_section(section: dict | None) -> Iterator[Event]:
+    """输出一个主标题下的活动：没有子标题时输出主条目本身，否则输出各子标题"""
+    if section is None:
+        return
+    if not section['subsections']:
+        if section['start_time'] is None and section['end_time'] is None:
+            return
+        yield Event(section['title'], _parse_time(section['start_time']), _parse_time(section['end_time']))
+    for sub in section['subsections']:
+        yield Event(sub['subtitle'], _parse_time(sub['start_time']), _parse_time(sub['end_time']))
+
+
+def iter_announcement_events(html_content: str) -> Iterator[Event]:
+    """逐条产出官网活动公告中的活动
+
+    公告的唯一解析入口，test.py 导出的JSON与 json_to_csv 生成的CSV都由它产出：
+    同一时刻只缓存当前主标题下的子标题，主标题结束时即输出其中的活动
+
+    Args:
+        html_content (str): 公告页面的HTML
+
+    Yields:
+        Event: 尚未分类（type 为 -1）的活动
+    """
+    soup = BeautifulSoup(html_content, 'html.parser')
+    try:
+        yield from _iter_sections(soup)
+    finally:
+        # 解析树中父子节点互相引用，显式拆除以便立即释放，不必等待垃圾回收
+        soup.decompose()
+
+
+def _iter_sections(soup) -> Iterator[Event]:
+    container = soup.find('div', class_='_0868052a')
+    if not container:
+        print("未找到指定的HTML容器")
+        return
+
+    section = None
+    subsection = None
+    for element in container.children:
+        if not element.name:
+            continue
+        # 处理非段落元素时结束当前子标题
+        if element.name != 'p':
+            subsection = None
+            continue
+
+        text = element.get_text(strip=True)
+        if not text:
+            continue
+
+        title_match = TITLE_PATTERN.match(text)
+        if title_match:
+            yield from _flush_section(section)
+            title = title_match.group(2).strip()
+            title = title.partition('，')[0] if not title.partition('，')[2] else title.partition('，')[2]
+            section = {'title': title, 'subsections': [], 'start_time': None, 'end_time': None}
+            subsection = None
+            continue
+
+        subtitle_match = SUBTITLE_PATTERN.search(text)
+        if subtitle_match and section:
+            subsection = {'subtitle': subtitle_match.group(1).strip(), 'start_time': None, 'end_time': None}
+            section['subsections'].append(subsection)
+            continue
+
+        time_match = DATE_PATTERN.search(text)
+        if time_match:
+            target = subsection or section
+            if target:
+                target['start_time'], target['end_time'] = time_match.group(1), time_match.group(2)
+            continue
+
+        if '开放关卡：' in text and subsection:
+            stage_match = STAGE_PATTERN.search(text)
+            if stage_match:
+                subsection['subtitle'] += f" - {stage_match.group(1).strip()}"
+
+    yield from _flush_section(section)
+
+
+def pool_name(event_type: str, six_star: str) -> str:
+    """按 six2csv.process_name_column 的规则生成卡池名称"""
+    name = event_type.replace("常驻标准寻访", "【标准池】").replace("中坚寻访", "【中坚池】")
+    if "限定寻访·庆典" in name:
+        name = "【限定池】"
+    return name+six_star.replace("[限定]", "")
+
+
+def iter_pool_events(soup) -> Iterator[Event]:
+    """逐条产出森空岛主页中的卡池
+
+    与 test2.parse_six_star_events 写出 arknights_events.csv、再由 six2csv 筛选、改名的结果相同，
+    但不经过中间的CSV与DataFrame
+
+    Args:
+        soup (BeautifulSoup): 森空岛个人主页
+
+    Yields:
+        Event: 类型为 0 的卡池
+    """
+    from test2 import pair_title_briefs, parse_event_container
+
+    for title_block, brief in pair_title_briefs(soup):
+        if not title_block:
+            continue
+        event = parse_event_container(title_block.get_text(strip=True), brief.get_text(strip=True))
+        if not event or event["six_star"] in ("", "N/A"):
+            continue
+        yield Event(pool_name(event["event_type"], event["six_star"]),
+                    _parse_time(event["start_time"]), _parse_time(event["end_time"]), 0)
+
+
+def iter_pool_page(html_content: str) -> Iterator[Event]:
+    """解析一个森空岛主页的HTML并逐条产出卡池，解析完即释放解析树"""
+    soup = BeautifulSoup(html_content, "html.parser")
+    try:
+        yield from iter_pool_events(soup)
+    finally:
+        soup.decompose()
+
+
+def classify(events: Iterable[Event]) -> Iterator[Event]:
+    """按标题为活动分类"""
+    for event in events:
+        yield replace(event, type=determine_activity_type(event.name))
+
+
+def write_csv(events: Iterable[Event], output_file: str, encoding: str = 'utf-8-sig') -> int:
+    """把活动逐条写入CSV
+
+    Args:
+        events (Iterable[Event]): 活动
+        output_file (str): 输出路径
+        encoding (str): 文件编码
+
+    Returns:
+        int: 写入的条数
+    """
+    count = 0
+    with open(output_file, 'w', newline='', encoding=encoding) as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(CSV_HEADER)
+        for event in events:
+            writer.writerow([event.name, event.start or "", event.end or "", event.type])
+            count += 1
+    return count
+
+
+def iter_files(paths: Iterable[str], stage) -> Iterator[Event]:
+    """依次读取每个HTML文件并交给解析阶段，同一时刻只持有一个页面"""
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            yield from stage(f.read())
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from profiling import StageProfiler
+    from snapshot import csv_to_snapshot
+
+    parser = argparse.ArgumentParser(description="从活动公告或森空岛主页直接生成活动CSV")
+    parser.add_argument("kind", choices=["announcements", "pools"], help="页面类型")
+    parser.add_argument("pages", nargs="+", help="HTML文件")
+    parser.add_argument("-o", "--output", default="output.csv", help="输出CSV")
+    StageProfiler.add_arguments(parser)
+    args = parser.parse_args()
+    profiler = StageProfiler.from_args(args, source="events")
+
+    if args.kind == "announcements":
+        stream = classify(iter_files(args.pages, iter_announcement_events))
+    else:
+        stream = iter_files(args.pages, iter_pool_page)
+    with profiler.stage("stream_events", kind=args.kind, pages=len(args.pages)):
+        count = write_csv(stream, args.output)
+    csv_to_snapshot(args.output)
+    print(f"已写入 {count} 条活动到 {args.output}")
@@ -1,37 +1,44 @@
+import sys
 import time
 import re
 import csv
+from pathlib import Path
 from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.edge.service import Service
 from selenium.webdriver.edge.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.microsoft import EdgeChromiumDriverManager
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from profiling import StageProfiler
+from edge_driver import create_driver, release_driver
+from blocking import enable_blocking, enable_performance_log, report_fetch
 
-def get_target_url_from_page(url, xpath_selector):
+
+def get_target_url_from_page(url, xpath_selector, debugger_address=None, block=True):
     """获取最新的YJ活动预告新闻
 
     Args:
         url (str): 特定的网页
         xpath_selector (str): 用于定位目标元素的XPath选择器
+        debugger_address (str | None): 已运行浏览器的远程调试地址，给出时附加到该浏览器
+        block (bool): 是否按 blocking 中的规则屏蔽无关资源
 
     Returns:
         str: 解析后的网页链接
     """
-    edge_options = configure_edge_options()
-    service = Service(EdgeChromiumDriverManager().install())
-    driver = webdriver.Edge(service=service, options=edge_options)
+    driver = create_driver(configure_edge_options(), debugger_address)
     try:
         driver.set_page_load_timeout(15)
+        if block:
+            enable_blocking(driver, url)
         print("正在快速加载页面...")
         driver.get(url)
 
         # 使用传入的XPath选择器定位元素
         element = WebDriverWait(driver, 20).until(
             EC.element_to_be_clickable((By.XPATH, xpath_selector)))
+        report_fetch(driver, url, block)
 
         # 获取目标链接直接访问（避免点击不稳定）
         target_url = element.get_attribute("href")
@@ -42,7 +49,7 @@ def get_target_url_from_page(url, xpath_selector):
         print(f"加载异常: {str(e)}")
         return None
     finally:
-        driver.quit()
+        release_driver(driver, attached=bool(debugger_address))
 
 
 def configure_edge_options():
@@ -69,19 +76,20 @@ def configure_edge_options():
     edge_options.add_experimental_option("excludeSwitches",
                                          ["enable-automation"])
     # 网络协议优化
-    edge_options.add_argument("--enable-tcp-fast-open --dns-prefetch-disable")
+    edge_options.add_argument("--enable-tcp-fast-open")
+    edge_options.add_argument("--dns-prefetch-disable")
     edge_options.add_argument("--log-level=3")  # 设置日志级别为FATAL，消除不必要的警告
-    return edge_options
+    return enable_performance_log(edge_options)
 
 
-def get_dynamic_content(url, core_container_selector, target_element_selector):
+def get_dynamic_content(url, core_container_selector, target_element_selector, debugger_address=None, block=True):
     """
     使用无头模式Edge浏览器获取动态渲染的网页内容，并进行性能优化和反检测处理
 
     本函数实现以下核心功能：
     1. 配置高性能无界面浏览器环境
-    2. 自动管理Edge驱动版本
-    3. 网页资源加载优化
+    2. 本地缓存Edge驱动路径（见 edge_driver.driver_path）
+    3. 网页资源加载优化（DevTools 按站点屏蔽资源，并报告加载时间与节省的流量）
     4. 自动化特征隐藏
     5. 智能等待与动态内容加载
     6. 异常处理和资源回收
@@ -90,6 +98,8 @@ def get_dynamic_content(url, core_container_selector, target_element_selector):
         url (str): 需要抓取的目标网页URL，必须包含协议头（http/https）
         core_container_selector (str): 核心容器的CSS选择器
         target_element_selector (str): 目标元素的CSS选择器
+        debugger_address (str | None): 已运行浏览器的远程调试地址，给出时附加到该浏览器，省去冷启动
+        block (bool): 是否按 blocking 中的规则屏蔽字体、音视频、统计脚本等资源
 
     Returns:
         BeautifulSoup: 解析后的HTML文档对象，可直接用于数据提取
@@ -105,17 +115,18 @@ def get_dynamic_content(url, core_container_selector, target_element_selector):
         - 支持页面类型：SPA（单页应用）、CSR（客户端渲染）网页
         - 网络要求：需要允许WebSocket协议
     """
-    edge_options = configure_edge_options()
-    service = Service(EdgeChromiumDriverManager().install())
-    driver = webdriver.Edge(service=service, options=edge_options)
+    driver = create_driver(configure_edge_options(), debugger_address)
     try:
         driver.set_page_load_timeout(15)
+        if block:
+            enable_blocking(driver, url)
         print("正在快速加载页面...")
         driver.get(url)
 
         # 等待页面完全加载
         WebDriverWait(driver, 10).until(lambda d: d.execute_script(
             "return document.readyState") == "complete")
+        report_fetch(driver, url, block)
         print(1)
         # 确保核心容器加载
         WebDriverWait(driver, 10).until(
@@ -139,7 +150,7 @@ def get_dynamic_content(url, core_container_selector, target_element_selector):
         print(f"加载异常: {str(e)}")
         return None
     finally:
-        driver.quit()
+        release_driver(driver, attached=bool(debugger_address))
 
 
 def css_selector_version(html):
@@ -149,6 +160,13 @@ def css_selector_version(html):
 
 
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="提取官网活动预告内容")
+    StageProfiler.add_arguments(parser)
+    args = parser.parse_args()
+    profiler = StageProfiler.from_args(args, source="get_theme_json")
+
     # 读取鹰角官方，爬取活动卡池信息，活动信息
     # yj_url = "https://ak.hypergryph.com/news"
     # xpath_selector = '//a[contains(translate(., "ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz"), "活动预告")]'
@@ -157,8 +175,10 @@ if __name__ == "__main__":
     # target_element_selector = '[style*="overflow-y: scroll; margin-right: -16px;"]'
     # # yj_url = ""
     # yj_html = get_dynamic_content(news_url, core_container_selector, target_element_selector)
-    with open("debug_page.html", "r", encoding="utf-8") as f:
-        soup = f.read()
+    with profiler.stage("read_page"):
+        with open("debug_page.html", "r", encoding="utf-8") as f:
+            soup = f.read()
+    with profiler.stage("select_theme"):
         theme_res = css_selector_version(soup)
-        with open("theme.html", "w", encoding="utf-8") as f:
-            f.write(theme_res.prettify())
+    with open("theme.html", "w", encoding="utf-8") as f:
+        f.write(theme_res.prettify())
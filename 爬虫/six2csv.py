@@ -1,6 +1,14 @@
+import sys
+from pathlib import Path
+
 import pandas as pd
 from dateutil.parser import parse
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from dedup import MergeRule, near_duplicates
+from profiling import StageProfiler
+from snapshot import csv_to_snapshot, is_fresh, read_snapshot, snapshot_path
+
 
 def transform_data(input_str: str):
     """
@@ -17,8 +25,12 @@ def transform_data(input_str: str):
 def read_data(file_path):
     """
     读取CSV文件并返回DataFrame
+    同名快照存在且不比CSV旧时直接读取快照
     """
     try:
+        snap = snapshot_path(file_path)
+        if is_fresh(snap, file_path):
+            return read_snapshot(snap).to_frame()
         return pd.read_csv(file_path)
     except FileNotFoundError:
         print(f"错误：未找到 {file_path} 文件，请检查文件路径和文件名是否正确。")
@@ -68,14 +80,26 @@ def process_name_column(df):
     return df
 
 
-def merge_dataframes(df1, df2):
+def drop_near_duplicates(df, rule: MergeRule | None = None):
+    """
+    去除名称略有不同、时间几乎相同的重复活动，每组按 rule 保留一条
+    """
+    starts = pd.to_datetime(df.iloc[:, 1], errors="coerce").to_numpy("datetime64[s]")
+    ends = pd.to_datetime(df.iloc[:, 2], errors="coerce").to_numpy("datetime64[s]")
+    types = pd.to_numeric(df["类型"], errors="coerce").fillna(-1).to_numpy() if "类型" in df.columns else None
+    keep = near_duplicates(df.iloc[:, 0].astype(str).tolist(), starts, ends, types, rule)
+    return df[keep]
+
+
+def merge_dataframes(df1, df2, rule: MergeRule | None = None):
     """
     合并两个DataFrame
-    数据后处理，包括数据类型转换、去重和排序
+    数据后处理，包括数据类型转换、去重（名称相同或近似重复时保留 df1 中的记录）和排序
     """
     df = pd.concat([df1, df2], axis=0, ignore_index=True)
     df = df.convert_dtypes()
     df = df.drop_duplicates(df.columns[0])
+    df = drop_near_duplicates(df, rule)
     df["开始时间"] = pd.to_datetime(df["开始时间"], errors="coerce")
     df = df.sort_values(by="开始时间", ascending=True)
     return df
@@ -83,39 +107,58 @@ def merge_dataframes(df1, df2):
 
 def save_data(df, file_path):
     """
-    将DataFrame保存为CSV文件
+    将DataFrame保存为CSV文件，并写出同名快照供绘图脚本直接读取
+    快照由刚写出的CSV生成（展开天数简写与排期模板），与直接读取CSV的结果一致
     """
     try:
         df.to_csv(file_path, index=False)
+        if "类型" in df.columns:
+            csv_to_snapshot(file_path)
     except Exception as e:
         print(f"保存文件 {file_path} 时出现错误：{e}")
 
 
-def process_data(skdpath: str = "arknights_events.csv", oppath: str = "爬虫/卡池.csv"):
+def process_data(skdpath: str = "arknights_events.csv", oppath: str = "爬虫/卡池.csv", profiler: StageProfiler | None = None,
+                 rule: MergeRule | None = None):
     """
     主处理函数，调用其他函数完成数据处理流程
+    rule 为近似重复活动的判定与合并规则，默认 MergeRule()
     """
+    profiler = profiler or StageProfiler()
 
-    df = read_data(skdpath)
+    with profiler.stage("read_events"):
+        df = read_data(skdpath)
     if df is None:
         return
 
-    df = filter_non_null_stars(df)
-    df = process_date_columns(df)
-    df = process_name_column(df)
+    with profiler.stage("transform_events"):
+        df = filter_non_null_stars(df)
+        df = process_date_columns(df)
+        df = process_name_column(df)
 
-    df2 = read_data(oppath)
+    with profiler.stage("read_pools"):
+        df2 = read_data(oppath)
     if df2 is None:
         return
 
-    df = merge_dataframes(df2, df)
-
-    save_data(df, oppath)
+    with profiler.stage("merge_pools"):
+        df = merge_dataframes(df2, df, rule)
+        save_data(df, oppath)
 
     final_path = ".\所有活动数据.csv"
-    save_data(merge_dataframes(read_data(final_path), df), final_path)
+    with profiler.stage("merge_all"):
+        save_data(merge_dataframes(read_data(final_path), df, rule), final_path)
     return df
 
 
 if __name__ == "__main__":
-    process_data()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="合并森空岛卡池数据")
+    parser.add_argument("--threshold", type=float, default=MergeRule.threshold, help="近似重复的名称相似度下限")
+    parser.add_argument("--keep", choices=["first", "last", "longest"], default=MergeRule.keep,
+                        help="近似重复活动保留哪一条")
+    StageProfiler.add_arguments(parser)
+    args = parser.parse_args()
+    process_data(profiler=StageProfiler.from_args(args, source="six2csv"),
+                 rule=MergeRule(threshold=args.threshold, keep=args.keep))
@@ -1,30 +1,43 @@
+import sys
 import time
 import re
 import csv
+from pathlib import Path
 from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.edge.service import Service
 from selenium.webdriver.edge.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.microsoft import EdgeChromiumDriverManager
 from tqdm import tqdm
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from profiling import StageProfiler
+from page_archive import PageArchive
+from edge_driver import create_driver, driver_path, release_driver
+from blocking import enable_blocking, enable_performance_log, report_fetch
+from events import DATE_PATTERN
+
 
 class BrowserManager:
     """浏览器操作管理类，负责浏览器实例的创建、操作和关闭"""
 
-    def __init__(self, headless: bool = True, page_load_timeout: int = 15):
+    def __init__(self, headless: bool = True, page_load_timeout: int = 15,
+                 debugger_address: str | None = None, block_resources: bool = True):
         """
         初始化浏览器管理器
         
         Args:
             headless: 是否无头模式
             page_load_timeout: 页面加载超时时间（秒）
+            debugger_address: 已运行浏览器的远程调试地址，给出时附加到该浏览器而不是冷启动
+            block_resources: 是否按 blocking 中的规则屏蔽字体、音视频、统计脚本等资源
         """
         self.headless = headless
         self.page_load_timeout = page_load_timeout
+        self.debugger_address = debugger_address
+        self.block_resources = block_resources
+        self.last_stats = None  # 最近一次页面加载的统计
+        self.last_html = None  # 最近一次抓取的原始页面（driver.page_source），供存档使用
         self.driver = None  # 浏览器驱动实例
         self.is_running = False  # 浏览器运行状态
 
@@ -35,11 +48,10 @@ class BrowserManager:
             return
 
         edge_options = self._configure_edge_options()
-        service = Service(EdgeChromiumDriverManager().install())
-        self.driver = webdriver.Edge(service=service, options=edge_options)
+        self.driver = create_driver(edge_options, self.debugger_address)
         self.driver.set_page_load_timeout(self.page_load_timeout)
         self.is_running = True
-        print("浏览器已启动")
+        print("已附加到浏览器" if self.debugger_address else "浏览器已启动")
 
     def _configure_edge_options(self) -> Options:
         """
@@ -67,10 +79,21 @@ class BrowserManager:
         edge_options.add_experimental_option("excludeSwitches",
                                              ["enable-automation"])
         # 网络协议优化
-        edge_options.add_argument(
-            "--enable-tcp-fast-open --dns-prefetch-disable")
+        edge_options.add_argument("--enable-tcp-fast-open")
+        edge_options.add_argument("--dns-prefetch-disable")
         edge_options.add_argument("--log-level=3")  # 设置日志级别为FATAL，消除不必要的警告
-        return edge_options
+        return enable_performance_log(edge_options)
+
+    def _load(self, url: str) -> None:
+        """按屏蔽规则加载页面"""
+        if self.block_resources:
+            enable_blocking(self.driver, url)
+        print(f"正在加载页面: {url}")
+        self.driver.get(url)
+
+    def _report(self, url: str) -> None:
+        """记录并打印页面加载统计"""
+        self.last_stats = report_fetch(self.driver, url, self.block_resources)
 
     def fetch_dynamic_page_content(self,
                                    url: str,
@@ -92,12 +115,12 @@ class BrowserManager:
             self.start_browser()
 
         try:
-            print(f"正在加载页面: {url}")
-            self.driver.get(url)
+            self._load(url)
 
             # 等待页面完全加载
             WebDriverWait(self.driver, 10).until(lambda d: d.execute_script(
                 "return document.readyState") == "complete")
+            self._report(url)
 
             # 确保核心容器加载
             WebDriverWait(self.driver, 10).until(
@@ -116,7 +139,8 @@ class BrowserManager:
                 EC.presence_of_element_located(
                     (By.CSS_SELECTOR, target_element_selector)))
 
-            return BeautifulSoup(self.driver.page_source, "html.parser")
+            self.last_html = self.driver.page_source
+            return BeautifulSoup(self.last_html, "html.parser")
 
         except Exception as e:
             print(f"加载异常: {str(e)}")
@@ -138,12 +162,12 @@ class BrowserManager:
             self.start_browser()
 
         try:
-            print(f"正在加载页面: {url}")
-            self.driver.get(url)
+            self._load(url)
 
             # 使用传入的XPath选择器定位元素
             element = WebDriverWait(self.driver, 20).until(
                 EC.element_to_be_clickable((By.XPATH, xpath_selector)))
+            self._report(url)
 
             # 获取目标链接直接访问（避免点击不稳定）
             target_url = element.get_attribute("href")
@@ -157,20 +181,19 @@ class BrowserManager:
     def close_browser(self) -> None:
         """关闭浏览器实例"""
         if self.is_running and self.driver:
-            self.driver.quit()
+            release_driver(self.driver, attached=bool(self.debugger_address))
             self.is_running = False
-            print("浏览器已关闭")
+            print("已断开浏览器" if self.debugger_address else "浏览器已关闭")
 
 
 def parse_event_container(title_text, content_text, title_specail_list=None):
     """
     解析单条活动的数据
     """
-    date_pattern = r"(\d{1,2}月\d{1,2}日\s*\d{2}:\d{2})\s*[～~-]\s*(\d{1,2}月\d{1,2}日\s*\d{2}:\d{2})"
     six_star_pattern = r"★★★★★★[:：]?(.+?)[\(（]"
     try:
 
-        time_match = re.search(date_pattern, content_text)
+        time_match = DATE_PATTERN.search(content_text)
         if time_match:
             start, end = time_match.groups()
         else:
@@ -201,28 +224,42 @@ def parse_event_container(title_text, content_text, title_specail_list=None):
         return None
 
 
-def parse_six_star_events(soup):
-    """
-    解析森空岛网页内容，提取活动信息并保存到CSV文件
-    """
-    selectors = {
-        "title": "div.title-name",
-        "content_container": 'div[class^="PostItem__Brief-"]',
-    }
+def _is_title_block(tag) -> bool:
+    return any(c.startswith("title-name") for c in tag.get("class", []))
 
-    # 匹配森空岛帖子简要
-    content_containers = soup.select(selectors["content_container"])
-    events = []
 
-    for content_container in content_containers:
-        # 尝试在内容容器的上级或同级中找到标题
-        title_block = content_container.find_previous(
-            'div', class_=lambda x: x and x.startswith('title-name'))
+def _is_brief_block(tag) -> bool:
+    return " ".join(tag.get("class", [])).startswith("PostItem__Brief-")
 
-        if not title_block:
-            title_block = content_container.find_parent().find(
-                'div', class_=lambda x: x and x.startswith('title-name'))
 
+def pair_title_briefs(soup):
+    """
+    按文档顺序一次遍历所有 div，把每个帖子简要与它之前最近的标题配对，总复杂度 O(n)
+
+    简要之前没有任何标题时，退回到在其父元素中查找标题
+
+    Returns:
+        list[tuple[Tag | None, Tag]]: （标题, 简要）列表，按简要在文档中的顺序排列
+    """
+    pairs = []
+    title_block = None
+    for div in soup.find_all("div"):
+        if _is_brief_block(div):
+            block = title_block
+            if block is None and div.parent is not None:
+                block = div.parent.find("div", class_=lambda x: x and x.startswith("title-name"))
+            pairs.append((block, div))
+        if _is_title_block(div):
+            title_block = div
+    return pairs
+
+
+def parse_six_star_events(soup, output="arknights_events.csv"):
+    """
+    解析森空岛网页内容，提取活动信息并保存到CSV文件
+    """
+    events = []
+    for title_block, content_container in pair_title_briefs(soup):
         if not title_block:
             print(
                 f"警告：未找到关联标题->内容 {content_container.get_text(strip=True)[:20]}..."
@@ -237,7 +274,7 @@ def parse_six_star_events(soup):
             events.append(event)
 
     if events:
-        with open("arknights_events.csv",
+        with open(output,
                   "w",
                   newline="",
                   encoding="utf-8-sig") as f:
@@ -256,63 +293,35 @@ def parse_six_star_events(soup):
     return events
 
 
-def extract_event_details(html_content):
-    """
-    从HTML内容中提取活动详情信息
-    返回结构：[{活动名称, 开始时间, 结束时间}]
-    """
-    soup = BeautifulSoup(html_content, 'html.parser')
-    events = []
-
-    # 遍历所有段落标签
-    for p in soup.find_all('p'):
-        text = p.get_text(strip=True)
-
-        # 匹配活动名称模式：<strong>活动名称</strong>
-        if strong_tag := p.find('strong'):
-            event_name = strong_tag.get_text(strip=True)
-
-            # 寻找时间信息（可能在当前段落或后续段落）
-            time_match = re.search(
-                r'(开放时间|活动时间)[：:]?\s*(\d{1,2}月\d{1,2}日 \d{2}:\d{2})\s*[～~至-]\s*(\d{1,2}月\d{1,2}日 \d{2}:\d{2})',
-                text)
-
-            # 如果当前段落没有时间信息，检查后续兄弟节点
-            if not time_match:
-                next_sib = p.find_next_sibling()
-                if next_sib and next_sib.name == 'p':
-                    time_match = re.search(
-                        r'(\d{1,2}月\d{1,2}日 \d{2}:\d{2})\s*[～~至-]\s*(\d{1,2}月\d{1,2}日 \d{2}:\d{2})',
-                        next_sib.get_text(strip=True))
-
-            # 提取时间信息
-            if time_match:
-                start_time = time_match.group(2) if time_match.group(
-                    2) else time_match.group(1)
-                end_time = time_match.group(3) if time_match.group(
-                    3) else time_match.group(2)
-                events.append({
-                    '活动名称': event_name,
-                    '开始时间': start_time,
-                    '结束时间': end_time
-                })
-
-    return events
-
-
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="爬取森空岛卡池信息")
+    parser.add_argument("--debugger-address", help="附加到已运行浏览器的远程调试地址，如 127.0.0.1:9222")
+    parser.add_argument("--refresh-driver", action="store_true", help="重新解析并缓存Edge驱动")
+    parser.add_argument("--no-block", action="store_true", help="不屏蔽资源（同时记录各站点的传输量基线）")
+    StageProfiler.add_arguments(parser)
+    args = parser.parse_args()
+    profiler = StageProfiler.from_args(args, source="test2")
+    if args.refresh_driver:
+        driver_path(refresh=True)
+
     # 使用浏览器管理器实例爬取数据
-    browser = BrowserManager(headless=True)
+    browser = BrowserManager(headless=True, debugger_address=args.debugger_address,
+                             block_resources=not args.no_block)
 
     try:
         # 读取森空岛的官方，爬取近期轮换卡池信息
         skd_url = "https://www.skland.com/profile?id=7779816949641"
         core_container_selector = '[class*="ProfilePostList__Wrapper"]'
         target_element_selector = '[class*="PostItem__"]'
-        soup = browser.fetch_dynamic_page_content(skd_url,
-                                                  core_container_selector,
-                                                  target_element_selector,
-                                                  scroll_count=8)
+        with profiler.stage("start_browser"):
+            browser.start_browser()
+        with profiler.stage("fetch_page"):
+            soup = browser.fetch_dynamic_page_content(skd_url,
+                                                      core_container_selector,
+                                                      target_element_selector,
+                                                      scroll_count=8)
 
         # 读取鹰角官方，爬取活动卡池信息，活动信息
         # yj_url = "https://ak.hypergryph.com/news"
@@ -321,12 +330,16 @@ if __name__ == "__main__":
         # core_container_selector = '[style*="overflow-y: scroll; margin-right: -16px;"]'
         # target_element_selector = '[style*="overflow-y: scroll; margin-right: -16px;"]'
         # soup = browser.fetch_dynamic_page_content(news_url, core_container_selector, target_element_selector)
+        # 活动公告页面交给 events.iter_announcement_events 解析
 
         if soup:
             # 保存完整页面供分析
             with open("debug_page.html", "w", encoding="utf-8") as f:
                 f.write(soup.prettify())
-            data = parse_six_star_events(soup)
+            # 浏览器给出的原始页面追加到存档（而不是解析后重新序列化的 soup），之后改进解析器时可以重新提取
+            PageArchive().append(skd_url, browser.last_html)
+            with profiler.stage("parse_events"):
+                data = parse_six_star_events(soup)
         else:
             print("未获取到网页内容，无法进行解析。")
 